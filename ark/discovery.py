@@ -1,33 +1,34 @@
+import hashlib
+import os.path
 import shutil
-from collections import defaultdict
-from dataclasses import dataclass
+from collections import defaultdict, deque
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
-from typing import Dict, Generator, List, Set, Tuple
+from typing import Callable, Deque, Dict, Generator, Iterable, List, Optional, Set, Tuple
 
 import ue.hierarchy
 from ark.mod import get_managed_mods, get_official_mods
+from ark.relationcache import FileRelationCache
 from automate.ark import ArkSteamManager
-from config import get_global_config
-from ue.asset import ExportTableItem
-from ue.context import ue_parsing_context
-from ue.loader import AssetLoadException
-from utils.cachefile import cache_data
+from config import ConfigFile
+from ue.diskcache import Changes
+from ue.loader import AssetLoader, AssetLoadException
+from ue.skeleton import FileStamp
+from utils.cachefile import cache_data, hash_key
 from utils.log import get_logger
-from utils.tree import IndexedTree
+from utils.tree import IndexedTree, Node
 
 __all__ = [
     'initialise_hierarchy',
 ]
 
 FORMAT_VERSION = 1
+MIN_PARALLEL_ASSETS = 1000  # smaller sets are quicker to parse than to distribute
+SHARDS_PER_WORKER = 4  # to keep workers busy when some shards are slower than others
 
 logger = get_logger(__name__)
 
-
-@dataclass
-class NodeState:
-    parent: str
-    done: bool = False
+AssetRelations = Tuple[str, List[Tuple[str, str]], Optional[FileStamp]]  # (assetname, relations, source if complete)
 
 
 def initialise_hierarchy(arkman: ArkSteamManager):
@@ -39,57 +40,65 @@ def initialise_hierarchy(arkman: ArkSteamManager):
         shutil.rmtree(path)
     path.mkdir(parents=True, exist_ok=True)
 
+    # Use the hierarchy saved by a previous run if nothing it was built from has changed
+    version_keys = _get_version_keys(arkman)
+    internal_filename = Path('config') / 'hierarchy.yaml'
+    tree_key = dict(format=FORMAT_VERSION, scopes=version_keys, internal=_hash_file(internal_filename))
+    tree_filename = path / 'tree.bin'
+    if ue.hierarchy.load_hierarchy(tree_filename, hash_key(tree_key)):
+        logger.info('Hierarchy loaded from %s', tree_filename)
+        return
+
     # Gather cached relationships from core and mods, re-generating as needed
-    relations = _gather_relations(arkman, path)
+    relations = _gather_relations(arkman, path, version_keys)
+    skeleton_cache = arkman.getLoader().skeleton_cache
+    if skeleton_cache:
+        skeleton_cache.flush()
 
     # Parse the relationships into ue.hierarchy.tree
     ue.hierarchy.tree.clear()
-    ue.hierarchy.load_internal_hierarchy(Path('config') / 'hierarchy.yaml')
-    _populate_tree_from_relations(ue.hierarchy.tree, relations)
+    ue.hierarchy.load_internal_hierarchy(internal_filename)
+    _populate_tree_from_relations(ue.hierarchy.tree, relations, Path(arkman.config.settings.DataDir))
+    ue.hierarchy.freeze_hierarchy()
+
+    try:
+        ue.hierarchy.save_hierarchy(tree_filename, hash_key(tree_key))
+    except IOError:
+        logger.exception('Unable to save hierarchy to %s', tree_filename)
 
     logger.info('Hierarchy reconstruction complete')
 
 
-def _populate_tree_from_relations(tree: IndexedTree[str], relations: List[Tuple[str, str]]):
+def _hash_file(filename: Path) -> str:
+    with open(filename, 'rb') as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+def _populate_tree_from_relations(tree: IndexedTree[str], relations: List[Tuple[str, str]], datadir: Path):
     # Convert inputs to a more useful form (a dict of tree segments for each parent)
     parents: Dict[str, Set[str]] = defaultdict(set)
     for name, parent in relations:
         parents[parent].add(name)
 
-    # Create a list of parents ordered by path length ('/' count) to improve insertion order
-    parent_order: List[NodeState] = [NodeState(key) for key in sorted(parents.keys(), key=lambda k: k.count('/'))]
-
-    # Continually try to insert each of our segments until all done
-    prev_not_done = -1
-    not_done = 99999999
-    while not_done and not_done != prev_not_done:
-        prev_not_done = not_done
-        not_done = 0
-        for state in parent_order:
-            if state.done:
-                continue
-
-            not_done += 1
+    # Grow the tree outwards from the parents it already holds (the internal hierarchy), breadth-first
+    queue: Deque[Node[str]] = deque(tree[parent] for parent in parents if parent in tree)
+    while queue:
+        node = queue.popleft()
+        for name in sorted(parents.pop(node.data)):
+            child = tree.add(node, name)
+            if name in parents:
+                queue.append(child)
 
-            parent = state.parent
-
-            # Can we insert this one yet?
-            if state.parent in tree:
-                for name in parents[parent]:
-                    tree.add(parent, name)
-                state.done = True
-    else:
-        # We hit stable state, but have entries remaining
-        leftovers = {state.parent: parents[state.parent] for state in parent_order if not state.done}
-        _process_leftover_relations(leftovers)
+    # Anything left is not connected to the tree
+    _process_leftover_relations(parents, datadir)
 
 
-def _process_leftover_relations(entries: Dict[str, Set[str]]):
+def _process_leftover_relations(entries: Dict[str, Set[str]], datadir: Path):
     transients = list(p for p in entries.keys() if p.startswith('/Engine/Transient.'))
     for parent in transients:
         del entries[parent]
 
-    filename = Path(get_global_config().settings.DataDir) / 'hierarchy_skips.txt'
+    filename = datadir / 'hierarchy_skips.txt'
 
     with open(filename, 'wt', encoding='utf-8') as f:
         for parent in sorted(entries.keys()):
@@ -101,58 +110,98 @@ def _process_leftover_relations(entries: Dict[str, Set[str]]):
     logger.warning(f"Could not place {total} entries from {len(entries)} parents (see {filename})")
 
 
-def _gather_relations(arkman: ArkSteamManager, basepath: Path):
-    relations: List[Tuple[str, str]]  # list of (name, parent)
+def _get_version_keys(arkman: ArkSteamManager) -> Dict[str, Dict]:
+    '''Keys identifying the versions of core and each mod's relations, by cache filename.'''
     inclusions = arkman.config.optimisation.SearchInclude
     exclusions = arkman.config.optimisation.SearchIgnore
 
-    basepath.mkdir(parents=True, exist_ok=True)
-
-    # Scan core (or read cache)
-    cachefile = basepath / 'core'
-    version_key = dict(format=FORMAT_VERSION, game_buildid=arkman.getGameBuildId(), inclusions=inclusions, exclusions=exclusions)
-    relations = cache_data(version_key, cachefile, lambda _: _scan_core(arkman))
-
-    # Scan /Game/Mods/<modid> for each installed mod (or read cache)
+    keys: Dict[str, Dict] = dict()
+    keys['core'] = dict(format=FORMAT_VERSION,
+                        game_buildid=arkman.getGameBuildId(),
+                        inclusions=inclusions,
+                        exclusions=exclusions)
     for modid in get_managed_mods():
-        cachefile = basepath / f'mod-{modid}'
         mod_version = arkman.getModData(modid)['version']  # type:ignore
-        version_key = dict(format=FORMAT_VERSION, mod_version=mod_version, inclusions=inclusions, exclusions=exclusions)
-        mod_relations = cache_data(version_key, cachefile, lambda _: _scan_mod(modid, arkman))
-        relations.extend(mod_relations)
+        keys[f'mod-{modid}'] = dict(format=FORMAT_VERSION, mod_version=mod_version, inclusions=inclusions, exclusions=exclusions)
+
+    return keys
+
+
+def _gather_relations(arkman: ArkSteamManager, basepath: Path, version_keys: Dict[str, Dict]):
+    relations: List[Tuple[str, str]]  # list of (name, parent)
+
+    basepath.mkdir(parents=True, exist_ok=True)
+
+    workers = arkman.config.optimisation.DiscoveryWorkers
+    pool = DiscoveryPool(arkman, workers) if workers > 1 else None
+    try:
+        # Scan core (or read cache)
+        cachefile = basepath / 'core'
+        relations = cache_data(version_keys['core'], cachefile,
+                               lambda _: _scan_core(arkman, pool, _open_relation_cache(arkman, basepath / 'core-files')))
+
+        # Scan /Game/Mods/<modid> for each installed mod (or read cache)
+        for modid in get_managed_mods():
+            cachefile = basepath / f'mod-{modid}'
+            version_key = version_keys[f'mod-{modid}']
+            storefile = basepath / f'mod-{modid}-files'
+            mod_relations = cache_data(version_key, cachefile,
+                                       lambda _: _scan_mod(modid, arkman, pool, _open_relation_cache(arkman, storefile)))
+            relations.extend(mod_relations)
+    finally:
+        if pool:
+            pool.close()
 
     return relations
 
 
-def _scan_core(arkman: ArkSteamManager, verbose: bool = False) -> List[Tuple[str, str]]:
+def _open_relation_cache(arkman: ArkSteamManager, filename: Path) -> FileRelationCache:
+    # Per-file results are kept so a rescan only has to parse new and changed files
+    return FileRelationCache(filename, arkman.asset_path, FORMAT_VERSION)
+
+
+def _scan_core(arkman: ArkSteamManager,
+               pool: Optional['DiscoveryPool'] = None,
+               store: Optional[FileRelationCache] = None,
+               verbose: bool = False) -> List[Tuple[str, str]]:
     relations: List[Tuple[str, str]] = list()
 
     # Gather all inheritance relationships from core files
     logger.info('Discovering inheritance for: /Game')
-    for name, parent in _explore_path('/Game', False, arkman, verbose=verbose):
+    for name, parent in _explore_path('/Game', False, arkman, pool, store, verbose=verbose):
         relations.append((name, parent))
 
     # Gather all inheritance relationships from core 'mods'
     for modid in get_official_mods():
         modpath = f'/Game/Mods/{modid}/'
         logger.info(f'Discovering inheritance for: {modpath}')
-        for name, parent in _explore_path(modpath, True, arkman, verbose=verbose):
+        for name, parent in _explore_path(modpath, True, arkman, pool, store, verbose=verbose):
             relations.append((name, parent))
 
+    if store:
+        store.save()
+
     # Make the result stable and repeatable for hashing purposes
     relations.sort()
     return relations
 
 
-def _scan_mod(modid: str, arkman: ArkSteamManager, verbose=False) -> List[Tuple[str, str]]:
+def _scan_mod(modid: str,
+              arkman: ArkSteamManager,
+              pool: Optional['DiscoveryPool'] = None,
+              store: Optional[FileRelationCache] = None,
+              verbose=False) -> List[Tuple[str, str]]:
     relations: List[Tuple[str, str]] = list()
 
     modpath = f'/Game/Mods/{modid}/'
     logger.info('Discovering inheritance for mod: %s', modid)
 
-    for name, parent in _explore_path(modpath, True, arkman, verbose=verbose):
+    for name, parent in _explore_path(modpath, True, arkman, pool, store, verbose=verbose):
         relations.append((name, parent))
 
+    if store:
+        store.save()
+
     # Make the result stable and repeatable for hashing purposes
     relations.sort()
     return relations
@@ -161,9 +210,9 @@ def _scan_mod(modid: str, arkman: ArkSteamManager, verbose=False) -> List[Tuple[
 def _explore_path(path: str,
                   is_mod: bool,
                   arkman: ArkSteamManager,
+                  pool: Optional['DiscoveryPool'] = None,
+                  store: Optional[FileRelationCache] = None,
                   verbose: bool = False) -> Generator[Tuple[str, str], None, None]:
-    n = 0
-
     includes = set(arkman.config.optimisation.SearchInclude)
     mod_excludes = set(arkman.config.optimisation.SearchIgnore)
     core_excludes = set(['/Game/Mods/.*', *arkman.config.optimisation.SearchIgnore])
@@ -171,38 +220,179 @@ def _explore_path(path: str,
 
     loader = arkman.getLoader()
 
-    with ue_parsing_context(properties=False, bulk_data=False):
-        asset_iterator = loader.find_assetnames(path,
-                                                include=includes,
-                                                exclude=excludes,
-                                                extension=ue.hierarchy.asset_extensions,
-                                                return_extension=True)
-        for (assetname, ext) in asset_iterator:
-            n += 1
-            if verbose and n % 200 == 0:
-                logger.info(assetname)
-
-            try:
-                asset = loader.load_asset(assetname, quiet=not verbose)
-            except AssetLoadException:
-                logger.warning("Failed to load asset: %s", assetname)
+    assetnames = list(loader.find_assetnames(path, include=includes, exclude=excludes, extension=ue.hierarchy.asset_extensions))
+
+    # Only assets that are new or have changed since the last scan need to be parsed
+    found: Dict[str, List[Tuple[str, str]]] = dict()
+    paths: Dict[str, Path] = dict()
+    pending = assetnames
+    if store:
+        pending = []
+        for assetname in assetnames:
+            path = _find_file(loader, assetname)
+            relations = store.lookup(assetname, path) if path else None
+            if relations is not None:
+                found[assetname] = relations
                 continue
 
-            try:
-                export: ExportTableItem
-                for export in ue.hierarchy._find_exports_to_store(asset, ext):
-                    parent = ue.hierarchy._get_parent_cls(export)
-                    fullname = export.fullname
-                    if not parent:
-                        raise ValueError(f"Unexpected missing parent for export: {fullname}")
-                    if not fullname:
-                        raise ValueError(f"Unexpected empty export name: {export.asset.assetname}.{export.name}")
+            pending.append(assetname)
+            if path:
+                paths[assetname] = path
+
+    def record(results: Iterable[AssetRelations]):
+        for assetname, relations, source in results:
+            found[assetname] = relations
+            if store and source and assetname in paths:
+                store.store(assetname, paths[assetname], source, relations)
+
+    # Larger sets of assets are parsed by other processes
+    if pool and len(pending) >= MIN_PARALLEL_ASSETS:
+        record(pool.discover(loader, pending))
+    else:
+        # Read upcoming assets in the background while earlier ones are parsed
+        with loader.prefetching(pending):
+            record(_discover_assets(loader, pending, logger.warning, verbose=verbose))
+
+    for assetname in assetnames:
+        yield from found.get(assetname, ())
+
+
+def _find_file(loader: AssetLoader, assetname: str) -> Optional[Path]:
+    try:
+        path, _ = loader.find_raw_asset(assetname)
+        return path
+    except AssetLoadException:
+        return None
+
+
+def _discover_assets(loader: AssetLoader,
+                     assetnames: List[str],
+                     warn: Callable[..., None],
+                     verbose: bool = False) -> Generator[AssetRelations, None, None]:
+    n = 0
+    for assetname in assetnames:
+        n += 1
+        if verbose and n % 200 == 0:
+            logger.info(assetname)
+
+        # Only the name, import and export tables are needed to discover parentage
+        try:
+            skeleton = loader.load_skeleton(assetname, quiet=not verbose)
+        except AssetLoadException:
+            warn("Failed to load asset: %s", assetname)
+            continue
+
+        relations: List[Tuple[str, str]] = []
+        try:
+            for index in skeleton.find_exports_to_store():
+                parent = skeleton.get_parent_fullname(index)
+                fullname = skeleton.get_export_fullname(index)
+                if not parent:
+                    raise ValueError(f"Unexpected missing parent for export: {fullname}")
+
+                relations.append((fullname, parent))
+
+        except IndexError:
+            warn("Failed to check parentage of %s", assetname)
+            yield (assetname, relations, None)
+            continue
+
+        yield (assetname, relations, skeleton.source)
+
+
+ShardResult = Tuple[List[AssetRelations], List[Tuple], Optional[Changes]]  # (relations, warnings, skeleton cache changes)
+
+
+class DiscoveryPool:
+    '''
+    Worker processes that discover relations from shards of an asset list in parallel, started when first needed.
+
+    Results are merged in the same order as the serial scan would produce them, with warnings logged and
+    skeleton cache changes stored by this process once every shard is done.
+    '''
+
+    def __init__(self, arkman: ArkSteamManager, workers: int):
+        self.arkman = arkman
+        self.workers = workers
+        self.executor: Optional[ProcessPoolExecutor] = None
+
+    def discover(self, loader: AssetLoader, assetnames: List[str]) -> Generator[AssetRelations, None, None]:
+        if not self.executor:
+            # Let the workers see everything cached so far, in a database that exists before they start
+            if loader.skeleton_cache:
+                loader.skeleton_cache.create()
+                loader.skeleton_cache.flush()
+
+            arkman = self.arkman
+            self.executor = ProcessPoolExecutor(self.workers,
+                                                initializer=_init_worker,
+                                                initargs=(arkman.config, arkman.game_buildid, arkman.mod_data_cache))
+
+        shards = _shard_by_size(loader, assetnames, self.workers * SHARDS_PER_WORKER)
+        all_changes: List[Changes] = []
+        for relations, warnings, changes in self.executor.map(_discover_shard, shards):
+            for warning in warnings:
+                logger.warning(*warning)
+            if changes:
+                all_changes.append(changes)
+            yield from relations
+
+        # Only write to the database once the workers have stopped reading it
+        if loader.skeleton_cache:
+            for changes in all_changes:
+                loader.skeleton_cache.merge(changes)
+
+    def close(self):
+        if self.executor:
+            self.executor.shutdown()
+            self.executor = None
+
+
+def _shard_by_size(loader: AssetLoader, assetnames: List[str], count: int) -> List[List[str]]:
+    '''Split assets into contiguous runs of roughly equal total file size, so each worker reads neighbouring files.'''
+    sizes = [_get_file_size(loader, assetname) for assetname in assetnames]
+    target = sum(sizes) / count
+
+    shards: List[List[str]] = []
+    shard: List[str] = []
+    shard_size = 0
+    for assetname, size in zip(assetnames, sizes):
+        shard.append(assetname)
+        shard_size += size
+        if shard_size >= target:
+            shards.append(shard)
+            shard = []
+            shard_size = 0
+    if shard:
+        shards.append(shard)
+
+    return shards
+
+
+def _get_file_size(loader: AssetLoader, assetname: str) -> int:
+    try:
+        path, _ = loader.find_raw_asset(assetname)
+        return os.path.getsize(path)
+    except (AssetLoadException, OSError):
+        return 0  # errors are reported by the worker
+
+
+_worker_loader: Optional[AssetLoader] = None
+
+
+def _init_worker(config: ConfigFile, game_buildid: Optional[str], mod_data_cache: Optional[Dict[str, Dict]]):
+    global _worker_loader  # pylint: disable=global-statement
+    arkman = ArkSteamManager(config)
+    arkman.game_buildid = game_buildid
+    arkman.mod_data_cache = mod_data_cache
+    _worker_loader = arkman.createLoader(worker=True)
 
-                    yield (fullname, parent)
 
-            except AssetLoadException:
-                logger.warning("Failed to check parentage of %s", assetname)
+def _discover_shard(assetnames: List[str]) -> ShardResult:
+    loader = _worker_loader
+    assert loader
 
-            # Remove maps from the cache immediately as they are large and cannot be inherited from
-            if ext == '.umap':
-                loader.cache.remove(assetname)
+    warnings: List[Tuple] = []
+    relations = list(_discover_assets(loader, assetnames, lambda *args: warnings.append(args)))
+    changes = loader.skeleton_cache.take_changes() if loader.skeleton_cache else None
+    return (relations, warnings, changes)
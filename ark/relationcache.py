@@ -0,0 +1,108 @@
+'''
+A persistent cache of the inheritance relations discovered in each asset file, so a re-scan of the game or a mod
+only has to parse the files that are new or have changed.
+'''
+
+import os
+import pickle
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple, Union
+
+from ue.diskcache import hash_content
+from ue.skeleton import FileStamp
+from utils.cachefile import PICKLE_PROTOCOL
+from utils.log import get_logger
+
+logger = get_logger(__name__)
+
+__all__ = [
+    'FileRelationCache',
+]
+
+Relation = Tuple[str, str]  # (name, parent)
+Entry = Tuple[str, int, int, bytes, List[Relation]]  # (relative path, size, mtime, content hash, relations)
+
+
+class FileRelationCache:
+    '''
+    Relations discovered from each asset file, keyed by asset name.
+
+    Entries are validated against the file's relative path, size and modification time, falling back to a hash of
+    its content when only the time differs (e.g. when a game update re-writes unchanged files).
+    Entries not looked up or stored since the cache was opened are dropped when it is saved, so deleted files
+    are forgotten.
+
+    `version` should change whenever the way relations are discovered changes.
+    '''
+
+    def __init__(self, filename: Union[str, Path], asset_path: Union[str, Path], version: int):
+        self.filename = Path(filename).with_suffix('.pickle')
+        self.asset_path = Path(asset_path)
+        self.version = version
+        self.entries: Dict[str, Entry] = self._load()
+        self.seen: Dict[str, Entry] = dict()
+
+    def lookup(self, assetname: str, path: Path) -> Optional[List[Relation]]:
+        '''Get the relations found in an asset, if its file has not changed since they were stored.'''
+        entry = self.entries.get(assetname, None)
+        if not entry:
+            return None
+
+        relpath, size, mtime, content_hash, relations = entry
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None
+        if relpath != self._relative(path) or size != stat.st_size:
+            return None
+
+        # Re-written files may still have the same content
+        if mtime != stat.st_mtime_ns:
+            if _hash_file(path) != content_hash:
+                return None
+            entry = (relpath, size, stat.st_mtime_ns, content_hash, relations)
+
+        self.seen[assetname] = entry
+        return relations
+
+    def store(self, assetname: str, path: Path, source: FileStamp, relations: List[Relation]):
+        '''Store the relations found in an asset, parsed from data with the given stamp.'''
+        size, mtime, content_hash = source
+        self.seen[assetname] = (self._relative(path), size, mtime, content_hash, relations)
+
+    def save(self):
+        '''Save the entries seen since the cache was opened, dropping all others.'''
+        dropped = sum(1 for assetname in self.entries if assetname not in self.seen)
+        if dropped:
+            logger.debug('Dropping %d relation cache entries for missing files', dropped)
+
+        try:
+            with open(self.filename, 'wb') as f:
+                pickle.dump(dict(version=self.version, entries=self.seen), f, protocol=PICKLE_PROTOCOL)
+        except IOError:
+            logger.exception(f'Unable to save relation cache {self.filename}')
+
+        self.entries = self.seen
+        self.seen = dict()
+
+    def _load(self) -> Dict[str, Entry]:
+        try:
+            with open(self.filename, 'rb') as f:
+                data = pickle.load(f)
+        except FileNotFoundError:
+            return dict()
+        except (IOError, pickle.PickleError, EOFError):
+            logger.warning(f'Relation cache {self.filename} could not be loaded and will be rebuilt')
+            return dict()
+
+        if data.get('version', None) != self.version:
+            return dict()
+        return data['entries']
+
+    def _relative(self, path: Path) -> str:
+        return os.path.relpath(path, self.asset_path)
+
+
+def _hash_file(path: Path) -> bytes:
+    with open(path, 'rb') as f:
+        return hash_content(f.read())
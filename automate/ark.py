@@ -11,7 +11,11 @@ import requests
 
 from ark.overrides import get_overrides
 from config import ConfigFile, get_global_config
-from ue.loader import AssetLoader, ModNotFound, ModResolver
+from ue.diskcache import SkeletonDiskCache
+from ue.loader import AssetLoader, ContextAwareCacheWrapper, ModNotFound, \
+    ModResolver, PinningCacheWrapper, SizedCacheManager, UsageBasedCacheManager
+from ue.pathindex import PathIndex
+from utils.cachefile import cache_data
 from utils.log import get_logger
 from utils.name_convert import uelike_prettify
 
@@ -25,6 +29,7 @@ ARK_SERVER_APP_ID = 376030
 ARK_MAIN_APP_ID = 346110
 
 MODDATA_FILENAME = '_moddata.json'
+PATH_INDEX_FORMAT = 1
 
 logger = get_logger(__name__)
 
@@ -61,19 +66,54 @@ class ArkSteamManager:
 
         return self.loader
 
-    def createLoader(self) -> AssetLoader:
-        '''Create an asset loader pointing at the managed game install.'''
+    def createLoader(self, worker: bool = False) -> AssetLoader:
+        '''
+        Create an asset loader pointing at the managed game install.
+        Loaders for `worker` processes only read the persistent skeleton cache - see `SkeletonDiskCache.take_changes`.
+        '''
         rewrites = get_overrides().rewrites.assets or dict()
         mod_aliases = self.config.combine_mods.src_to_aliases
         modresolver = ManagedModResolver(self)
+        cache_size = self.config.optimisation.AssetCacheSizeMB
+        submanager = SizedCacheManager(max_bytes=cache_size * 1024 * 1024) if cache_size else UsageBasedCacheManager()
+        cache_manager = ContextAwareCacheWrapper(PinningCacheWrapper(submanager))
         loader = AssetLoader(
             modresolver=modresolver,
             assetpath=self.asset_path,
+            cache_manager=cache_manager,
             rewrites=rewrites,
             mod_aliases=mod_aliases,
+            use_mmap=self.config.optimisation.UseMemoryMapping,
+            path_index=self.getPathIndex() if self.config.optimisation.UsePathIndex else None,
+            prefetch_threads=self.config.optimisation.PrefetchThreads,
+            prefetch_bytes=self.config.optimisation.PrefetchBufferMB * 1024 * 1024,
+            skeleton_cache=self._createSkeletonCache(readonly=worker),
         )
         return loader
 
+    def _createSkeletonCache(self, readonly: bool = False) -> Optional[SkeletonDiskCache]:
+        cache_size = self.config.optimisation.SkeletonCacheMB
+        filename = self.basepath / 'skeletons.sqlite'
+        if not cache_size:
+            return None
+
+        return SkeletonDiskCache(filename, max_bytes=cache_size * 1024 * 1024, readonly=readonly)
+
+    def getPathIndex(self) -> Optional[PathIndex]:
+        '''
+        Load the case-insensitive index of all files in the game's Content directory, re-building it if the game
+        or any installed mod has changed since it was saved.
+        Returns None if the game and mod versions are not yet evaluated.
+        '''
+        if not self.game_buildid or self.mod_data_cache is None:
+            logger.debug('Game and mod versions unknown - not using a path index')
+            return None
+
+        mod_versions = {modid: data.get('version', None) for modid, data in self.mod_data_cache.items()}
+        version_key = dict(format=PATH_INDEX_FORMAT, game_buildid=self.game_buildid, mods=mod_versions)
+        cachefile = self.basepath / 'pathindex'
+        return cache_data(version_key, cachefile, lambda _: PathIndex.build(self.asset_path))
+
     def getInstalledMods(self) -> Optional[Dict[str, Dict]]:
         '''
         Scan installed modules and return their information in a Dict[id->data].
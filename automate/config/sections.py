@@ -94,6 +94,16 @@ class ProcessingSection(BaseModel):
 class OptimisationSection(BaseModel):
     SearchInclude: IniStringList = IniStringList()
     SearchIgnore: IniStringList = IniStringList()
+    UseMemoryMapping: bool = False
+    UsePathIndex: bool = False
+    PrefetchThreads: int = 0
+    PrefetchBufferMB: int = 64
+    SkeletonCacheMB: int = 0
+    DiscoveryWorkers: int = 0
+    LazyProperties: bool = False
+    AssetCacheSizeMB: int = 0
+    CachePinMinSubclasses: int = 0
+    MetricsReport: bool = False
 
     class Config:
         extra = Extra.forbid
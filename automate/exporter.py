@@ -1,6 +1,7 @@
 from __future__ import annotations
 
 from abc import ABCMeta, abstractmethod
+from collections import defaultdict
 from pathlib import Path, PurePosixPath
 from typing import Any, Dict, Iterator, List, Optional, Set, Tuple
 
@@ -8,13 +9,16 @@ from ark.mod import get_aliases_for_mod, get_core_mods, get_separate_mods
 from ark.overrides import get_overrides_for_mod
 from automate.ark import ArkSteamManager
 from config import ConfigFile, get_global_config
+from ue.context import ue_parsing_context
 from ue.gathering import gather_properties
-from ue.hierarchy import find_sub_classes
+from ue.hierarchy import find_common_ancestor_assets, find_sub_classes
 from ue.loader import AssetLoader, AssetLoadException
+from ue.metrics import combine_snapshots
 from ue.proxy import UEProxyStructure
 from utils.log import get_logger
 
 from .git import GitManager
+from .jsonutils import save_as_json
 from .manifest import MANIFEST_FILENAME, update_manifest
 from .run_sections import should_run_section
 
@@ -92,6 +96,7 @@ class ExportManager:
         self.git = git
 
         self.roots: List[ExportRoot] = []
+        self.metrics_snapshots: List[Dict[str, Any]] = []
 
     def add_root(self, root: ExportRoot) -> ExportRoot:
         '''Add a new export root, to which stages can be added.'''
@@ -101,7 +106,8 @@ class ExportManager:
 
     def perform(self):
         '''Run the defined root/stages structure.'''
-        self._perform_export()
+        with ue_parsing_context(lazy_properties=self.config.optimisation.LazyProperties):
+            self._perform_export()
 
     def _get_name_for_stage(self, root: ExportRoot, stage: Optional[ExportStage]) -> str:
         root_name = root.__class__.__name__.replace('Root', '')
@@ -144,6 +150,10 @@ class ExportManager:
                 stage.initialise(self, root)
                 stage.section_name = f'{root.get_name()}.{stage.get_name()}'
 
+        # Keep commonly inherited parent classes cached throughout
+        self._pin_common_ancestors()
+        self._record_metrics('discovery')
+
         # Extract : Core : Run each stage of each root
         self.official_mod_prefixes = tuple(f'/Game/Mods/{modid}/' for modid in get_core_mods())
         overrides = get_overrides_for_mod('')
@@ -156,6 +166,7 @@ class ExportManager:
                     continue
                 logger.info('Extracting %s in core', self._get_name_for_stage(root, stage))
                 stage.extract_core(root_path)
+                self._record_metrics(self._get_name_for_stage(root, stage))
                 self._log_stats()
 
         # Extract : Mods : Run each stage of each root
@@ -172,8 +183,16 @@ class ExportManager:
                                 self._get_mod_name(modid))
                     stage.extract_mod(root_path, modid)
                     self._clear_mod_from_cache(modid)
+                    self._record_metrics(self._get_name_for_stage(root, stage), modid)
                     self._log_stats()
 
+        # Keep the property indexes found while extracting for the next run
+        if self.loader.skeleton_cache:
+            self.loader.skeleton_cache.flush()
+
+        if self.config.optimisation.MetricsReport:
+            self._save_metrics_report(Path(self.config.settings.DataDir) / 'loader_metrics.json')
+
         # Finish up : manifests, commit
         for root in self.roots:
             logger.info('Finishing up %s root', self._get_name_for_stage(root, None))
@@ -258,9 +277,39 @@ class ExportManager:
         prefix = '/Game/Mods/' + modname
         self.loader.wipe_cache_with_prefix(prefix)
 
+    def _pin_common_ancestors(self):
+        min_sub_classes = self.config.optimisation.CachePinMinSubclasses
+        if not min_sub_classes:
+            return
+
+        pinned = find_common_ancestor_assets(min_sub_classes)
+        logger.info('Pinning %d commonly inherited assets in the cache', len(pinned))
+        self.loader.cache.set_pinned(pinned)
+
+    def _record_metrics(self, stage: str, modid: Optional[str] = None):
+        snapshot = self.loader.metrics.snapshot(reset=True)
+        self.metrics_snapshots.append(dict(stage=stage, mod=modid, **snapshot))
+
+    def _save_metrics_report(self, path: Path):
+        by_mod: Dict[str, List[Dict[str, Any]]] = defaultdict(list)
+        for snapshot in self.metrics_snapshots:
+            by_mod[snapshot['mod'] or 'core'].append(snapshot)
+
+        report = dict(
+            total=combine_snapshots(self.metrics_snapshots),
+            mods={modid: combine_snapshots(snapshots)
+                  for modid, snapshots in by_mod.items()},
+            stages=self.metrics_snapshots,
+        )
+        logger.info('Saving loader metrics to %s', path)
+        save_as_json(report, path, pretty=True)
+
     def _log_stats(self):
         max_mem = self.loader.max_memory / 1024.0 / 1024.0
         logger.debug("Stats: max mem = %6.2f Mb, max cache entries = %d", max_mem, self.loader.max_cache)
+        counters = self.metrics_snapshots[-1]['counters'] if self.metrics_snapshots else dict()
+        logger.debug("Stats: last stage cache hits = %d, misses = %d, upgrades = %d, reparses = %d", counters.get('hits', 0),
+                     counters.get('misses', 0), counters.get('upgrades', 0), counters.get('reparses', 0))
 
     def iterate_core_exports_of_type(self, type_name: str, sort=True, filter=None) -> Iterator[UEProxyStructure]:
         '''
@@ -327,23 +376,24 @@ class ExportManager:
         classes -= set(to_remove)
 
         # Sort them to help with consistent outputs, if requested
-        output_order = sorted(classes) if sort else classes
-
-        # Load and output each one
-        for cls_name in output_order:
-            try:
-                export = self.loader.load_class(cls_name)
-            except AssetLoadException:
-                logger.warning('Failed to load asset during export: %s', cls_name)
-                continue
+        output_order = sorted(classes) if sort else list(classes)
+
+        # Load and output each one, reading upcoming assets in the background
+        with self.loader.prefetching(output_order):
+            for cls_name in output_order:
+                try:
+                    export = self.loader.load_class(cls_name)
+                except AssetLoadException:
+                    logger.warning('Failed to load asset during export: %s', cls_name)
+                    continue
 
-            try:
-                proxy: UEProxyStructure = gather_properties(export)
-            except Exception:  # pylint: disable=broad-except
-                logger.warning('Failed to gather properties from asset: %s', cls_name)
-                continue
+                try:
+                    proxy: UEProxyStructure = gather_properties(export)
+                except Exception:  # pylint: disable=broad-except
+                    logger.warning('Failed to gather properties from asset: %s', cls_name)
+                    continue
 
-            yield proxy
+                yield proxy
 
     def get_mod_version(self, modid: str) -> str:
         return self.arkman.getModData(modid)['version']  # type: ignore
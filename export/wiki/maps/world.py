@@ -21,6 +21,7 @@ __all__ = [
     'ALL_GATHERERS',
     'EXPORTS',
     'World',
+    'has_gatherer_class',
 ]
 
 ALL_GATHERERS = BASIC_GATHERERS + COMPLEX_GATHERERS
@@ -138,3 +139,13 @@ def find_gatherer_for_export(export: ExportTableItem) -> Optional[Type[MapGather
                 return helper
 
     return None
+
+
+def has_gatherer_class(export: ExportTableItem) -> bool:
+    '''Check whether the export's class is handled by any gatherer, without looking at its properties.'''
+    try:
+        parents = set(find_parent_classes(export, include_self=True))
+    except (AssetLoadException, MissingParent):
+        return False
+
+    return any(parents & helper.get_ue_types() for helper in ALL_GATHERERS)
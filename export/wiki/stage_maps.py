@@ -11,7 +11,7 @@ from utils.log import get_logger
 from utils.strings import get_valid_filename
 
 from .maps.discovery import LevelDiscoverer, group_levels_by_directory
-from .maps.world import EXPORTS, World
+from .maps.world import EXPORTS, World, has_gatherer_class
 
 logger = get_logger(__name__)
 
@@ -108,7 +108,8 @@ class MapStage(ExportStage):
         # Do the actual extraction
         world = World(known_persistent)
         for assetname in levels:
-            asset = self.manager.loader[assetname]
+            # Only exports that may be gathered need their properties up-front
+            asset = self.manager.loader.load_asset_exports(assetname, has_gatherer_class)
             world.ingest_level(asset)
 
         if not world.bind_settings():
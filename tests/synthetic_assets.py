@@ -0,0 +1,234 @@
+'''
+Builder for small, valid, synthetic .uasset files.
+
+No game assets can be distributed with the tests, so this writes the subset of the package format that
+`ue.asset.UAsset` understands, allowing loader, cache and discovery behaviour to be tested (and benchmarked)
+without a game install.
+
+Usage:
+    builder = SyntheticAsset('/Game/Test/Thing')
+    cls = builder.add_blueprint_class('/Game/Test/Parent.Parent_C')
+    builder.add_default_export(cls, [builder.int_prop('Health', 100)])
+    builder.write_to(basepath)
+'''
+import struct
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+__all__ = [
+    'SyntheticAsset',
+    'write_blueprint',
+    'TAG',
+    'BGC_CLS',
+]
+
+TAG = 0x9E2A83C1
+BGC_CLS = '/Script/Engine.BlueprintGeneratedClass'
+
+# Number of bytes of an export table row (see ue.asset.ExportTableItem)
+EXPORT_ROW_SIZE = 4*3 + 8 + 4*6 + 16 + 4*2
+
+
+def _fstring(value: str) -> bytes:
+    data = value.encode('utf8') + b'\0'
+    return struct.pack('<i', len(data)) + data
+
+
+class SyntheticAsset:
+    '''Accumulates names, imports and exports then serialises them into a package.'''
+
+    def __init__(self, assetname: str, ext: str = '.uasset'):
+        self.assetname = assetname
+        self.ext = ext
+        self.names: List[str] = []
+        self._name_lookup: Dict[str, int] = dict()
+        self.imports: List[Tuple[int, int, int, int]] = []
+        self._import_lookup: Dict[Tuple[str, str], int] = dict()
+        self.exports: List[Tuple[int, int, int, int, bytes]] = []
+        self.name('None')
+
+    def name(self, value: str) -> int:
+        '''Return the index of the given name, adding it if required.'''
+        index = self._name_lookup.get(value, None)
+        if index is None:
+            index = len(self.names)
+            self.names.append(value)
+            self._name_lookup[value] = index
+        return index
+
+    def add_import(self, package: str, klass: str, name: str, namespace: int = 0) -> int:
+        '''Add an import, returning its (negative) object index.'''
+        key = (name, str(namespace))
+        found = self._import_lookup.get(key, None)
+        if found is not None:
+            return found
+        self.imports.append((self.name(package), self.name(klass), namespace, self.name(name)))
+        index = -len(self.imports)
+        self._import_lookup[key] = index
+        return index
+
+    def import_class(self, fullname: str) -> int:
+        '''Import a class given its fullname, also importing its package.'''
+        pkg, cls = fullname.split('.')
+        pkg_index = self.add_import('/Script/CoreUObject', 'Package', pkg)
+        klass = 'Class' if pkg.startswith('/Script') else 'BlueprintGeneratedClass'
+        return self.add_import('/Script/CoreUObject', klass, cls, pkg_index)
+
+    def add_export(self, name: str, klass: int = 0, super_: int = 0, namespace: int = 0, props: bytes = None) -> int:
+        '''Add an export, returning its (positive) object index.'''
+        data = (props if props is not None else b'') + self._none_terminator()
+        self.exports.append((klass, super_, namespace, self.name(name), data))
+        return len(self.exports)
+
+    def add_blueprint_class(self, parent_fullname: str, name: Optional[str] = None) -> int:
+        '''Add a BlueprintGeneratedClass export that inherits from the given parent.'''
+        leaf = self.assetname.split('/')[-1]
+        bgc = self.import_class(BGC_CLS)
+        parent = self.import_class(parent_fullname)
+        return self.add_export(name or leaf + '_C', klass=bgc, super_=parent)
+
+    def add_default_export(self, cls_index: int, props: Iterable[bytes] = ()) -> int:
+        '''Add the Default__ export for a class previously added with `add_blueprint_class`.'''
+        cls_name = self.names[self.exports[cls_index - 1][3]]
+        return self.add_export('Default__' + cls_name, klass=cls_index, props=b''.join(props))
+
+    # Property encoders, matching ue.properties
+
+    def _header(self, name: str, type_name: str, size: int, index: int) -> bytes:
+        return struct.pack('<IIIIII', self.name(name), 0, self.name(type_name), 0, size, index)
+
+    def _none_terminator(self) -> bytes:
+        return struct.pack('<II', self.name('None'), 0)
+
+    def int_prop(self, name: str, value: int, index: int = 0) -> bytes:
+        return self._header(name, 'IntProperty', 4, index) + struct.pack('<i', value)
+
+    def float_prop(self, name: str, value: float, index: int = 0) -> bytes:
+        return self._header(name, 'FloatProperty', 4, index) + struct.pack('<f', value)
+
+    def bool_prop(self, name: str, value: bool, index: int = 0) -> bytes:
+        return self._header(name, 'BoolProperty', 0, index) + struct.pack('<B', 1 if value else 0)
+
+    def str_prop(self, name: str, value: str, index: int = 0) -> bytes:
+        data = _fstring(value)
+        return self._header(name, 'StrProperty', len(data), index) + data
+
+    def name_prop(self, name: str, value: str, index: int = 0) -> bytes:
+        return self._header(name, 'NameProperty', 8, index) + struct.pack('<II', self.name(value), 0)
+
+    def object_prop(self, name: str, value: int, index: int = 0) -> bytes:
+        return self._header(name, 'ObjectProperty', 4, index) + struct.pack('<i', value)
+
+    def array_prop(self, name: str, field_type: str, fmt: str, values: Iterable, index: int = 0) -> bytes:
+        '''An ArrayProperty of a fixed-size type, each element encoded with the given struct format.'''
+        values = list(values)
+        data = struct.pack('<I', len(values))
+        data += b''.join(struct.pack('<' + fmt, *(value if isinstance(value, tuple) else (value, ))) for value in values)
+        return self._header(name, 'ArrayProperty', len(data), index) + struct.pack('<II', self.name(field_type), 0) + data
+
+    def struct_prop(self, name: str, struct_type: str, fmt: str, values: Iterable, index: int = 0) -> bytes:
+        '''A StructProperty of a known fixed-layout type (e.g. Vector), encoded with the given struct format.'''
+        data = struct.pack('<' + fmt, *values)
+        return self._header(name, 'StructProperty', len(data), index) + struct.pack('<II', self.name(struct_type), 0) + data
+
+    def build(self) -> bytes:
+        '''Serialise the whole package.'''
+        # Make sure every name used in exports is present before the name table is measured
+        self.name('None')
+
+        def header(names_chunk, exports_chunk, imports_chunk) -> bytes:
+            out = struct.pack('<IiiII', TAG, -7, 0, 0, 0)
+            out += struct.pack('<I', 0)  # custom versions
+            out += struct.pack('<I', 0)  # header size
+            out += _fstring('None')  # package group
+            out += struct.pack('<I', 0)  # package flags
+            out += struct.pack('<II', *names_chunk)
+            out += struct.pack('<II', *exports_chunk)
+            out += struct.pack('<II', *imports_chunk)
+            out += struct.pack('<I', 0)  # depends offset
+            out += struct.pack('<II', 0, 0)  # string assets
+            out += struct.pack('<I', 0)  # thumbnail offset
+            out += bytes(16)  # guid
+            out += struct.pack('<I', 0)  # generations
+            out += struct.pack('<HHHI', 4, 5, 0, 0) + _fstring('')  # engine version
+            out += struct.pack('<II', 0, 0)  # compression flags, compressed chunks
+            out += struct.pack('<I', 0)  # package source
+            out += struct.pack('<I', 0)  # packages to cook
+            out += struct.pack('<IQQ', 0, 0, 0)  # asset registry, bulk data, world tile info
+            return out
+
+        header_size = len(header((0, 0), (0, 0), (0, 0)))
+        names_data = b''.join(_fstring(name) for name in self.names)
+        imports_data = b''.join(struct.pack('<IIIIiII', pkg, 0, klass, 0, ns, name, 0) for pkg, klass, ns, name in self.imports)
+
+        names_offset = header_size
+        imports_offset = names_offset + len(names_data)
+        exports_offset = imports_offset + len(imports_data)
+        data_offset = exports_offset + EXPORT_ROW_SIZE * len(self.exports)
+
+        exports_data = b''
+        serial_data = b''
+        for klass, super_, namespace, name, props in self.exports:
+            exports_data += struct.pack('<iiiII', klass, super_, namespace, name, 0)
+            exports_data += struct.pack('<IIIIII', 0, len(props), data_offset + len(serial_data), 0, 0, 0)
+            exports_data += bytes(16) + struct.pack('<II', 0, 0)
+            serial_data += props
+
+        out = header((len(self.names), names_offset), (len(self.exports), exports_offset), (len(self.imports), imports_offset))
+        assert len(out) == header_size
+        return out + names_data + imports_data + exports_data + serial_data
+
+    def write_to(self, basepath: Path) -> Path:
+        '''Write the package into a game-like directory structure, returning its filename.'''
+        parts = self.assetname.strip('/').split('/')
+        if parts[0] == 'Game':
+            parts[0] = 'Content'
+        filename = Path(basepath, *parts[:-1], parts[-1] + self.ext)
+        filename.parent.mkdir(parents=True, exist_ok=True)
+        filename.write_bytes(self.build())
+        return filename
+
+
+def write_blueprint(basepath: Path, assetname: str, parent_fullname: str, prop_count: int = 0) -> Path:
+    '''Write a simple blueprint asset containing a class, its Default__ export and `prop_count` int properties.'''
+    builder = SyntheticAsset(assetname)
+    cls = builder.add_blueprint_class(parent_fullname)
+    props = [builder.int_prop(f'Prop{i}', i) for i in range(prop_count)]
+    builder.add_default_export(cls, props)
+    return builder.write_to(basepath)
+
+
+def build_benchmark_asset(export_count: int = 200, prop_count: int = 50) -> bytes:
+    '''Build a level-sized package with many exports, each holding a mix of property types.'''
+    builder = SyntheticAsset('/Game/Benchmark/Level', ext='.umap')
+    cls = builder.import_class('/Script/Engine.Actor')
+    for n in range(export_count):
+        props: List[bytes] = []
+        for i in range(prop_count):
+            kind = i % 5
+            if kind == 0:
+                props.append(builder.int_prop(f'IntValue{i}', i))
+            elif kind == 1:
+                props.append(builder.float_prop(f'FloatValue{i}', i * 0.5))
+            elif kind == 2:
+                props.append(builder.bool_prop(f'BoolValue{i}', bool(i & 2)))
+            elif kind == 3:
+                props.append(builder.struct_prop(f'Location{i}', 'Vector', 'fff', (i, -i, i * 2.0)))
+            else:
+                props.append(builder.array_prop(f'Floats{i}', 'FloatProperty', 'f', range(16)))
+        builder.add_export(f'Actor_{n}', klass=cls, props=b''.join(props))
+    return builder.build()
+
+
+def parse_asset_bytes(data: bytes, assetname: str = '/Game/Benchmark/Level'):
+    '''Fully parse an in-memory package, as `AssetLoader._load_asset` would (minus the loader).'''
+    from ue.asset import UAsset  # pylint: disable=import-outside-toplevel
+    from ue.stream import MemoryStream  # pylint: disable=import-outside-toplevel
+
+    stream = MemoryStream(memoryview(data))
+    asset = UAsset(stream)
+    asset.assetname = assetname
+    asset.name = assetname.split('/')[-1]
+    asset.deserialise()
+    asset.link()
+    return asset
@@ -30,7 +30,7 @@ def test_linking(loader: AssetLoader):
         asset = loader[TEST_PGD_PKG]
         assert not asset.is_linked
 
-        # Check asset is re-parsed when more data is requested
+        # Check asset is upgraded when more data is requested
         with ue_parsing_context(link=True):
             asset = loader[TEST_PGD_PKG]
             assert asset.is_linked
@@ -48,7 +48,7 @@ def test_properties(loader: AssetLoader):
         asset = loader[TEST_PGD_PKG]
         assert not asset.has_properties
 
-        # Check asset is re-parsed when more data is requested
+        # Check asset is upgraded when more data is requested
         with ue_parsing_context(properties=True):
             asset = loader[TEST_PGD_PKG]
             assert asset.has_properties
@@ -74,7 +74,7 @@ def test_bulk_data(loader: AssetLoader):
         asset = loader[TEST_PGD_PKG]
         assert not asset.has_bulk_data
 
-        # Check asset is re-parsed when more data is requested
+        # Check asset is upgraded when more data is requested
         with ue_parsing_context(bulk_data=True):
             asset = loader[TEST_PGD_PKG]
             assert asset.has_bulk_data
@@ -1,10 +1,23 @@
+import os
+import random
+import sqlite3
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import closing
+from pathlib import Path
+from typing import List
+
 import pytest
 
 import ark.discovery
+import ark.relationcache
+import ue.hierarchy
+from ark.relationcache import FileRelationCache
 from automate.ark import ArkSteamManager
+from config import get_global_config
 from utils.tree import IndexedTree
 
 from .common import *  # noqa: F401,F403  # needed to pick up all fixtures
+from .synthetic_assets import write_blueprint
 
 
 @pytest.mark.requires_game
@@ -18,7 +31,7 @@ def test_populate(arkman: ArkSteamManager):
         ('B', '/'),
     ]
 
-    ark.discovery._populate_tree_from_relations(tree, relations)
+    ark.discovery._populate_tree_from_relations(tree, relations, Path(arkman.config.settings.DataDir))
 
     assert len(tree.root.nodes) == 2
     assert len(tree['A'].nodes) == 2
@@ -28,3 +41,186 @@ def test_populate(arkman: ArkSteamManager):
     assert 'A1' in tree['A']
     assert 'A2' in tree['A']
     assert 'B1' in tree['B']
+
+
+def _synthetic_arkman(tmp_path: Path) -> ArkSteamManager:
+    config = get_global_config().copy(deep=True)
+    config.settings.DataDir = tmp_path
+    config.optimisation.SearchInclude = []
+    config.optimisation.SearchIgnore = []
+    config.optimisation.UsePathIndex = False
+    config.optimisation.SkeletonCacheMB = 1
+    arkman = ArkSteamManager(config=config)
+
+    content = arkman.asset_path / 'Content'
+    for n in range(40):
+        write_blueprint(arkman.asset_path, f'/Game/Test/Dir{n % 3}/BP_{n}', f'/Game/Test/Dir0/BP_{n // 2}.BP_{n // 2}_C')
+    (content / 'Test' / 'Broken.uasset').write_bytes(b'not an asset')
+    return arkman
+
+
+def test_parallel_discovery_matches_serial(tmp_path: Path, monkeypatch, caplog):
+    monkeypatch.setattr(ark.discovery, 'MIN_PARALLEL_ASSETS', 0)
+    serial = list(ark.discovery._explore_path('/Game', False, _synthetic_arkman(tmp_path / 'serial')))
+
+    # Skeletons parsed by the workers end up in this process's cache
+    arkman = _synthetic_arkman(tmp_path / 'parallel')
+    pool = ark.discovery.DiscoveryPool(arkman, 2)
+    try:
+        caplog.clear()
+        parallel = list(ark.discovery._explore_path('/Game', False, arkman, pool))
+        assert parallel == serial
+        assert len(parallel) == 40
+        assert 'Failed to load asset: /Game/Test/Broken' in caplog.messages
+
+        arkman.getLoader().skeleton_cache.flush()
+        assert arkman.getLoader().skeleton_cache.get_count() == 40
+
+        # Shards are uneven but cover every asset in order
+        shards = ark.discovery._shard_by_size(arkman.getLoader(), [f'/Game/Test/Dir0/BP_{n}' for n in range(0, 40, 3)], 4)
+        assert sum(shards, []) == [f'/Game/Test/Dir0/BP_{n}' for n in range(0, 40, 3)]
+    finally:
+        pool.close()
+
+
+def test_parallel_first_run_without_cache_database(tmp_path: Path, monkeypatch):
+    monkeypatch.setattr(ark.discovery, 'MIN_PARALLEL_ASSETS', 0)
+    arkman = _synthetic_arkman(tmp_path)
+    cache = arkman.getLoader().skeleton_cache
+    assert not cache.filename.exists()
+    events: List = []
+
+    class RecordingExecutor(ProcessPoolExecutor):
+
+        def __init__(self, *args, **kwargs):
+            # The database is ready before any worker opens it
+            with closing(sqlite3.connect(cache.filename)) as db:
+                events.append(('start', db.execute('SELECT count(*) FROM skeletons').fetchone()[0]))
+            super().__init__(*args, **kwargs)
+
+        def map(self, *args, **kwargs):  # pylint: disable=arguments-differ
+            for result in super().map(*args, **kwargs):
+                events.append('shard')
+                yield result
+
+    merge = cache.merge
+    monkeypatch.setattr(cache, 'merge', lambda changes: events.append('merge') or merge(changes))
+    monkeypatch.setattr(ark.discovery, 'ProcessPoolExecutor', RecordingExecutor)
+
+    pool = ark.discovery.DiscoveryPool(arkman, 2)
+    try:
+        assert len(list(ark.discovery._explore_path('/Game', False, arkman, pool))) == 40
+    finally:
+        pool.close()
+
+    # Changes are only written once every shard is done
+    assert events[0] == ('start', 0)
+    assert 'shard' not in events[events.index('merge'):]
+    cache.flush()
+    assert cache.get_count() == 40
+
+
+def test_rescan_only_parses_changed_files(tmp_path: Path, monkeypatch):
+    arkman = _synthetic_arkman(tmp_path)
+    arkman.config.optimisation.SkeletonCacheMB = 0
+    loader = arkman.getLoader()
+    content = arkman.asset_path / 'Content' / 'Test'
+
+    parsed: List[str] = []
+    load_skeleton = loader.load_skeleton
+    loader.load_skeleton = lambda assetname, **kwargs: parsed.append(assetname) or load_skeleton(assetname, **kwargs)
+
+    def rescan():
+        parsed.clear()
+        store = FileRelationCache(tmp_path / 'relations', arkman.asset_path, ark.discovery.FORMAT_VERSION)
+        relations = list(ark.discovery._explore_path('/Game', False, arkman, store=store))
+        store.save()
+        return relations, sorted(parsed)
+
+    # New entries are stamped from the data that was parsed, without reading the files again
+    hashed: List[Path] = []
+    hash_file = ark.relationcache._hash_file
+    monkeypatch.setattr(ark.relationcache, '_hash_file', lambda path: hashed.append(path) or hash_file(path))
+
+    first, parsed_first = rescan()
+    assert len(parsed_first) == 41
+    assert not hashed
+
+    # Changed, added, deleted and re-written but identical files
+    write_blueprint(arkman.asset_path, '/Game/Test/Dir1/BP_1', '/Script/Engine.Actor', prop_count=3)
+    write_blueprint(arkman.asset_path, '/Game/Test/Dir1/BP_New', '/Script/Engine.Actor')
+    (content / 'Dir2' / 'BP_2.uasset').unlink()
+    touched = content / 'Dir0' / 'BP_0.uasset'
+    touched.write_bytes(touched.read_bytes())
+    os.utime(touched, ns=(0, 0))
+
+    second, parsed_second = rescan()
+    assert parsed_second == ['/Game/Test/Broken', '/Game/Test/Dir1/BP_1', '/Game/Test/Dir1/BP_New']
+    assert ('/Game/Test/Dir1/BP_New.BP_New_C', '/Script/Engine.Actor') in second
+    assert ('/Game/Test/Dir1/BP_1.BP_1_C', '/Script/Engine.Actor') in second
+    assert not any(name.startswith('/Game/Test/Dir2/BP_2.') for name, _ in second)
+
+    # The result is the same as a full scan
+    assert second == list(ark.discovery._explore_path('/Game', False, arkman))
+
+    # Deleted files are forgotten
+    assert '/Game/Test/Dir2/BP_2' not in FileRelationCache(tmp_path / 'relations', arkman.asset_path,
+                                                           ark.discovery.FORMAT_VERSION).entries
+    assert len(first) == len(second)
+
+
+def test_populate_deep_chains_and_leftovers(tmp_path: Path):
+    leftovers = []
+
+    # A chain listed deepest-first, which needed one full sweep per level before
+    relations = [(f'/Game/Mods/M/L{n + 1}.L{n + 1}_C', f'/Game/Mods/M/L{n}.L{n}_C') for n in reversed(range(100))]
+    relations += [('/Game/Mods/M/L0.L0_C', 'A'), ('B1', 'B'), ('B2', 'B')]
+    relations += [('X1', 'X'), ('Y', 'Z'), ('Z', 'Y')]  # unreachable, including a cycle
+
+    def populate(relations):
+        tree = IndexedTree('/')
+        tree.add('/', 'A')
+        tree.add('/', 'B')
+        ark.discovery._populate_tree_from_relations(tree, relations, tmp_path)
+        leftovers.append((tmp_path / 'hierarchy_skips.txt').read_text())
+        return {key: tree[key].parent_data for key in tree.keys()}, [node.data for node in tree['B'].nodes]
+
+    shape, children = populate(relations)
+    assert shape['/Game/Mods/M/L100.L100_C'] == '/Game/Mods/M/L99.L99_C'
+    assert shape['/Game/Mods/M/L0.L0_C'] == 'A'
+    assert children == ['B1', 'B2']
+    assert leftovers[-1] == '\nX:\n  X1\n\nY:\n  Z\n\nZ:\n  Y\n'
+
+    # The input order makes no difference
+    random.Random(1).shuffle(relations)
+    assert populate(relations) == (shape, children)
+
+
+def test_saved_hierarchy_is_reused(tmp_path: Path, monkeypatch):
+    arkman = _synthetic_arkman(tmp_path)
+    version_keys = dict(core=dict(format=ark.discovery.FORMAT_VERSION, game_buildid='1'))
+    monkeypatch.setattr(ark.discovery, '_get_version_keys', lambda _: version_keys)
+
+    gathered = []
+    relations = [('/Game/Test/BP_A.BP_A_C', '/Script/Engine.Actor'), ('/Game/Test/BP_B.BP_B_C', '/Game/Test/BP_A.BP_A_C')]
+    monkeypatch.setattr(ark.discovery, '_gather_relations', lambda *args: gathered.append(args) or relations)
+
+    try:
+        ark.discovery.initialise_hierarchy(arkman)
+        assert len(gathered) == 1
+        expected = list(ue.hierarchy.find_parent_classes('/Game/Test/BP_B.BP_B_C'))
+
+        # Loaded from the saved file, without gathering relations
+        ue.hierarchy.tree.clear()
+        ark.discovery.initialise_hierarchy(arkman)
+        assert len(gathered) == 1
+        assert list(ue.hierarchy.find_parent_classes('/Game/Test/BP_B.BP_B_C')) == expected
+        assert ue.hierarchy.inherits_from('/Game/Test/BP_B.BP_B_C', '/Script/Engine.Actor')
+        assert ue.hierarchy.tree['/Game/Test/BP_B.BP_B_C'].parent is ue.hierarchy.tree['/Game/Test/BP_A.BP_A_C']
+
+        # Any change to the inputs rebuilds it
+        version_keys['core']['game_buildid'] = '2'
+        ark.discovery.initialise_hierarchy(arkman)
+        assert len(gathered) == 2
+    finally:
+        ue.hierarchy.tree.clear()
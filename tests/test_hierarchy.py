@@ -1,8 +1,11 @@
+import random
+
 import pytest
 
 import ue.hierarchy
 from ark.types import DINO_CHR_CLS, PDC_CLS, PRIMAL_CHR_CLS
 from ue.loader import AssetLoader
+from utils.tree import IndexedTree
 
 from .common import *  # noqa: F401,F403  # needed to pick up all fixtures
 from .common import DODO_AB_CHR, DODO_CHR
@@ -71,3 +74,34 @@ def test_inherits_from(loader: AssetLoader, dodos):  # pylint: disable=unused-ar
 
     # Ab Dodo *class* does not inherit from itself
     assert not ue.hierarchy.inherits_from(dodo_ab_asset.default_class, DODO_AB_CHR)
+
+
+def test_indexed_queries_match_tree_walks(monkeypatch):
+    tree = IndexedTree[str](ue.hierarchy.ROOT_NAME)
+    monkeypatch.setattr(ue.hierarchy, 'tree', tree)
+    monkeypatch.setattr(ue.hierarchy, '_index', None)
+
+    # A deterministic pseudo-random tree
+    rng = random.Random(1234)
+    names = [ue.hierarchy.ROOT_NAME]
+    for n in range(500):
+        name = f'/Game/Test/BP_{n}.BP_{n}_C'
+        tree.add(rng.choice(names), name)
+        names.append(name)
+
+    def answers():
+        return ([list(ue.hierarchy.find_sub_classes(name))
+                 for name in names], [list(ue.hierarchy.find_parent_classes(name, include_self=True)) for name in names],
+                [ue.hierarchy.inherits_from(name, target) for name in names[::7]
+                 for target in names[::5]], [ue.hierarchy.inherits_from(name, name, include_self=True)
+                                             for name in names[::7]], ue.hierarchy.count_sub_classes())
+
+    walked = answers()
+    ue.hierarchy.freeze_hierarchy()
+    assert ue.hierarchy._get_index() is not None
+    assert answers() == walked
+
+    # Changes to the hierarchy are not missed
+    tree.add(names[-1], '/Game/Test/BP_Late.BP_Late_C')
+    assert ue.hierarchy._get_index() is None
+    assert ue.hierarchy.inherits_from('/Game/Test/BP_Late.BP_Late_C', names[-1])
@@ -1,3 +1,5 @@
+import os
+import re
 from pathlib import Path
 from typing import Callable, Set, Tuple
 
@@ -72,3 +74,77 @@ def test_find_assetnames_excluding_all_force_include_ba(simple_loader: AssetLoad
     expected_normal, expected_inverted = filter_names(lambda path: path.startswith('/b/ba'))
     assert result_normal == expected_normal
     assert result_inverted == expected_inverted
+
+
+def scanned_dirs(loader: AssetLoader, monkeypatch, **kwargs) -> Set[str]:
+    scanned: Set[str] = set()
+    real_scandir = os.scandir
+
+    def record_scandir(path):
+        scanned.add('/' + Path(path).relative_to(DATA_PATH).as_posix().strip('.'))
+        return real_scandir(path)
+
+    monkeypatch.setattr(os, 'scandir', record_scandir)
+    list(loader.find_assetnames('/', extension='.txt', **kwargs))
+    return scanned
+
+
+def test_excluded_directories_are_not_searched(simple_loader: AssetLoader, monkeypatch):
+    assert scanned_dirs(simple_loader, monkeypatch) == {'/', '/a', '/b', '/b/ba'}
+    assert scanned_dirs(simple_loader, monkeypatch, exclude=['/b/.*']) == {'/', '/a'}
+    assert scanned_dirs(simple_loader, monkeypatch, exclude=['/b/b']) == {'/', '/a', '/b'}
+    assert scanned_dirs(simple_loader, monkeypatch, exclude=['.*'], include=['/b/ba/.*']) == {'/', '/b', '/b/ba'}
+
+    # Exclusions that depend on the end of the name and inclusions that could match anywhere prevent this
+    assert scanned_dirs(simple_loader, monkeypatch, exclude=['/b/.*$']) == {'/', '/a', '/b', '/b/ba'}
+    assert scanned_dirs(simple_loader, monkeypatch, exclude=['/b/.*'], include=['.*1']) == {'/', '/a', '/b', '/b/ba'}
+    assert scanned_dirs(simple_loader, monkeypatch, exclude=['/b/.*'], include=['/a|/b/ba']) == {'/', '/a', '/b', '/b/ba'}
+
+
+def find_assetnames_reference(loader: AssetLoader, toppath: str, includes, excludes, extensions):
+    '''A simple but slow version of find_assetnames, for comparison.'''
+    for path, _, files in os.walk(loader.convert_asset_name_to_path(toppath, partial=True)):
+        for filename in files:
+            fullpath = os.path.join(path, filename)
+            ext = os.path.splitext(fullpath)[1]
+            if ext.lower() not in extensions:
+                continue
+
+            assetname = loader.clean_asset_name(str(Path(fullpath).relative_to(loader.asset_path).with_suffix('')))
+            for prefix_from, prefix_to in loader.rewrites_to_asset.items():
+                if assetname.startswith(prefix_from):
+                    assetname = prefix_to + assetname[len(prefix_from):]
+                    break
+
+            if any(re.match(include, assetname) for include in includes) or \
+                    not any(re.match(exclude, assetname) for exclude in excludes):
+                yield (assetname, ext)
+
+
+def test_find_assetnames_matches_reference(tmp_path: Path):
+    filenames = [
+        'Content/Top.uasset', 'Content/Maps/Island.umap', 'Content/Maps/Island_Sound.UASSET', 'Content/Maps/Notes.txt',
+        'Content/Dinos/Rex/Rex.uasset', 'Content/Dinos/Rex/Rex.Old.uasset', 'Content/Dinos/Rex/Textures/T_Rex.uasset',
+        'Content/Dinos/Rex.v2/Rex.uasset', 'Content/Dinos/Raptor/Raptor.uasset', 'Content/Dinos/Raptor/T_Keep.uasset',
+        'Content/Old/Thing.uasset', 'Content/Old/Moved/Thing.uasset', 'Content/Localization/Text.uasset'
+    ]
+    for filename in filenames:
+        (tmp_path / filename).parent.mkdir(parents=True, exist_ok=True)
+        (tmp_path / filename).write_bytes(b'')
+
+    loader = AssetLoader(assetpath=tmp_path,
+                         modresolver=MockModResolver(),
+                         cache_manager=MockCacheManager(),
+                         rewrites={'/Game/New/': '/Game/Old/Moved/'})
+    includes = ['.*/Raptor/T_[^/]+']
+    excludes = ['/Game/Localization/.*', '.*/Textures/.*', '.*/T_[^/]+', '/Game/New/.*', '.*_Sound$', '/Game/Dinos/Rex']
+    extensions = ('.uasset', '.umap')
+
+    for toppath in ('/', '/Game', '/Game/Dinos', '/Game/Dinos/Rex'):
+        for kwargs in (dict(), dict(include=includes), dict(exclude=excludes), dict(include=includes, exclude=excludes)):
+            expected = set(
+                find_assetnames_reference(loader, toppath, kwargs.get('include', ()), kwargs.get('exclude', ()), extensions))
+            result = set(loader.find_assetnames(toppath, extension=extensions, return_extension=True, **kwargs))
+            assert result == expected
+            assert set(loader.find_assetnames(toppath, extension=extensions, return_extension=True, invert=True, **kwargs)) == \
+                {(name, ext) for name, ext in find_assetnames_reference(loader, toppath, (), (), extensions)} - expected
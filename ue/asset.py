@@ -1,18 +1,19 @@
 from __future__ import annotations
 
 import weakref
-from typing import TYPE_CHECKING, Optional, Set
+from typing import TYPE_CHECKING, Callable, Collection, Dict, Iterable, List, Optional, Set, Tuple, Type
 
 from utils.log import get_logger
 
 from .base import UEBase
-from .context import INCLUDE_METADATA, get_ctx
+from .context import INCLUDE_METADATA, all_exports, get_ctx
 from .coretypes import ChunkPtr, CompressedChunk, GenerationInfo, NameIndex, ObjectIndex, Table
-from .properties import Box, CustomVersion, EngineVersion, Guid, PropertyTable, StringProperty
-from .stream import MemoryStream
+from .properties import NAME_POOL, Box, CustomVersion, EngineVersion, Guid, LazyPropertyTable, PropertyTable, StringProperty
+from .stream import MemoryStream, make_codec
 from .utils import get_clean_name
 
 if TYPE_CHECKING:
+    from .diskcache import PropertyIndex
     from .loader import AssetLoader
 
 if INCLUDE_METADATA:
@@ -30,10 +31,18 @@ __all__ = [
     'UAsset',
     'ImportTableItem',
     'ExportTableItem',
+    'ExportIndex',
+    'ExportFilter',
+    'export_filter',
 ]
 
 logger = get_logger(__name__)
 
+HEADER_TOP = make_codec('IiiII')
+EXPORT_FLAGS = make_codec('IIIIII')
+
+ExportFilter = Callable[['ExportTableItem'], bool]
+
 
 class UAsset(UEBase):
     display_fields = ('tag', 'legacy_ver', 'ue_ver', 'file_ver', 'licensee_ver', 'custom_versions', 'header_size',
@@ -49,21 +58,30 @@ class UAsset(UEBase):
         self.assetname: Optional[str] = None
         self.name: Optional[str] = None
         self.file_ext: Optional[str] = None
+        self.file_stamp: Optional[Tuple[int, int]] = None  # (size, mtime) of the file when first read
         self.default_export: Optional['ExportTableItem'] = None
         self.default_class: Optional['ExportTableItem'] = None
         self.has_properties = False
         self.has_bulk_data = False
+        self.export_filter: ExportFilter = all_exports  # filter used when deserialising properties
+        self.deferred_export_count = 0  # exports whose properties will be deserialised on first use
+        self._export_index: Optional[ExportIndex] = None  # built on first use, once linked
+        self.property_index: Optional[PropertyIndex] = None  # known headers of lazy property tables, by serial offset
+        # Per-asset caches used when decoding property headers
+        self.clean_property_names: Dict[Tuple[int, int], str] = dict()  # (name index, instance) -> clean name
+        self.property_types: Dict[int, Optional[Type[UEBase]]] = dict()  # type name index -> property class
         super().__init__(self, stream)
 
     def _deserialise(self):  # pylint: disable=arguments-differ
         # ctx = get_ctx()  # not yet required
 
         # Header top
-        self._newField('tag', self.stream.readUInt32())
-        self._newField('legacy_ver', self.stream.readInt32())
-        self._newField('ue_ver', self.stream.readInt32())
-        self._newField('file_ver', self.stream.readUInt32())
-        self._newField('licensee_ver', self.stream.readUInt32())
+        tag, legacy_ver, ue_ver, file_ver, licensee_ver = self.stream.readStruct(HEADER_TOP)
+        self._newField('tag', tag)
+        self._newField('legacy_ver', legacy_ver)
+        self._newField('ue_ver', ue_ver)
+        self._newField('file_ver', file_ver)
+        self._newField('licensee_ver', licensee_ver)
         self._newField('custom_versions', Table(self).deserialise(CustomVersion, self.stream.readUInt32()))
         self._newField('header_size', self.stream.readUInt32())
         self._newField('package_group', StringProperty(self))
@@ -122,9 +140,53 @@ class UAsset(UEBase):
             self.has_bulk_data = True
 
         if ctx.properties:
-            for export in self.exports:
+            self.deserialise_properties(ctx.export_filter)
+
+    def deserialise_properties(self, export_filter: ExportFilter = all_exports):
+        '''
+        Deserialise the properties of all exports accepted by `export_filter`.
+        Other exports keep a copy of their data and deserialise their properties when first accessed.
+        '''
+        for export in self.exports:
+            if 'properties' in export.field_values:
+                continue
+
+            if export_filter(export):
                 export.deserialise_properties()
-            self.has_properties = True
+            elif export.deferred_data is None:
+                export.defer_properties()
+
+        self.export_filter = export_filter
+        self.has_properties = True
+
+    def get_property_index(self) -> PropertyIndex:
+        '''Collect the headers of all lazy property tables, keyed by their export's serial offset.'''
+        index: PropertyIndex = dict()
+        for export in self.exports:
+            table = export.field_values.get('properties', None)
+            if isinstance(table, LazyPropertyTable):
+                index[export.serial_offset] = (table.count, table.headers)
+        return index
+
+    def upgrade(self, mem: memoryview):
+        '''
+        Link and deserialise more of this already parsed asset, to satisfy the current parsing context.
+        The asset's data is released once loading completes, so `mem` must provide a fresh copy of it, read from
+        the unchanged file (see `file_stamp`).
+        '''
+        original_mem, self.stream.mem = self.stream.mem, mem
+        try:
+            if not self.is_linked:
+                self.link()
+                return
+
+            ctx = get_ctx()
+            if ctx.bulk_data:
+                self.has_bulk_data = True
+            if ctx.properties and not self.has_properties:
+                self.deserialise_properties(ctx.export_filter)
+        finally:
+            self.stream.mem = original_mem
 
     def is_context_satisfied(self, ctx):
         # Check that each of the context parameters is satisfied
@@ -171,11 +233,38 @@ class UAsset(UEBase):
 
         return None
 
+    def get_export_index(self) -> ExportIndex:
+        '''Get lookups of this asset's exports by name, built once the asset has been linked.'''
+        if self._export_index:
+            return self._export_index
+
+        index = ExportIndex(self.exports)
+        if self.is_linked:
+            self._export_index = index
+        return index
+
+    def find_export(self, name: str) -> Optional[ExportTableItem]:
+        '''Find the first export with the given name.'''
+        return self.get_export_index().by_name.get(name, None)
+
+    def find_class_default(self, cls: ExportTableItem) -> Optional[ExportTableItem]:
+        '''Find the first Default__ export (class default object) whose class is the given export.'''
+        return self.get_export_index().defaults_by_class.get(cls, None)
+
     def _parseTable(self, chunk, itemType):
         stream = MemoryStream(self.stream, chunk.offset)
+        if itemType is StringProperty and not INCLUDE_METADATA:
+            # Share name strings with all other loaded assets
+            return Table(self, stream).deserialise(itemType, chunk.count, NAME_POOL.read)
+
         table = Table(self, stream).deserialise(itemType, chunk.count)
         return table
 
+    @property
+    def is_partially_loaded(self) -> bool:
+        '''True if some exports have not had their properties deserialised yet.'''
+        return self.deferred_export_count > 0
+
     def _findNoneName(self):
         target = self.package_group.value
         for i, name in enumerate(self.names):
@@ -270,6 +359,7 @@ class ExportTableItem(UEBase):
     string_format = '{name} ({klass}) [{super}]'
     display_fields = ('name', 'namespace', 'klass', 'super')
     fullname: Optional[str] = None
+    deferred_data: Optional[bytes] = None
 
     klass: ObjectIndex
     super: ObjectIndex
@@ -283,12 +373,14 @@ class ExportTableItem(UEBase):
         self._newField('super', ObjectIndex(self))  # item type/class namespace
         self._newField('namespace', ObjectIndex(self))  # item namespace
         self._newField('name', NameIndex(self))  # item name
-        self._newField('object_flags', self.stream.readUInt32())
-        self._newField('serial_size', self.stream.readUInt32())
-        self._newField('serial_offset', self.stream.readUInt32())
-        self._newField('force_export', self.stream.readBool32())
-        self._newField('not_for_client', self.stream.readBool32())
-        self._newField('not_for_server', self.stream.readBool32())
+        object_flags, serial_size, serial_offset, force_export, not_for_client, not_for_server = \
+            self.stream.readStruct(EXPORT_FLAGS)
+        self._newField('object_flags', object_flags)
+        self._newField('serial_size', serial_size)
+        self._newField('serial_offset', serial_offset)
+        self._newField('force_export', bool(force_export))
+        self._newField('not_for_client', bool(not_for_client))
+        self._newField('not_for_server', bool(not_for_server))
         self._newField('guid', Guid(self))
         self._newField('package_flags', self.stream.readUInt32())
         self._newField('not_for_editor_game', self.stream.readBool32())
@@ -311,10 +403,33 @@ class ExportTableItem(UEBase):
             raise RuntimeError('Attempt to deserialise properties more than once')
 
         # We deferred deserialising the properties until all imports/exports were defined
-        stream = MemoryStream(self.stream, self.serial_offset, self.serial_size)
-        self._newField('properties', PropertyTable(self, weakref.proxy(stream)))
+        if self.deferred_data is not None:
+            stream = MemoryStream(self.deferred_data)
+            self.deferred_data = None
+            self.asset.deferred_export_count -= 1
+        else:
+            stream = MemoryStream(self.asset.stream, self.serial_offset, self.serial_size)
+        if get_ctx().lazy_properties:
+            index = self.asset.property_index
+            known_headers = index.get(self.serial_offset, None) if index else None
+            self._newField('properties', LazyPropertyTable(self, weakref.proxy(stream)), known_headers)
+        else:
+            self._newField('properties', PropertyTable(self, weakref.proxy(stream)))
         self.properties.link()
 
+    def defer_properties(self):
+        '''Keep a copy of this export's data so its properties can be deserialised when they are first accessed.'''
+        start = self.serial_offset
+        self.deferred_data = bytes(self.asset.stream.mem[start:start + self.serial_size])
+        self.asset.deferred_export_count += 1
+
+    def __getattr__(self, name: str):
+        if name == 'properties' and self.deferred_data is not None:
+            self.deserialise_properties()
+            return self.field_values['properties']
+
+        return super().__getattr__(name)
+
     def format_for_json(self):
         return dict(
             klass=self.klass,
@@ -346,6 +461,30 @@ class ExportTableItem(UEBase):
         return result
 
 
+class ExportIndex:
+    '''Lookups of an asset's exports, built in a single pass over the export table.'''
+    __slots__ = ('by_name', 'top_level_defaults', 'top_level_by_lower_name', 'defaults_by_class')
+
+    def __init__(self, exports: Iterable[ExportTableItem]):
+        self.by_name: Dict[str, ExportTableItem] = dict()  # first export with each name
+        self.top_level_defaults: List[ExportTableItem] = []  # Default__ exports with no namespace
+        self.top_level_by_lower_name: Dict[str, List[ExportTableItem]] = dict()  # exports with no namespace
+        self.defaults_by_class: Dict[UEBase, ExportTableItem] = dict()  # first Default__ export of each class
+
+        for export in exports:
+            name = str(export.name)
+            self.by_name.setdefault(name, export)
+            is_default = name.startswith('Default__')
+
+            if str(export.namespace) == 'None':
+                self.top_level_by_lower_name.setdefault(name.lower(), []).append(export)
+                if is_default:
+                    self.top_level_defaults.append(export)
+
+            if is_default and export.klass and export.klass.value is not None:
+                self.defaults_by_class.setdefault(export.klass.value, export)
+
+
 class WorldTileInfo(UEBase):
     display_fields = ('layer_name', 'bounds')
     fullname: Optional[str] = None
@@ -371,3 +510,24 @@ class WorldTileInfo(UEBase):
 
     def __str__(self):
         return f'{self.layer_name} ({self.bounds})'
+
+
+def export_filter(*,
+                  names: Collection[str] = (),
+                  classes: Collection[str] = (),
+                  predicate: Optional[ExportFilter] = None) -> ExportFilter:
+    '''
+    Build an export filter for use with `ue_parsing_context(export_filter=...)`, accepting exports that match
+    any of the given export names, class fullnames (e.g. '/Script/Engine.Actor') or the given predicate.
+    '''
+    names = frozenset(names)
+    classes = frozenset(classes)
+
+    def _filter(export: ExportTableItem) -> bool:
+        if names and str(export.name) in names:
+            return True
+        if classes and export.klass.value and export.klass.value.fullname in classes:
+            return True
+        return bool(predicate and predicate(export))
+
+    return _filter
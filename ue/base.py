@@ -1,4 +1,4 @@
-from typing import Any, Dict, List, Optional, Sequence
+from typing import Any, Dict, Iterator, List, Mapping, Optional, Sequence, Tuple
 
 from .context import INCLUDE_METADATA, get_ctx
 from .stream import MemoryStream
@@ -12,8 +12,18 @@ if INCLUDE_METADATA:
 else:
     support_pretty = False
 
+__all__ = (
+    'UEBase',
+    'CompactFields',
+    'compact_slots',
+)
+
 
 class UEBase(object):
+    if not INCLUDE_METADATA:
+        # Subclasses that don't declare __slots__ still get a __dict__ for `field_values` and anything else
+        __slots__ = ('stream', 'asset', 'start_offset', 'is_serialised', 'is_linked', 'is_inside_array')
+
     main_field: Optional[str] = None
     string_format: Optional[str] = None
     display_fields: Optional[Sequence[str]] = None
@@ -152,3 +162,111 @@ class UEBase(object):
                         p.pretty(self.field_values[name])
                 else:
                     p.pretty(self.field_values[fields[0]])
+
+
+def compact_slots(*fields: str) -> Tuple[str, ...]:
+    '''
+    Declare the fields of a `CompactFields` node type, in the order they are created, for use as its `__slots__`.
+    These only take effect when metadata is disabled.
+    '''
+    return () if INCLUDE_METADATA else fields
+
+
+class CompactFields:
+    '''
+    Mixin for the most numerous node types, storing their fields in slots instead of a per-instance `field_values` dict.
+
+    Must appear before UEBase in the bases, and every subclass must declare its own fields using
+    `__slots__ = compact_slots(...)`. When metadata is enabled this mixin does nothing, keeping nodes fully inspectable.
+    Note that fields defined twice are not detected when compacted.
+    '''
+    __slots__ = ()
+
+    if not INCLUDE_METADATA:
+        _field_slots: Tuple[Any, ...] = ()
+        _field_slot_map: Dict[str, Any] = {}
+
+        def __init_subclass__(cls, **kwargs):
+            super().__init_subclass__(**kwargs)
+            if '__slots__' not in vars(cls):
+                raise TypeError(f'Compact node type "{cls.__name__}" must declare its fields in __slots__')
+
+            # Collect the slot descriptors for all fields, base classes first
+            field_slots: List[Any] = []
+            for klass in reversed(cls.__mro__):
+                if klass is not CompactFields and issubclass(klass, CompactFields):
+                    field_slots.extend(vars(klass)[name] for name in vars(klass)['__slots__'])
+            cls._field_slots = tuple(field_slots)
+            cls._field_slot_map = {slot.__name__: slot for slot in field_slots}
+
+        def __init__(self, owner: UEBase, stream=None):  # pylint: disable=super-init-not-called
+            assert owner is not None, "Owner must be specified"
+            self.stream: MemoryStream = stream or owner.stream
+            self.asset = owner.asset  # type: ignore
+            self.start_offset: Optional[int] = None
+            self.is_serialised = False
+            self.is_linked = False
+            self.is_inside_array = False
+
+        @property
+        def field_values(self) -> Mapping[str, Any]:
+            '''A read-only view of the fields, equivalent to a normal node's field dict, for display and output.'''
+            return _SlotFieldsView(self)
+
+        def _newField(self, name: str, value, *extraArgs):
+            setattr(self, name, value)
+
+            if isinstance(value, UEBase) and not value.is_serialised:
+                value.deserialise(*extraArgs)
+
+        def _link(self):
+            '''Link all known fields.'''
+            UEBase._linkValues(self, self.field_values.values())  # type: ignore
+
+        def __getattr__(self, name: str):
+            # Only reached when the field is not yet defined
+            raise AttributeError(f'No field named "{name}"')
+
+
+_MISSING = object()
+
+
+class _SlotFieldsView(Mapping[str, Any]):
+    '''The fields of a `CompactFields` node, read directly from its slots. Fields not yet defined are left out.'''
+    __slots__ = ('node', )
+
+    def __init__(self, node: CompactFields):
+        self.node = node
+
+    def __getitem__(self, name: str) -> Any:
+        slot = self.node._field_slot_map.get(name, None)  # pylint: disable=protected-access
+        if slot is None:
+            raise KeyError(name)
+        try:
+            return slot.__get__(self.node)
+        except AttributeError:
+            raise KeyError(name)
+
+    def get(self, name: str, default: Any = None) -> Any:
+        slot = self.node._field_slot_map.get(name, None)  # pylint: disable=protected-access
+        if slot is None:
+            return default
+        try:
+            return slot.__get__(self.node)
+        except AttributeError:
+            return default
+
+    def __contains__(self, name: object) -> bool:
+        return self.get(name, _MISSING) is not _MISSING  # type: ignore
+
+    def __iter__(self) -> Iterator[str]:
+        node = self.node
+        for slot in node._field_slots:  # pylint: disable=protected-access
+            try:
+                slot.__get__(node)
+            except AttributeError:
+                continue  # not yet defined
+            yield slot.__name__
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self)
@@ -8,10 +8,14 @@ with ue_parsing_context(metadata=False, link=True, properties=False):
     with ue_parsing_context(properties=True):
         # exporting
         # inherits metadata=False, link=True
+
+        with ue_parsing_context(export_filter=export_filter(classes=[...])):
+            # selective exporting
+            # other exports have their properties deserialised on first use
 '''
 
 from dataclasses import dataclass
-from typing import Optional, cast
+from typing import Any, Callable, Optional, cast
 
 from utils.log import get_logger
 from utils.xlocal import xlocal
@@ -20,6 +24,7 @@ __all__ = [
     'ParsingContext',
     'ue_parsing_context',
     'get_ctx',
+    'all_exports',
 ]
 
 logger = get_logger(__name__)
@@ -32,12 +37,19 @@ def disable_metadata():
     INCLUDE_METADATA = False
 
 
+def all_exports(_export) -> bool:
+    '''Default export filter, accepting every export.'''
+    return True
+
+
 @dataclass
 class ParsingContext:
     # metadata: bool
     link: bool
     properties: bool
     bulk_data: bool
+    lazy_properties: bool
+    export_filter: Callable[[Any], bool]  # exports to deserialise properties for
     context_level: int
 
 
@@ -46,6 +58,8 @@ DEFAULT_CONTEXT = ParsingContext(
     link=True,
     properties=True,
     bulk_data=False,
+    lazy_properties=False,
+    export_filter=all_exports,
     context_level=1,
 )
 
@@ -61,7 +75,9 @@ def ue_parsing_context(
         #    metadata: Optional[bool] = None,
         link: Optional[bool] = None,
         properties: Optional[bool] = None,
-        bulk_data: Optional[bool] = None):
+        bulk_data: Optional[bool] = None,
+        lazy_properties: Optional[bool] = None,
+        export_filter: Optional[Callable[[Any], bool]] = None):
     '''
     Change the current UE parsing context.
     This is a context manager for use in a `with` statement.
@@ -79,6 +95,10 @@ def ue_parsing_context(
         fields['properties'] = properties
     if bulk_data is not None:
         fields['bulk_data'] = bulk_data
+    if lazy_properties is not None:
+        fields['lazy_properties'] = lazy_properties
+    if export_filter is not None:
+        fields['export_filter'] = export_filter
 
     ctx = __current_ctx(**fields)
     return ctx
@@ -1,7 +1,9 @@
-from typing import List, Type, Union
+import sys
+from typing import Callable, List, Optional, Type, Union
 
-from .base import UEBase
+from .base import CompactFields, UEBase, compact_slots
 from .context import INCLUDE_METADATA
+from .stream import MemoryStream, make_codec
 
 try:
     from IPython.lib.pretty import PrettyPrinter  # type: ignore
@@ -18,8 +20,14 @@ __all__ = (
     'CompressedChunk',
 )
 
+PAIR_OF_UINT32 = make_codec('II')
+FOUR_UINT32 = make_codec('IIII')
 
-class Table(UEBase):
+ItemReader = Callable[[MemoryStream], UEBase]
+
+
+class Table(CompactFields, UEBase):
+    __slots__ = compact_slots('itemType', 'count', 'values')
     string_format = '{count} x {itemType.__name__}'
     skip_level_field = 'values'
     display_fields = ['itemType', 'count', 'values']
@@ -28,14 +36,15 @@ class Table(UEBase):
     values: List[UEBase]
     itemType: Type[UEBase]
 
-    def _deserialise(self, itemType: Type[UEBase], count: int):  # type: ignore # pylint: disable=arguments-differ
+    def _deserialise(self, itemType: Type[UEBase], count: int, reader: Optional[ItemReader] = None):  # type: ignore # noqa: E501 # pylint: disable=arguments-differ
         assert count is not None
         assert issubclass(itemType, UEBase), 'Table item type must be UEBase'
 
-        values = []
-        for _ in range(count):
-            value = itemType(self).deserialise()
-            values.append(value)
+        if reader:
+            # Items are supplied by the reader, e.g. from a pool shared between assets
+            values = [reader(self.stream) for _ in range(count)]
+        else:
+            values = [itemType(self).deserialise() for _ in range(count)]
 
         self._newField('itemType', itemType)
         self._newField('count', count)
@@ -84,8 +93,9 @@ class ChunkPtr(UEBase):
     offset: int
 
     def _deserialise(self):
-        self._newField('count', self.stream.readUInt32())
-        self._newField('offset', self.stream.readUInt32())
+        count, offset = self.stream.readStruct(PAIR_OF_UINT32)
+        self._newField('count', count)
+        self._newField('offset', offset)
 
 
 class GenerationInfo(UEBase):
@@ -93,8 +103,9 @@ class GenerationInfo(UEBase):
     name_count: int
 
     def _deserialise(self):
-        self._newField('export_count', self.stream.readUInt32())
-        self._newField('name_count', self.stream.readUInt32())
+        export_count, name_count = self.stream.readStruct(PAIR_OF_UINT32)
+        self._newField('export_count', export_count)
+        self._newField('name_count', name_count)
 
 
 class CompressedChunk(UEBase):
@@ -104,13 +115,15 @@ class CompressedChunk(UEBase):
     compressed_size: int
 
     def _deserialise(self):
-        self._newField('uncompressed_offset', self.stream.readUInt32())
-        self._newField('uncompressed_size', self.stream.readUInt32())
-        self._newField('compressed_offset', self.stream.readUInt32())
-        self._newField('compressed_size', self.stream.readUInt32())
+        uncompressed_offset, uncompressed_size, compressed_offset, compressed_size = self.stream.readStruct(FOUR_UINT32)
+        self._newField('uncompressed_offset', uncompressed_offset)
+        self._newField('uncompressed_size', uncompressed_size)
+        self._newField('compressed_offset', compressed_offset)
+        self._newField('compressed_size', compressed_size)
 
 
-class NameIndex(UEBase):
+class NameIndex(CompactFields, UEBase):
+    __slots__ = compact_slots('index', 'instance', 'value')
     main_field = 'value'
 
     index: int
@@ -119,15 +132,17 @@ class NameIndex(UEBase):
 
     def _deserialise(self):
         # Get the index but don't look up the actual value until the link phase
-        self._newField('index', self.stream.readUInt32())
-        self._newField('instance', self.stream.readUInt32())
+        index, instance = self.stream.readStruct(PAIR_OF_UINT32)
+        self._newField('index', index)
+        self._newField('instance', instance)
 
     def _link(self):
-        self._newField('value', self.asset.getName(self.index))
+        value = self.asset.getName(self.index)
         if INCLUDE_METADATA:
-            self.value.register_user(self.parent or self)
+            value.register_user(self.parent or self)
         if self.instance:
-            self.field_values['value'] = f'{self.value}_{self.instance - 1}'
+            value = sys.intern(f'{value}_{self.instance - 1}')
+        self._newField('value', value)
 
     def format_for_json(self):
         return str(self)
@@ -146,29 +161,35 @@ class NameIndex(UEBase):
                 p.text(f'{cls}(index={self.index})')
 
 
-class ObjectIndex(UEBase):
+class ObjectIndex(CompactFields, UEBase):
+    __slots__ = compact_slots('index', 'used_index', 'value')
     main_field = 'value'
     display_fields = ['index', 'value']
     skip_level_field = 'value'
 
     index: int
     used_index: int
-    kind: str
 
     def _deserialise(self):
         # Calculate the indexes but don't look up the actual import/export until the link phase
-        self._newField('index', self.stream.readInt32())  # object indexes are 32-bit and signed
-        if self.index < 0:
-            self.used_index = -self.index - 1
-            self.kind = 'import'
-        elif self.index > 0:
-            self.used_index = self.index - 1
-            self.kind = 'export'
+        index = self.stream.readInt32()  # object indexes are 32-bit and signed
+        self._newField('index', index)
+        if index < 0:
+            self._newField('used_index', -index - 1)
+        elif index > 0:
+            self._newField('used_index', index - 1)
         else:
-            self.used_index = 0
-            self.kind = 'none'
-
-        self._newField('used_index', self.used_index)
+            self._newField('used_index', 0)
+
+    @property
+    def kind(self) -> str:
+        '''One of 'import', 'export' or 'none', from the sign of the index.'''
+        index = self.index
+        if index < 0:
+            return 'import'
+        if index > 0:
+            return 'export'
+        return 'none'
 
     def _link(self):
         # Look up the import/export in the asset tables now they're completed
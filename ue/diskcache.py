@@ -0,0 +1,401 @@
+'''
+A persistent on-disk cache of asset skeletons and property indexes, to avoid re-reading unchanged assets between runs.
+
+Entries are stored in a single SQLite database in a compact binary form, keyed by asset name and
+validated against the file's path, size and modification time. Files that have been re-written with
+identical content (e.g. by a game update) are recognised by a hash of their contents.
+
+Skeletons let hierarchy discovery skip reading assets entirely. Property indexes hold the property headers
+of each export, as found by `LazyPropertyTable`, so loading an asset with lazy properties does not have to
+scan them again. Values are always decoded from the asset data itself, which is already the most compact
+form they can be rebuilt from.
+'''
+
+import hashlib
+import os
+import sqlite3
+import struct
+from array import array
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple, Union
+
+from utils.log import get_logger
+
+from .skeleton import AssetSkeleton, ExportRow, ImportRow
+
+logger = get_logger(__name__)
+
+__all__ = [
+    'SkeletonDiskCache',
+    'encode_skeleton',
+    'decode_skeleton',
+    'encode_property_index',
+    'decode_property_index',
+    'hash_content',
+]
+
+FORMAT_VERSION = 1
+HEADER = struct.Struct('<BBIIII')  # version, ext, names count, strings count, imports count, exports count
+INDEX_HEADER = struct.Struct('<BIII')  # version, exports count, rows count, strings count
+EXTENSIONS = ('.uasset', '.umap')
+COMMIT_EVERY = 1000
+
+Row = Tuple[str, str, int, int, bytes, bytes, int]  # a full row of the skeletons table
+Changes = Tuple[List[Row], List[str]]  # (rows to store, names of entries used)
+PropertyHeaders = Tuple[int, Dict[str, Dict[int, int]]]  # (count, name -> index -> offset), as in LazyPropertyTable
+PropertyIndex = Dict[int, PropertyHeaders]  # by export serial offset
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS skeletons (
+    name TEXT PRIMARY KEY,
+    path TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    mtime INTEGER NOT NULL,
+    hash BLOB NOT NULL,
+    data BLOB NOT NULL,
+    used INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS properties (
+    name TEXT PRIMARY KEY,
+    size INTEGER NOT NULL,
+    mtime INTEGER NOT NULL,
+    hash BLOB NOT NULL,
+    data BLOB NOT NULL,
+    used INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS info (
+    key TEXT PRIMARY KEY,
+    value INTEGER NOT NULL
+);
+'''
+
+
+class SkeletonDiskCache:
+    '''
+    Persistent cache of asset skeletons and property indexes, limited to `max_bytes` of encoded data.
+    The least recently used entries are removed when the cache is flushed.
+
+    The database is only opened once it is needed, and is not created until something is stored.
+
+    A `readonly` cache never writes to the database. Instead its changes are collected by `take_changes`, so
+    they can be passed to another process and applied with `merge`. It only uses a database that already existed
+    when it was created, and treats one it cannot read as empty.
+    '''
+
+    def __init__(self, filename: Union[str, Path], max_bytes: int = 256 * 1024 * 1024, readonly: bool = False):
+        self.filename = Path(filename)
+        self.max_bytes = max_bytes
+        self.readonly = readonly
+        self.deferred: List[Row] = []
+        self.used: List[str] = []
+        self.used_properties: List[str] = []
+        self.changes = 0
+        self.generation = 0
+        self.db: Optional[sqlite3.Connection] = None
+        # Another process may create the database while this one is using it, so a read-only cache only uses
+        # one that was already there when it was opened
+        self.absent = readonly and not self.filename.is_file()
+
+    def _connect(self, create: bool = False) -> Optional[sqlite3.Connection]:
+        if self.db or self.absent:
+            return self.db
+        if (self.readonly or not create) and not self.filename.is_file():
+            return None
+
+        if self.readonly:
+            self.db = sqlite3.connect(self.filename.absolute().as_uri() + '?mode=ro', uri=True)
+            return self.db
+
+        self.filename.parent.mkdir(parents=True, exist_ok=True)
+        self.db = db = sqlite3.connect(str(self.filename))
+        db.executescript(SCHEMA)
+
+        # Each session gets a new generation number, used to track when entries were last used
+        row = db.execute("SELECT value FROM info WHERE key = 'generation'").fetchone()
+        self.generation = (row[0] if row else 0) + 1
+        db.execute("INSERT OR REPLACE INTO info VALUES ('generation', ?)", (self.generation, ))
+        return db
+
+    def create(self):
+        '''Create the database now rather than on the first store, so `readonly` caches in other processes can use it.'''
+        if not self.readonly:
+            self._connect(create=True)
+
+    def lookup(self, assetname: str, path: Path) -> Optional[AssetSkeleton]:
+        '''Get the cached skeleton of an asset, if its file has not changed since it was stored.'''
+        db = self._connect()
+        if not db:
+            return None
+
+        row = _fetch_row(db, 'SELECT path, size, mtime, hash, data FROM skeletons WHERE name = ?', assetname)
+        if not row:
+            return None
+
+        cached_path, size, mtime, content_hash, data = row
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None
+        if cached_path != str(path) or size != stat.st_size:
+            return None
+
+        # Re-written files may still have the same content
+        if mtime != stat.st_mtime_ns:
+            with open(path, 'rb') as f:
+                if hash_content(f.read()) != content_hash:
+                    return None
+            if self.readonly:
+                self.deferred.append((assetname, cached_path, size, stat.st_mtime_ns, content_hash, data, 0))
+            else:
+                db.execute('UPDATE skeletons SET mtime = ? WHERE name = ?', (stat.st_mtime_ns, assetname))
+                self._changed()
+
+        skeleton = decode_skeleton(data, assetname)
+        if skeleton:
+            skeleton.source = (size, stat.st_mtime_ns, content_hash)
+            self.used.append(assetname)
+        return skeleton
+
+    def store(self, assetname: str, path: Path, skeleton: AssetSkeleton):
+        '''Store a skeleton, validated by the `source` stamp of the data it was parsed from.'''
+        data = encode_skeleton(skeleton)
+        if data is None or skeleton.source is None:
+            return
+
+        size, mtime, content_hash = skeleton.source
+        if self.readonly:
+            self.deferred.append((assetname, str(path), size, mtime, content_hash, data, 0))
+            return
+
+        db = self._connect(create=True)
+        assert db
+        db.execute('INSERT OR REPLACE INTO skeletons VALUES (?, ?, ?, ?, ?, ?, ?)',
+                   (assetname, str(path), size, mtime, content_hash, data, self.generation))
+        self._changed()
+
+    def lookup_properties(self, assetname: str, mem: memoryview, mtime: int) -> Optional[PropertyIndex]:
+        '''Get the cached property index of an asset, if it was stored from the same data.'''
+        db = self._connect()
+        if not db:
+            return None
+
+        row = _fetch_row(db, 'SELECT size, mtime, hash, data FROM properties WHERE name = ?', assetname)
+        if not row:
+            return None
+
+        size, cached_mtime, content_hash, data = row
+        if size != len(mem):
+            return None
+        if cached_mtime != mtime:
+            if hash_content(mem) != content_hash:
+                return None
+            if not self.readonly:
+                db.execute('UPDATE properties SET mtime = ? WHERE name = ?', (mtime, assetname))
+                self._changed()
+
+        index = decode_property_index(data)
+        if index is not None:
+            self.used_properties.append(assetname)
+        return index
+
+    def store_properties(self, assetname: str, mem: memoryview, mtime: int, index: PropertyIndex):
+        '''Store the property index of an asset, found from the given data. Ignored by a `readonly` cache.'''
+        if self.readonly:
+            return
+        data = encode_property_index(index)
+        if data is None:
+            return
+
+        db = self._connect(create=True)
+        assert db
+        db.execute('INSERT OR REPLACE INTO properties VALUES (?, ?, ?, ?, ?, ?)',
+                   (assetname, len(mem), mtime, hash_content(mem), data, self.generation))
+        self._changed()
+
+    def take_changes(self) -> Changes:
+        '''Remove and return the changes collected by a `readonly` cache.'''
+        changes = (self.deferred, self.used)
+        self.deferred = []
+        self.used = []
+        return changes
+
+    def merge(self, changes: Changes):
+        '''Apply changes taken from another cache of the same database.'''
+        rows, used = changes
+        self.used.extend(used)
+        if not rows:
+            return
+
+        db = self._connect(create=True)
+        assert db
+        for row in rows:
+            db.execute('INSERT OR REPLACE INTO skeletons VALUES (?, ?, ?, ?, ?, ?, ?)', (*row[:-1], self.generation))
+            self._changed()
+
+    def flush(self):
+        '''Save all changes, removing the least recently used entries if over the size limit.'''
+        db = self.db
+        if self.readonly or not db:
+            return
+
+        db.executemany('UPDATE skeletons SET used = ? WHERE name = ?', ((self.generation, name) for name in self.used))
+        db.executemany('UPDATE properties SET used = ? WHERE name = ?',
+                       ((self.generation, name) for name in self.used_properties))
+        self.used.clear()
+        self.used_properties.clear()
+
+        total = 0
+        expired: Dict[str, List[Tuple[str]]] = dict(skeletons=[], properties=[])
+        for table, name, size, _ in db.execute("SELECT 'skeletons', name, length(data), used FROM skeletons "
+                                               "UNION ALL SELECT 'properties', name, length(data), used FROM properties "
+                                               "ORDER BY used DESC"):
+            total += size
+            if total > self.max_bytes:
+                expired[table].append((name, ))
+        for table, names in expired.items():
+            if names:
+                logger.info('Removing %d old entries from %s cache', len(names), table)
+                db.executemany(f'DELETE FROM {table} WHERE name = ?', names)
+
+        db.commit()
+        self.changes = 0
+
+    def close(self):
+        self.flush()
+        if self.db:
+            self.db.close()
+            self.db = None
+
+    def get_count(self) -> int:
+        db = self._connect()
+        return db.execute('SELECT COUNT(*) FROM skeletons').fetchone()[0] if db else 0
+
+    def _changed(self):
+        self.changes += 1
+        if self.changes >= COMMIT_EVERY and self.db:
+            self.db.commit()
+            self.changes = 0
+
+
+def _fetch_row(db: sqlite3.Connection, query: str, assetname: str) -> Optional[Tuple]:
+    '''Fetch an entry, treating an unreadable database (e.g. locked or still being created) as a miss.'''
+    try:
+        return db.execute(query, (assetname, )).fetchone()
+    except sqlite3.DatabaseError as ex:
+        logger.debug('Skeleton cache lookup of %s failed: %s', assetname, ex)
+        return None
+
+
+def encode_skeleton(skeleton: AssetSkeleton) -> Optional[bytes]:
+    '''
+    Encode a skeleton into a compact binary form.
+    Returns None if it cannot be encoded.
+    '''
+    # All strings go into a single table, starting with the names in order
+    strings: List[str] = list(skeleton.names)
+    indexes = {string: index for index, string in enumerate(strings)}
+
+    def string_index(string: str) -> int:
+        index = indexes.get(string, None)
+        if index is None:
+            index = indexes[string] = len(strings)
+            strings.append(string)
+        return index
+
+    rows = array('i')
+    for package, klass, namespace, name in skeleton.imports:
+        rows.extend((string_index(package), string_index(klass), namespace, string_index(name)))
+    for klass, super_, namespace, name in skeleton.exports:
+        rows.extend((klass, super_, namespace, string_index(name)))
+
+    text = '\0'.join(strings)
+    if text.count('\0') != len(strings) - 1 or skeleton.file_ext not in EXTENSIONS:
+        return None
+
+    header = HEADER.pack(FORMAT_VERSION, EXTENSIONS.index(skeleton.file_ext), len(skeleton.names), len(strings),
+                         len(skeleton.imports), len(skeleton.exports))
+    return header + rows.tobytes() + text.encode('utf-8', 'surrogatepass')
+
+
+def decode_skeleton(data: bytes, assetname: str) -> Optional[AssetSkeleton]:
+    '''
+    Decode a skeleton encoded by `encode_skeleton`.
+    Returns None if it was encoded by a different version.
+    '''
+    version, ext, names_count, strings_count, imports_count, exports_count = HEADER.unpack_from(data)
+    if version != FORMAT_VERSION:
+        return None
+
+    rows_size = (imports_count+exports_count) * 4 * 4
+    rows = array('i')
+    rows.frombytes(data[HEADER.size:HEADER.size + rows_size])
+    strings = data[HEADER.size + rows_size:].decode('utf-8', 'surrogatepass').split('\0') if strings_count else []
+
+    imports: List[ImportRow] = []
+    for i in range(0, imports_count * 4, 4):
+        imports.append((strings[rows[i]], strings[rows[i + 1]], rows[i + 2], strings[rows[i + 3]]))
+
+    exports: List[ExportRow] = []
+    for i in range(imports_count * 4, (imports_count+exports_count) * 4, 4):
+        exports.append((rows[i], rows[i + 1], rows[i + 2], strings[rows[i + 3]]))
+
+    return AssetSkeleton(assetname, EXTENSIONS[ext], strings[:names_count], imports, exports)
+
+
+def encode_property_index(index: PropertyIndex) -> Optional[bytes]:
+    '''
+    Encode a property index into a compact binary form.
+    Returns None if it cannot be encoded.
+    '''
+    strings: List[str] = []
+    string_indexes: Dict[str, int] = dict()
+    rows = array('i')
+    for serial_offset, (count, headers) in index.items():
+        rows.extend((serial_offset, count, sum(len(indexes) for indexes in headers.values())))
+        for name, indexes in headers.items():
+            string_index = string_indexes.get(name, None)
+            if string_index is None:
+                string_index = string_indexes[name] = len(strings)
+                strings.append(name)
+            for prop_index, offset in indexes.items():
+                rows.extend((string_index, prop_index, offset))
+
+    text = '\0'.join(strings)
+    if text.count('\0') != max(len(strings) - 1, 0):
+        return None
+
+    header = INDEX_HEADER.pack(FORMAT_VERSION, len(index), len(rows), len(strings))
+    return header + rows.tobytes() + text.encode('utf-8', 'surrogatepass')
+
+
+def decode_property_index(data: bytes) -> Optional[PropertyIndex]:
+    '''
+    Decode a property index encoded by `encode_property_index`.
+    Returns None if it was encoded by a different version.
+    '''
+    version, exports_count, rows_count, strings_count = INDEX_HEADER.unpack_from(data)
+    if version != FORMAT_VERSION:
+        return None
+
+    rows = array('i')
+    text_start = INDEX_HEADER.size + rows_count * rows.itemsize
+    rows.frombytes(data[INDEX_HEADER.size:text_start])
+    strings = data[text_start:].decode('utf-8', 'surrogatepass').split('\0') if strings_count else []
+
+    index: PropertyIndex = dict()
+    i = 0
+    for _ in range(exports_count):
+        serial_offset, count, entries = rows[i:i + 3]
+        i += 3
+        headers: Dict[str, Dict[int, int]] = dict()
+        for _ in range(entries):
+            headers.setdefault(strings[rows[i]], dict())[rows[i + 1]] = rows[i + 2]
+            i += 3
+        index[serial_offset] = (count, headers)
+
+    return index
+
+
+def hash_content(content: Union[bytes, memoryview]) -> bytes:
+    '''Hash file content, as stored in skeleton `source` stamps.'''
+    return hashlib.blake2b(content, digest_size=16).digest()
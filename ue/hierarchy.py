@@ -1,6 +1,6 @@
 from functools import lru_cache
 from pathlib import Path
-from typing import Iterable, Iterator, Optional, Union
+from typing import Dict, Iterable, Iterator, Optional, Set, Union
 
 import yaml
 
@@ -9,7 +9,8 @@ from ue.context import ue_parsing_context
 from ue.loader import AssetLoader, AssetLoadException
 from ue.tree import get_parent_fullname
 from utils.log import get_logger
-from utils.tree import IndexedTree, Node
+from utils.tree import IndexedTree, Node, TreeIndex
+from utils.treefile import load_tree_columns, save_tree_columns
 
 from .consts import BLUEPRINT_GENERATED_CLASS_CLS
 
@@ -22,10 +23,15 @@ __all__ = [
     'find_sub_classes',
     'find_parent_classes',
     'get_parent_class',
+    'freeze_hierarchy',
+    'save_hierarchy',
+    'load_hierarchy',
     'load_internal_hierarchy',
     'explore_asset',
     'explore_path',
     'iterate_all',
+    'count_sub_classes',
+    'find_common_ancestor_assets',
 ]
 
 logger = get_logger(__name__)
@@ -56,6 +62,55 @@ class MissingParent(HierarchyError):
 tree: IndexedTree[str] = IndexedTree[str](ROOT_NAME)
 asset_extensions = ('.uasset', '.umap')
 
+_index: Optional[TreeIndex[str]] = None
+
+
+def freeze_hierarchy():
+    '''
+    Index the hierarchy as it stands, to speed up the queries in this module.
+    The index is ignored once the hierarchy changes again, until this is next called.
+    '''
+    global _index  # pylint: disable=global-statement
+    _index = tree.freeze()
+    logger.debug('Indexed %d hierarchy nodes', len(_index))
+
+
+def save_hierarchy(filename: Path, tag: str = ''):
+    '''Save the hierarchy in a form that can be quickly loaded with `load_hierarchy`.'''
+    index = _get_index() or tree.freeze()
+    save_tree_columns(index, filename, tag)
+
+
+def load_hierarchy(filename: Path, tag: str = '') -> bool:
+    '''
+    Replace the hierarchy with one saved by `save_hierarchy` with the same `tag`.
+    Classes are only read from the file as they are used.
+    Returns False if the file could not be used, leaving the hierarchy unchanged.
+    '''
+    global _index  # pylint: disable=global-statement
+    columns = load_tree_columns(filename, tag)
+    if not columns:
+        return False
+
+    _index = tree.load_columns(columns)
+    logger.debug('Loaded %d hierarchy nodes', len(_index))
+    return True
+
+
+def _get_index() -> Optional[TreeIndex[str]]:
+    if _index and _index.is_current():
+        return _index
+    return None
+
+
+def _get_name(klass: Union[str, ExportTableItem]) -> str:
+    if isinstance(klass, str):
+        return klass
+    if isinstance(klass, ExportTableItem):
+        assert klass.fullname
+        return klass.fullname
+    raise TypeError('Invalid argument')
+
 
 def inherits_from(klass: Union[str, ExportTableItem], target: str, safe=False, include_self=False) -> bool:
     '''
@@ -65,6 +120,12 @@ def inherits_from(klass: Union[str, ExportTableItem], target: str, safe=False, i
     `safe` as True will return False when encountering a HierarchyError.
     `include_self` to allow the case where the two inputs are equivalent.
     '''
+    index = _get_index()
+    if index:
+        name = _get_name(klass)
+        if name in index:
+            return index.is_descendant(name, target, include_self=include_self)
+
     if safe:
         try:
             return target in find_parent_classes(klass, include_self=include_self)
@@ -81,13 +142,12 @@ def find_sub_classes(klass: Union[str, ExportTableItem]) -> Iterator[str]:
     Iterate over all sub-classes of the given class.
     `klass` should be a full classname or an exported class.
     '''
-    if isinstance(klass, str):
-        name = klass
-    elif isinstance(klass, ExportTableItem):
-        assert klass.fullname
-        name = klass.fullname
-    else:
-        raise TypeError('Invalid argument')
+    name = _get_name(klass)
+
+    index = _get_index()
+    if index and name in index:
+        yield from index.get_descendants(name)
+        return
 
     node = tree.get(name, None)
     if not node:
@@ -137,6 +197,11 @@ def find_parent_classes(klass: Union[str, ExportTableItem], *, include_self=Fals
             export = export.asset.loader.load_class(parent_name)
 
     # Phase 2: simply step up through our own hierarchy
+    index = _get_index()
+    if index:
+        yield from index.get_ancestors(node.data)
+        return
+
     while node.parent:
         parent = node.parent
         yield parent.data
@@ -151,6 +216,27 @@ def iterate_all() -> Iterator[str]:
     yield from tree.keys()
 
 
+def count_sub_classes() -> Dict[str, int]:
+    '''Count the known sub-classes (direct or not) of every class in the hierarchy.'''
+    index = _get_index()
+    if index:
+        return index.count_all_descendants()
+
+    counts: Dict[str, int] = dict()
+    for node in reversed(list(tree.root.walk_iterator(skip_self=False, breadth_first=True))):
+        counts[node.data] = sum(counts[child.data] + 1 for child in node.nodes)
+    return counts
+
+
+def find_common_ancestor_assets(min_sub_classes: int) -> Set[str]:
+    '''
+    Find assets holding a class with at least `min_sub_classes` known sub-classes.
+    These are loaded over and over while gathering inherited properties, so are worth keeping cached.
+    '''
+    counts = count_sub_classes()
+    return set(name.split('.')[0] for name, count in counts.items() if count >= min_sub_classes and name.startswith('/Game/'))
+
+
 NO_DEFAULT = object()
 
 
@@ -209,9 +295,11 @@ def explore_path(path: str, loader: AssetLoader, excludes: Iterable[str], verbos
 
     n = 0
 
-    with ue_parsing_context(properties=False):
-        asset_iterator = loader.find_assetnames(path, exclude=excludes, extension=asset_extensions, return_extension=True)
-        for (assetname, ext) in asset_iterator:
+    assets = list(loader.find_assetnames(path, exclude=excludes, extension=asset_extensions, return_extension=True))
+
+    # Read upcoming assets in the background while earlier ones are parsed
+    with ue_parsing_context(properties=False), loader.prefetching(assetname for assetname, _ in assets):
+        for (assetname, ext) in assets:
             n += 1
             if verbose and n % 200 == 0:
                 logger.info(assetname)
@@ -1,21 +1,31 @@
+import mmap
 import os.path
 import re
+import time
 from abc import ABC, abstractmethod
 from configparser import ConfigParser
+from contextlib import contextmanager
 from itertools import islice
 from pathlib import Path
-from typing import Dict, Iterable, Optional, Set, Tuple, Union
+from typing import TYPE_CHECKING, Callable, Dict, Iterable, Optional, Pattern, Set, Tuple, Union
 
 import psutil  # type: ignore
 
 from utils.log import get_logger
 
-from .asset import ExportTableItem, ImportTableItem, UAsset
+from .asset import ExportFilter, ExportTableItem, ImportTableItem, UAsset
 from .base import UEBase
-from .context import get_ctx
+from .context import INCLUDE_METADATA, get_ctx, ue_parsing_context
+from .diskcache import SkeletonDiskCache, hash_content
+from .metrics import LoaderMetrics
+from .pathindex import PathIndex
 from .properties import ObjectProperty, Property
+from .skeleton import AssetSkeleton, parse_skeleton
 from .stream import MemoryStream
 
+if TYPE_CHECKING:
+    from .prefetch import AssetPrefetcher
+
 logger = get_logger(__name__)
 
 __all__ = (
@@ -23,14 +33,23 @@ __all__ = (
     'ModNotFound',
     'AssetNotFound',
     'AssetParseError',
+    'AssetChanged',
     'AssetLoader',
+    'SizedCacheManager',
+    'PinningCacheWrapper',
+    'estimate_asset_size',
     'load_file_into_memory',
+    'map_file_into_memory',
     'ModResolver',
     'IniModResolver',
 )
 
 NO_FALLBACK = object()
 
+# Approximate memory used per byte of parsed data, measured on synthetic assets
+TABLE_BYTES_FACTOR = 65 if INCLUDE_METADATA else 30
+PROPERTY_BYTES_FACTOR = 72 if INCLUDE_METADATA else 20
+
 
 class AssetLoadException(Exception):
     pass
@@ -60,6 +79,12 @@ class AssetParseError(AssetLoadException):
         super().__init__(f'Error parsing asset {asset_name}')
 
 
+class AssetChanged(AssetLoadException):
+
+    def __init__(self, asset_name: str):
+        super().__init__(f'Asset {asset_name} has changed since it was loaded')
+
+
 class ModResolver(ABC):
     '''Abstract class a mod resolver must implement.'''
 
@@ -102,6 +127,7 @@ class IniModResolver(ModResolver):
 
 
 class CacheManager(ABC):
+    metrics: Optional[LoaderMetrics] = None
 
     @abstractmethod
     def lookup(self, name) -> Optional[UAsset]:
@@ -123,6 +149,17 @@ class CacheManager(ABC):
     def get_count(self):
         raise NotImplementedError
 
+    def set_pinned(self, names: Iterable[str]):
+        '''Set assets that should be kept in the cache permanently, if supported.'''
+
+    def set_metrics(self, metrics: LoaderMetrics):
+        '''Record cache activity, such as evictions, into the given metrics.'''
+        self.metrics = metrics
+
+    def _evicted(self, cause: str, amount: int = 1):
+        if self.metrics:
+            self.metrics.evicted(cause, amount)
+
 
 class DictCacheManager(CacheManager):
     '''A cache manager implementing the old unintelligent mechanism.'''
@@ -138,13 +175,16 @@ class DictCacheManager(CacheManager):
 
     def remove(self, name):
         del self.cache[name]
+        self._evicted('remove')
 
     def wipe(self, prefix: str = ''):
         if not prefix:
+            self._evicted('wipe', len(self.cache))
             self.cache = dict()
         else:
             for name in list(key for key in self.cache if key.startswith(prefix)):
                 del self.cache[name]
+                self._evicted('wipe')
 
     def get_count(self):
         return len(self.cache)
@@ -202,6 +242,8 @@ class UsageBasedCacheManager(CacheManager):
         found = self.cache.pop(name, None)
         if not found:
             logger.warning('Attempt to remove asset that was not found: %s', name)
+        else:
+            self._evicted('remove')
 
     def wipe(self, prefix: str = ''):
         '''
@@ -212,12 +254,14 @@ class UsageBasedCacheManager(CacheManager):
         if not prefix:
             logger.debug('Wiping cache completely')
             # Full wipe
+            self._evicted('wipe', len(self.cache))
             self.cache = dict()
         else:
             logger.debug('Wiping cache with prefix: %s', prefix)
             to_cull = list(key for key in self.cache if key.startswith(prefix))
             for name in to_cull:
                 del self.cache[name]
+            self._evicted('wipe', len(to_cull))
 
     def get_count(self):
         return len(self.cache)
@@ -240,6 +284,152 @@ class UsageBasedCacheManager(CacheManager):
         to_cull = list(islice(self.cache, amount))
         for name in to_cull:
             del self.cache[name]
+        self._evicted('purge', len(to_cull))
+
+
+class SizedCacheManager(CacheManager):
+    '''
+    A cache manager that keeps the estimated memory used by cached assets within a byte budget.
+
+    Each asset's size is estimated when it is added (see `estimate_asset_size`), and the least recently used
+    entries are evicted whenever the total goes over `max_bytes`. The most recently added asset is always kept,
+    even if it is bigger than the whole budget by itself.
+    '''
+
+    def __init__(self, max_bytes: int = 4 * 1024 * 1024 * 1024, estimator: Callable[[UAsset], int] = None):
+        self.cache: Dict[str, UAsset] = dict()
+        self.sizes: Dict[str, int] = dict()
+        self.max_bytes = max_bytes
+        self.estimator = estimator or estimate_asset_size
+        self.total_bytes = 0
+
+    def lookup(self, name: str) -> Optional[UAsset]:
+        '''
+        Lookup an asset in the cache.
+
+        Note that this marks it as recently used, and hence less likely to be purged.
+        '''
+        result = self.cache.pop(name, None)
+        if result:
+            self.cache[name] = result
+
+        return result
+
+    def add(self, name: str, asset: UAsset):
+        '''
+        Add an asset to the cache, replacing any previous entry with the same name (re-estimating its size).
+
+        Note that this marks it as recently used, and hence less likely to be purged.
+        '''
+        self._discard(name)
+
+        size = self.estimator(asset)
+        self.cache[name] = asset
+        self.sizes[name] = size
+        self.total_bytes += size
+
+        if self.total_bytes > self.max_bytes:
+            self._purge()
+
+    def remove(self, name: str):
+        '''
+        Remove the named asset from the cache.
+        '''
+        logger.debug('Removing cache entry: %s', name)
+        if not self._discard(name):
+            logger.warning('Attempt to remove asset that was not found: %s', name)
+        else:
+            self._evicted('remove')
+
+    def wipe(self, prefix: str = ''):
+        '''
+        Remove cache entries that begin with the given prefix.
+
+        An empty or None prefix wipes the entire cache.
+        '''
+        if not prefix:
+            logger.debug('Wiping cache completely')
+            self._evicted('wipe', len(self.cache))
+            self.cache = dict()
+            self.sizes = dict()
+            self.total_bytes = 0
+        else:
+            logger.debug('Wiping cache with prefix: %s', prefix)
+            to_cull = list(key for key in self.cache if key.startswith(prefix))
+            for name in to_cull:
+                self._discard(name)
+            self._evicted('wipe', len(to_cull))
+
+    def get_count(self):
+        return len(self.cache)
+
+    def _discard(self, name: str) -> bool:
+        if self.cache.pop(name, None) is None:
+            return False
+
+        self.total_bytes -= self.sizes.pop(name)
+        return True
+
+    def _purge(self):
+        logger.debug("Asset cache purge due to size (%d bytes in %d items)", self.total_bytes, len(self.cache))
+        while self.total_bytes > self.max_bytes and len(self.cache) > 1:
+            self._discard(next(iter(self.cache)))
+            self._evicted('purge')
+
+
+class PinningCacheWrapper(CacheManager):
+    '''
+    A cache wrapper that holds selected assets (e.g. commonly inherited parent classes) permanently,
+    outside of the wrapped manager, so they survive its purges and wipes of a prefix.
+    Other assets are passed through to the wrapped manager.
+    '''
+
+    def __init__(self, submanager: CacheManager):
+        self.manager = submanager
+        self.pinned_names: Set[str] = set()
+        self.pinned: Dict[str, UAsset] = dict()
+
+    def set_pinned(self, names: Iterable[str]):
+        '''Replace the set of pinned asset names, moving any affected assets that are already cached.'''
+        names = set(names)
+        for name in list(self.pinned):
+            if name not in names:
+                self.manager.add(name, self.pinned.pop(name))
+
+        self.pinned_names = names
+        for name in names:
+            asset = self.manager.lookup(name)
+            if asset:
+                self.manager.remove(name)
+                self.pinned[name] = asset
+
+    def lookup(self, name) -> Optional[UAsset]:
+        return self.pinned.get(name, None) or self.manager.lookup(name)
+
+    def add(self, name: str, asset: UAsset):
+        if name in self.pinned_names:
+            self.pinned[name] = asset
+        else:
+            self.manager.add(name, asset)
+
+    def remove(self, name: str):
+        if self.pinned.pop(name, None) is None:
+            self.manager.remove(name)
+        else:
+            self._evicted('remove')
+
+    def wipe(self, prefix: str = ''):
+        if not prefix:
+            self._evicted('wipe', len(self.pinned))
+            self.pinned = dict()
+        self.manager.wipe(prefix)
+
+    def get_count(self):
+        return len(self.pinned) + self.manager.get_count()
+
+    def set_metrics(self, metrics: LoaderMetrics):
+        super().set_metrics(metrics)
+        self.manager.set_metrics(metrics)
 
 
 class ContextAwareCacheWrapper(CacheManager):
@@ -255,8 +445,30 @@ class ContextAwareCacheWrapper(CacheManager):
 
         # Ensure the found asset satisfies the requirements of the current parsing context
         if not asset.is_context_satisfied(current_ctx):
-            logger.debug("Re-parsing asset for more data: %s", name)
-            return None
+            if not asset.loader:
+                logger.debug("Re-parsing asset for more data: %s", name)
+                self._count('reparses')
+                return None
+
+            logger.debug("Upgrading asset for more data: %s", name)
+            try:
+                asset.loader.upgrade_asset(asset)
+            except AssetLoadException:
+                logger.debug("Upgrade failed, re-parsing asset: %s", name, exc_info=True)
+                self.manager.remove(name)
+                self._count('reparses')
+                return None
+
+            self._count('upgrades')
+
+            # Re-add so the cache can account for the extra data
+            self.manager.add(name, asset)
+
+        # Complete exports skipped by an export filter if the current context needs them
+        if current_ctx.properties and asset.is_partially_loaded and current_ctx.export_filter is not asset.export_filter:
+            logger.debug("Deserialising remaining exports of partially loaded asset: %s", name)
+            asset.deserialise_properties(current_ctx.export_filter)
+            self.manager.add(name, asset)
 
         return asset
 
@@ -272,6 +484,17 @@ class ContextAwareCacheWrapper(CacheManager):
     def get_count(self):
         return self.manager.get_count()
 
+    def set_pinned(self, names: Iterable[str]):
+        self.manager.set_pinned(names)
+
+    def set_metrics(self, metrics: LoaderMetrics):
+        super().set_metrics(metrics)
+        self.manager.set_metrics(metrics)
+
+    def _count(self, name: str):
+        if self.metrics:
+            self.metrics.count(name)
+
 
 class AssetLoader:
 
@@ -281,7 +504,18 @@ class AssetLoader:
                  assetpath='.',
                  cache_manager: CacheManager = None,
                  rewrites: Dict[str, str] = dict(),
-                 mod_aliases: Dict[str, Set[str]] = dict()):
+                 mod_aliases: Dict[str, Set[str]] = dict(),
+                 use_mmap: bool = False,
+                 path_index: Optional[PathIndex] = None,
+                 prefetch_threads: int = 0,
+                 prefetch_bytes: int = 64 * 1024 * 1024,
+                 skeleton_cache: Optional[SkeletonDiskCache] = None):
+        self.use_mmap = use_mmap
+        self.path_index = path_index
+        self.prefetch_threads = prefetch_threads
+        self.prefetch_bytes = prefetch_bytes
+        self.prefetcher: Optional['AssetPrefetcher'] = None
+        self.skeleton_cache = skeleton_cache
         self.cache: CacheManager = cache_manager or ContextAwareCacheWrapper(UsageBasedCacheManager())
         self.asset_path = Path(assetpath)
         self.absolute_asset_path = self.asset_path.absolute().resolve()  # need both absolute and resolve here
@@ -297,6 +531,8 @@ class AssetLoader:
 
         self.max_memory = 0
         self.max_cache = 0
+        self.metrics = LoaderMetrics()
+        self.cache.set_metrics(self.metrics)
 
     def clean_asset_name(self, name: str) -> str:
         # Remove class name, if present
@@ -359,6 +595,11 @@ class AssetLoader:
         if not check_exists:
             return fullpath
 
+        # Resolve using the prebuilt index, without touching the filesystem
+        if self.path_index is not None and self.path_index.covers(parts):
+            found = self.path_index.find(parts, partial=partial)
+            return Path(self.asset_path, found) if found else None
+
         if partial and fullpath.is_dir():
             return fullpath
         if not partial and fullpath.is_file():
@@ -406,45 +647,27 @@ class AssetLoader:
                         extension: Union[str, Iterable[str]] = '.uasset',
                         return_extension=False,
                         invert=False):
+        '''
+        Find the names of all assets within the given path, filtered by regexes matched against their names.
+        Assets matching an `include` are always returned, else those matching an `exclude` are skipped.
 
+        Directories whose contents would all be excluded are not searched at all, unless an `include` could
+        match something inside them.
+        '''
         includes: Tuple[str, ...] = tuple(include, ) if isinstance(include, str) else tuple(include or ())
         excludes: Tuple[str, ...] = tuple(exclude, ) if isinstance(exclude, str) else tuple(exclude or ())
         extensions: Tuple[str, ...] = tuple((extension, )) if isinstance(extension, str) else tuple(extension or ())
         extensions = tuple(ext.lower() for ext in extensions)
         assert extensions
 
-        toppath = self.convert_asset_name_to_path(toppath, partial=True)
-        for path, _, files in os.walk(toppath):
-            for filename in files:
-                fullpath = os.path.join(path, filename)
-                name, ext = os.path.splitext(fullpath)
-
-                if ext.lower() not in extensions:
-                    continue
-
-                partialpath = str(Path(fullpath).relative_to(self.asset_path).with_suffix(''))
-                assetname = self.clean_asset_name(partialpath)
-
-                # Handle any asset path rewrites
-                for prefix_from, prefix_to in self.rewrites_to_asset.items():
-                    if assetname.startswith(prefix_from):
-                        assetname = prefix_to + assetname[len(prefix_from):]
-                        break
-
-                result = (assetname, ext) if return_extension else assetname
-
-                # Apply filtering, starting with forced inclusions
-                matched = True
-                if any(re.match(include, assetname) for include in includes):
-                    # ...skip the exclusion test
-                    pass
-                # Then handle exclusions with a lower priority
-                elif any(re.match(exclude, assetname) for exclude in excludes):
-                    matched = False
+        path = self.convert_asset_name_to_path(toppath, partial=True)
+        if not path:
+            logger.debug('Search path not found: %s', toppath)
+            return
 
-                # Yield or skip this entry (force bool because xor behaves differently with non-bools)
-                if matched ^ bool(invert):
-                    yield result
+        search = _AssetSearch(self, includes, excludes, extensions, return_extension, bool(invert))
+        reldir = '/'.join(path.relative_to(self.asset_path).parts)
+        yield from search.scan(str(path), reldir, False)
 
     def load_related(self, obj: UEBase) -> UAsset:
         if isinstance(obj, Property):
@@ -463,9 +686,9 @@ class AssetLoader:
         (assetname, cls_name) = fullname.split('.')
         assetname = self.clean_asset_name(assetname)
         asset = self.load_asset(assetname, quiet=quiet)
-        for export in asset.exports:
-            if str(export.name) == cls_name:
-                return export
+        export = asset.find_export(cls_name)
+        if export is not None:
+            return export
 
         if fallback is not NO_FALLBACK:
             return fallback
@@ -482,37 +705,141 @@ class AssetLoader:
             raise AssetNotFound(filename)
         return mem
 
-    def load_raw_asset(self, name: str) -> Tuple[memoryview, str]:
+    def find_raw_asset(self, name: str) -> Tuple[Path, str]:
         '''
-        Load an asset given its asset name into memory without parsing it.
-        Returns (memoryview, ext).
+        Find the file an asset is stored in, given its asset name.
+        Returns (path, ext).
         '''
         name = self.clean_asset_name(name)
-        mem = None
         for ext in ('.uasset', '.umap'):
             path = self.convert_asset_name_to_path(name, ext=ext)
-            if path and path.is_file():
-                mem = load_file_into_memory(path)
-                return (mem, ext)
+            # Paths found in the index are known to be files already
+            if path and (self._is_indexed(path) or path.is_file()):
+                return (path, ext)
 
         raise AssetNotFound(name)
 
+    def _is_indexed(self, path: Path) -> bool:
+        return self.path_index is not None and self.path_index.covers(path.relative_to(self.asset_path).parts)
+
+    def load_raw_asset(self, name: str, use_mmap: Optional[bool] = None) -> Tuple[memoryview, str]:
+        '''
+        Load an asset given its asset name into memory without parsing it.
+        Returns (memoryview, ext).
+
+        `use_mmap` overrides the loader's `use_mmap` option. Either way the caller should `release()` the
+        returned memoryview once done with it, which also closes any mapping.
+        '''
+        mem, ext, _ = self._load_raw_asset(name, use_mmap)
+        return (mem, ext)
+
+    def _load_raw_asset(self, name: str, use_mmap: Optional[bool] = None) -> Tuple[memoryview, str, int]:
+        '''As `load_raw_asset`, also returning the file's modification time from before it was read.'''
+        name = self.clean_asset_name(name)
+        if use_mmap is None:
+            if self.prefetcher:
+                prefetched = self.prefetcher.take(name)
+                if prefetched:
+                    self.metrics.count('prefetched')
+                    return prefetched
+            use_mmap = self.use_mmap
+
+        path, ext = self.find_raw_asset(name)
+        try:
+            mtime = os.stat(path).st_mtime_ns
+            mem = map_file_into_memory(path) if use_mmap else load_file_into_memory(path)
+        except FileNotFoundError:
+            raise AssetNotFound(name)
+
+        return (mem, ext, mtime)
+
+    @contextmanager
+    def prefetching(self, assetnames: Iterable[str]):
+        '''
+        Hint that the given assets are about to be loaded in this order, letting their files be read in the
+        background while earlier ones are parsed. Does nothing unless the loader has `prefetch_threads`.
+        '''
+        if self.prefetch_threads <= 0 or self.prefetcher:
+            yield
+            return
+
+        from .prefetch import AssetPrefetcher  # pylint: disable=import-outside-toplevel
+        self.prefetcher = AssetPrefetcher(self, assetnames, threads=self.prefetch_threads, max_bytes=self.prefetch_bytes)
+        try:
+            yield
+        finally:
+            self.prefetcher.close()
+            self.prefetcher = None
+
+    def map_raw_asset(self, name: str) -> Tuple[memoryview, str]:
+        '''
+        Memory-map an asset given its asset name without parsing it, giving a zero-copy view of the file.
+        Returns (memoryview, ext).
+        '''
+        return self.load_raw_asset(name, use_mmap=True)
+
+    def load_skeleton(self, assetname: str, quiet=False) -> AssetSkeleton:
+        '''
+        Load just the name, import and export tables of an asset, without building a UAsset.
+        Skeletons are cheap to produce and are not kept in the asset cache, but are persisted between runs if
+        the loader has a `skeleton_cache`.
+        '''
+        assetname = self.clean_asset_name(assetname)
+        skeleton = None
+        if self.skeleton_cache:
+            path, _ = self.find_raw_asset(assetname)
+            skeleton = self.skeleton_cache.lookup(assetname, path)
+            self.metrics.count('skeleton_hits' if skeleton else 'skeleton_misses')
+
+        if not skeleton:
+            if not quiet:
+                logger.debug("Loading asset skeleton: %s", assetname)
+            mem, ext, mtime = self._load_raw_asset(assetname)
+            try:
+                try:
+                    skeleton = parse_skeleton(mem, assetname, ext)
+                except Exception as ex:
+                    raise AssetParseError(assetname) from ex
+
+                skeleton.source = (len(mem), mtime, hash_content(mem))
+                if self.skeleton_cache:
+                    self.skeleton_cache.store(assetname, path, skeleton)
+            finally:
+                mem.release()
+
+        return skeleton
+
     def load_asset(self, assetname: str, quiet=False, use_cache=True, cache_result=True) -> UAsset:
         '''Load and parse the given asset, or fetch it from the cache if already loaded.'''
         assetname = self.clean_asset_name(assetname)
-        asset = (use_cache and self.cache.lookup(assetname)) or \
-            self._load_asset(assetname, quiet=quiet, cache_result=cache_result)
+        asset = None
+        if use_cache:
+            asset = self.cache.lookup(assetname)
+            self.metrics.count('lookups')
+            self.metrics.count('hits' if asset else 'misses')
+
+        if not asset:
+            asset = self._load_asset(assetname, quiet=quiet, cache_result=cache_result)
+
+            # Keep track of some stats (memory use only changes noticeably when parsing)
+            mem_used = psutil.Process().memory_info().rss
+            if mem_used > self.max_memory:
+                self.max_memory = mem_used
 
-        # Keep track of some stats
-        mem_used = psutil.Process().memory_info().rss
-        if mem_used > self.max_memory:
-            self.max_memory = mem_used
         cache_used = self.cache.get_count()
         if cache_used > self.max_cache:
             self.max_cache = cache_used
 
         return asset
 
+    def load_asset_exports(self, assetname: str, export_filter: ExportFilter, quiet=False) -> UAsset:
+        '''
+        Load and parse the given asset, only deserialising properties for exports accepted by `export_filter`
+        (see `ue.asset.export_filter`). Properties of other exports are deserialised when first accessed.
+        '''
+        with ue_parsing_context(export_filter=export_filter):
+            return self.load_asset(assetname, quiet=quiet)
+
     def __getitem__(self, assetname: str) -> UAsset:
         '''Load and parse the given asset, or fetch it from the cache if already loaded.'''
         return self.load_asset(assetname)
@@ -526,10 +853,38 @@ class AssetLoader:
         asset = self._load_asset(assetname, doNotLink=True, cache_result=cache_result)
         return asset
 
+    def upgrade_asset(self, asset: UAsset) -> UAsset:
+        '''
+        Link and deserialise more of an already parsed asset in place, to satisfy the current parsing context.
+        The file is read again, but the header and tables parsed previously are re-used.
+        Raises AssetChanged if the file is not the one the asset was parsed from.
+        '''
+        assert asset.assetname
+        mem, _, mtime = self._load_raw_asset(asset.assetname)
+        try:
+            if (len(mem), mtime) != asset.file_stamp:
+                raise AssetChanged(asset.assetname)
+            was_linked = asset.is_linked
+            start_time = time.perf_counter()
+            asset.upgrade(mem)
+            self.metrics.link_time += time.perf_counter() - start_time
+            self.metrics.bytes_read += len(mem)
+        except AssetChanged:
+            raise
+        except Exception as ex:
+            raise AssetParseError(asset.assetname) from ex
+        finally:
+            mem.release()
+
+        if not was_linked:
+            self._find_default_export(asset)
+
+        return asset
+
     def _load_asset(self, assetname: str, doNotLink=False, quiet=False, cache_result=True) -> UAsset:
         if not quiet:
             logger.debug("Loading asset: %s", assetname)
-        mem, ext = self.load_raw_asset(assetname)
+        mem, ext, mtime = self._load_raw_asset(assetname)
         try:
             stream = MemoryStream(mem, 0, len(mem))
             asset = UAsset(stream)
@@ -537,24 +892,50 @@ class AssetLoader:
             asset.assetname = assetname
             asset.name = assetname.split('/')[-1]
             asset.file_ext = ext
+            asset.file_stamp = (len(mem), mtime)  # mtime from before the file was read, so later changes are noticed
+
+            # Property headers found by a previous run let lazy property tables skip scanning their data
+            ctx = get_ctx()
+            index_cache: Optional[SkeletonDiskCache] = None
+            if self.skeleton_cache and ctx.lazy_properties and ctx.properties:
+                index_cache = self.skeleton_cache
+                asset.property_index = index_cache.lookup_properties(assetname, mem, mtime)
+                self.metrics.count('property_index_hits' if asset.property_index else 'property_index_misses')
 
             try:
+                start_time = time.perf_counter()
                 asset.deserialise()
+                parse_time = time.perf_counter() - start_time
                 if doNotLink:
                     return asset
                 asset.link()
+                link_time = time.perf_counter() - start_time - parse_time
+                self.metrics.record_load(assetname, len(mem), parse_time, link_time)
+                if index_cache and not asset.property_index:
+                    index_cache.store_properties(assetname, mem, mtime, asset.get_property_index())
+                asset.property_index = None
             except Exception as ex:
                 raise AssetParseError(assetname) from ex
         finally:
             mem.release()
 
+        self._find_default_export(asset)
+
+        if cache_result:
+            self.cache.add(assetname, asset)
+
+        return asset
+
+    def _find_default_export(self, asset: UAsset):
+        assert asset.assetname
+        assetname = asset.assetname
         leafname = assetname.split('/')[-1]
 
         # Check only exports with no namespace (top-level ones)
-        top_exports = [export for export in asset.exports.values if str(export.namespace) == 'None']
+        index = asset.get_export_index()
 
         # Look for a BP-style Default__<assetname> export
-        exports = [export for export in top_exports if str(export.name).startswith('Default__')]
+        exports = index.top_level_defaults
         if len(exports) > 1:
             logger.warning(f'Found more than one Default__ entry in {assetname}!')
         asset.default_export = exports[0] if exports else None
@@ -563,16 +944,171 @@ class AssetLoader:
 
         if not asset.default_export:
             # Fall back to an export named the same as the asset with no namespace
-            exports = [export for export in top_exports if str(export.name).lower() == leafname.lower()]
+            exports = index.top_level_by_lower_name.get(leafname.lower(), [])
             if len(exports) > 1:
                 logger.warning(f'Found more than <assetname> export in {assetname}!')
             else:
                 asset.default_export = exports[0] if exports else None
 
-        if cache_result:
-            self.cache.add(assetname, asset)
 
-        return asset
+class _AssetSearch:
+    '''A single directory scan for `AssetLoader.find_assetnames`.'''
+
+    def __init__(self, loader: AssetLoader, includes: Tuple[str, ...], excludes: Tuple[str, ...], extensions: Tuple[str, ...],
+                 return_extension: bool, invert: bool):
+        self.loader = loader
+        self.includes = PatternSet(includes)
+        self.excludes = PatternSet(excludes)
+        self.extensions = frozenset(extensions)
+        self.return_extension = return_extension
+        self.invert = invert
+
+        # re.match only anchors at the start, so an exclude that matches the start of a directory's name also
+        # matches every asset within it... as long as it doesn't need to see the end of the name
+        self.dir_excludes = PatternSet(exclude for exclude in excludes if not UNANCHORED_UNSAFE.search(exclude))
+        self.include_prefixes = [literal_prefix(include) for include in includes]
+
+    def scan(self, dirpath: str, reldir: str, excluded: bool):
+        # Work out the common asset name prefix of everything in this directory, if it can be done safely
+        cleanname = self._clean_dirname(reldir)
+        dirname = self._rewrite_dirname(cleanname)
+        fast_prefix = cleanname if reldir.count('/') >= 2 else None
+
+        # Skip the whole directory if nothing within it could be found
+        excluded = excluded or self._excludes_dir(dirname)
+        if excluded and not self.invert and dirname is not None and not self._may_include_below(dirname):
+            return
+
+        subdirs = []
+        try:
+            with os.scandir(dirpath) as entries:
+                for entry in entries:
+                    if entry.is_dir():
+                        if not entry.is_symlink():
+                            subdirs.append(entry)
+                        continue
+
+                    stem, ext = os.path.splitext(entry.name)
+                    if ext.lower() not in self.extensions:
+                        continue
+
+                    if fast_prefix is not None and stem and '.' not in stem and not stem[-1].isspace():
+                        assetname = fast_prefix + '/' + stem
+                    else:
+                        assetname = self.loader.clean_asset_name(reldir + '/' + stem if reldir else stem)
+
+                    # Handle any asset path rewrites
+                    for prefix_from, prefix_to in self.loader.rewrites_to_asset.items():
+                        if assetname.startswith(prefix_from):
+                            assetname = prefix_to + assetname[len(prefix_from):]
+                            break
+
+                    # Apply filtering, with forced inclusions taking priority over exclusions
+                    matched = self.includes.match(assetname) or not self.excludes.match(assetname)
+                    if matched ^ self.invert:
+                        yield (assetname, ext) if self.return_extension else assetname
+        except OSError:
+            return
+
+        for subdir in subdirs:
+            yield from self.scan(subdir.path, reldir + '/' + subdir.name if reldir else subdir.name, excluded)
+
+    def _clean_dirname(self, reldir: str) -> Optional[str]:
+        if not reldir:
+            return ''
+        if '.' in reldir or reldir != reldir.strip():
+            return None  # clean_asset_name would alter the names of assets within it differently
+        return self.loader.clean_asset_name(reldir)
+
+    def _rewrite_dirname(self, name: Optional[str]) -> Optional[str]:
+        if name is None:
+            return None
+        for prefix_from, prefix_to in self.loader.rewrites_to_asset.items():
+            if (name + '/').startswith(prefix_from):
+                return prefix_to + name[len(prefix_from):]
+            if prefix_from.startswith(name + '/'):
+                return None  # only applies to part of the directory
+        return name
+
+    def _excludes_dir(self, dirname: Optional[str]) -> bool:
+        return dirname is not None and self.dir_excludes.match(dirname + '/')
+
+    def _may_include_below(self, dirname: str) -> bool:
+        dirname += '/'
+        return any(prefix.startswith(dirname) or dirname.startswith(prefix) for prefix in self.include_prefixes)
+
+
+class PatternSet:
+    '''Matches against any of a set of regexes, using a single combined regex where possible.'''
+
+    def __init__(self, patterns: Iterable[str]):
+        self.patterns = [re.compile(pattern) for pattern in patterns]
+        self.combined: Optional[Pattern] = None
+        if self.patterns and not any(BACKREFERENCE.search(pattern.pattern) for pattern in self.patterns):
+            try:
+                self.combined = re.compile('|'.join(f'(?:{pattern.pattern})' for pattern in self.patterns))
+            except re.error:
+                pass  # e.g. flags that are only allowed at the start of a regex
+
+    def match(self, value: str) -> bool:
+        if self.combined:
+            return self.combined.match(value) is not None
+        return any(pattern.match(value) for pattern in self.patterns)
+
+
+BACKREFERENCE = re.compile(r'\\[1-9]|\(\?P=')
+UNANCHORED_UNSAFE = re.compile(r'\$|\\[bBZ]|\(\?[=!]')
+REGEX_QUANTIFIERS = '*?{'
+REGEX_SPECIALS = '.^$+()[]\\|' + REGEX_QUANTIFIERS
+
+
+def literal_prefix(pattern: str) -> str:
+    '''Find the literal text that anything matched by the regex must start with (possibly empty).'''
+    # Alternatives at the top level may each start differently
+    depth = 0
+    escaped = in_class = False
+    for c in pattern:
+        if escaped:
+            escaped = False
+        elif c == '\\':
+            escaped = True
+        elif in_class:
+            in_class = c != ']'
+        elif c == '[':
+            in_class = True
+        elif c == '(':
+            depth += 1
+        elif c == ')':
+            depth -= 1
+        elif c == '|' and depth == 0:
+            return ''
+
+    for i, c in enumerate(pattern):
+        if c in REGEX_QUANTIFIERS:
+            return pattern[:max(i - 1, 0)]
+        if c in REGEX_SPECIALS:
+            return pattern[:i]
+
+    return pattern
+
+
+def estimate_asset_size(asset: UAsset) -> int:
+    '''
+    Roughly estimate the memory retained by a parsed asset, based on the amount of its data that has been parsed.
+    This is much cheaper than measuring the size of the tree of nodes.
+    '''
+    export_bytes = 0
+    property_bytes = 0
+    deferred_bytes = 0
+    for export in asset.exports:
+        export_bytes += export.serial_size
+        if export.deferred_data is not None:
+            deferred_bytes += export.serial_size
+        elif 'properties' in export.field_values:
+            property_bytes += export.serial_size
+
+    table_bytes = max(asset.stream.size - export_bytes, 0)
+    return table_bytes*TABLE_BYTES_FACTOR + property_bytes*PROPERTY_BYTES_FACTOR + deferred_bytes
 
 
 def find_caseinsensitive_path(base: Path, *parts: str) -> Optional[Path]:
@@ -622,3 +1158,18 @@ def load_file_into_memory(filename):
         data = f.read()
         mem = memoryview(data)
     return mem
+
+
+def map_file_into_memory(filename) -> memoryview:
+    '''
+    Memory-map a file read-only, returning a zero-copy view of it.
+
+    The returned memoryview holds the only reference to the mapping, so releasing it with `mem.release()`
+    unmaps the file immediately. Any slices taken from it must be released (or freed) first.
+    '''
+    with open(filename, 'rb') as f:
+        # Empty files cannot be mapped
+        if os.fstat(f.fileno()).st_size == 0:
+            return memoryview(b'')
+        mapping = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    return memoryview(mapping)
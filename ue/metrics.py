@@ -0,0 +1,116 @@
+'''
+Counters describing the work done by the asset loader and its cache, to help tune cache sizes.
+
+Usage:
+    loader.metrics.snapshot()            # totals so far
+    loader.metrics.snapshot(reset=True)  # totals since the last reset, e.g. per export stage
+'''
+
+import heapq
+from collections import Counter
+from typing import Any, Dict, Iterable, List, Tuple
+
+__all__ = [
+    'LoaderMetrics',
+    'combine_snapshots',
+]
+
+
+class LoaderMetrics:
+    '''
+    Counts loader and cache activity.
+
+    `counters` holds:
+        lookups, hits, misses - cache lookups made when loading assets
+        reparses              - cached assets that had to be parsed again to satisfy the current context
+        upgrades              - cached assets upgraded in place to satisfy the current context
+        loads                 - assets parsed from disk
+        prefetched            - assets whose files were read ahead in the background
+        skeleton_hits,
+        skeleton_misses       - lookups in the persistent skeleton cache
+        property_index_hits,
+        property_index_misses - lookups of lazy property headers in the same cache
+    `evictions` counts cache entries dropped, by cause (purge, remove, wipe).
+    '''
+
+    def __init__(self, top_count: int = 10):
+        self.top_count = top_count
+        self.reset()
+
+    def reset(self):
+        self.counters: Counter = Counter()
+        self.evictions: Counter = Counter()
+        self.bytes_read = 0
+        self.parse_time = 0.0
+        self.link_time = 0.0
+        self.slowest: List[Tuple[float, str]] = []  # min-heaps of (value, assetname)
+        self.largest: List[Tuple[int, str]] = []
+
+    def count(self, name: str, amount: int = 1):
+        self.counters[name] += amount
+
+    def evicted(self, cause: str, amount: int = 1):
+        if amount:
+            self.evictions[cause] += amount
+
+    def record_load(self, assetname: str, size: int, parse_time: float, link_time: float):
+        '''Record an asset being read and parsed.'''
+        self.counters['loads'] += 1
+        self.bytes_read += size
+        self.parse_time += parse_time
+        self.link_time += link_time
+        _push_top(self.slowest, (parse_time + link_time, assetname), self.top_count)
+        _push_top(self.largest, (size, assetname), self.top_count)
+
+    def snapshot(self, reset=False) -> Dict[str, Any]:
+        '''Get the current metrics as plain, JSON-compatible data, optionally starting afresh afterwards.'''
+        result = dict(
+            counters=dict(self.counters),
+            evictions=dict(self.evictions),
+            bytes_read=self.bytes_read,
+            parse_time=round(self.parse_time, 3),
+            link_time=round(self.link_time, 3),
+            slowest=[dict(asset=name, time=round(value, 4)) for value, name in sorted(self.slowest, reverse=True)],
+            largest=[dict(asset=name, bytes=value) for value, name in sorted(self.largest, reverse=True)],
+        )
+
+        if reset:
+            self.reset()
+
+        return result
+
+
+def combine_snapshots(snapshots: Iterable[Dict[str, Any]], top_count: int = 10) -> Dict[str, Any]:
+    '''Combine several snapshots (e.g. from each export stage) into one.'''
+    counters: Counter = Counter()
+    evictions: Counter = Counter()
+    bytes_read = 0
+    parse_time = 0.0
+    link_time = 0.0
+    slowest: List[Dict[str, Any]] = []
+    largest: List[Dict[str, Any]] = []
+    for snapshot in snapshots:
+        counters.update(snapshot['counters'])
+        evictions.update(snapshot['evictions'])
+        bytes_read += snapshot['bytes_read']
+        parse_time += snapshot['parse_time']
+        link_time += snapshot['link_time']
+        slowest.extend(snapshot['slowest'])
+        largest.extend(snapshot['largest'])
+
+    return dict(
+        counters=dict(counters),
+        evictions=dict(evictions),
+        bytes_read=bytes_read,
+        parse_time=round(parse_time, 3),
+        link_time=round(link_time, 3),
+        slowest=heapq.nlargest(top_count, slowest, key=lambda entry: entry['time']),
+        largest=heapq.nlargest(top_count, largest, key=lambda entry: entry['bytes']),
+    )
+
+
+def _push_top(heap: list, item: tuple, count: int):
+    if len(heap) < count:
+        heapq.heappush(heap, item)
+    elif item > heap[0]:
+        heapq.heapreplace(heap, item)
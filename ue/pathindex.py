@@ -0,0 +1,75 @@
+'''
+A prebuilt, case-insensitive index of the files below a game's Content directory.
+
+Resolving asset names against the index needs no filesystem access at all, making it much faster than
+checking candidate paths on disk. The index must be rebuilt whenever the files change - see
+`ArkSteamManager.createLoader` for how it is persisted against the game and mod versions.
+'''
+
+import os
+from pathlib import Path
+from typing import Dict, Iterable, Optional, Union
+
+from utils.log import get_logger
+
+logger = get_logger(__name__)
+
+__all__ = [
+    'PathIndex',
+]
+
+
+class PathIndex:
+    '''
+    Maps lowercased paths to their real form, relative to the base path and using '/' separators.
+    Only paths that start with the indexed root directory (e.g. 'Content') are covered.
+    '''
+
+    def __init__(self, root: str = 'Content'):
+        self.root = root
+        self.root_key = root.lower()
+        self.files: Dict[str, str] = dict()
+        self.dirs: Dict[str, str] = dict()
+
+    @classmethod
+    def build(cls, basepath: Union[str, Path], root: str = 'Content') -> 'PathIndex':
+        '''Scan every file below `basepath/root`.'''
+        index = cls(root)
+        basepath = str(basepath)
+        index._scan(os.path.join(basepath, root), root)
+        logger.info('Indexed %d files in %d directories below %s', len(index.files), len(index.dirs), root)
+        return index
+
+    def covers(self, parts: Iterable[str]) -> bool:
+        '''Check if the given relative path falls within the index.'''
+        first = next(iter(parts), None)
+        return first is not None and first.lower() == self.root_key
+
+    def find(self, parts: Iterable[str], partial=False) -> Optional[str]:
+        '''
+        Find the real relative path of a file (or a directory, if `partial`), matching case-insensitively.
+        Returns None if it does not exist.
+        '''
+        key = '/'.join(parts).lower()
+        return self.dirs.get(key) if partial else self.files.get(key)
+
+    def __len__(self):
+        return len(self.files)
+
+    def _scan(self, path: str, relpath: str):
+        self.dirs[relpath.lower()] = relpath
+        subdirs = []
+        try:
+            with os.scandir(path) as entries:
+                for entry in entries:
+                    child = relpath + '/' + entry.name
+                    if entry.is_dir():
+                        subdirs.append((entry.path, child))
+                    else:
+                        self.files[child.lower()] = child
+        except FileNotFoundError:
+            logger.warning('Indexed directory does not exist: %s', path)
+            return
+
+        for subpath, child in subdirs:
+            self._scan(subpath, child)
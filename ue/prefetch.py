@@ -0,0 +1,137 @@
+'''
+Read-ahead of asset files that are about to be loaded, so disk reads overlap with parsing.
+
+Usage:
+    with loader.prefetching(assetnames):
+        for assetname in assetnames:
+            loader.load_asset(assetname)
+'''
+
+import os
+from concurrent.futures import Future, ThreadPoolExecutor
+from threading import Lock
+from typing import TYPE_CHECKING, Dict, Iterable, List, Optional, Tuple
+
+from utils.log import get_logger
+
+from .loader import load_file_into_memory
+
+if TYPE_CHECKING:
+    from .loader import AssetLoader
+
+logger = get_logger(__name__)
+
+__all__ = [
+    'AssetPrefetcher',
+]
+
+PrefetchResult = Optional[Tuple[memoryview, str, int]]  # (data, ext, file mtime from before it was read)
+
+
+class AssetPrefetcher:
+    '''
+    Reads the files of hinted assets into memory from a small thread pool, in the order they are expected to
+    be loaded. Data that is read but not yet taken is limited to roughly `max_bytes`, not counting reads in
+    progress. Files too large to fit comfortably in the budget are left to be loaded as normal.
+
+    Assets that are skipped over in the hinted order (e.g. because they were found in the cache) are dropped
+    as soon as a later one is taken.
+    '''
+
+    def __init__(self, loader: 'AssetLoader', assetnames: Iterable[str], threads: int = 2, max_bytes: int = 64 * 1024 * 1024):
+        self.loader = loader
+        self.max_bytes = max_bytes
+        self.max_reading = threads * 2
+        self.order: List[str] = list(dict.fromkeys(loader.clean_asset_name(name) for name in assetnames))
+        self.positions: Dict[str, int] = {name: i for i, name in enumerate(self.order)}
+        self.next_index = 0  # next entry of `order` to schedule
+        self.taken_index = 0  # entries before this have been taken or skipped
+        self.futures: Dict[str, Future] = dict()
+        self.sizes: Dict[str, int] = dict()
+        self.buffered_bytes = 0
+        self.reading = 0
+        self.lock = Lock()
+        self.executor: Optional[ThreadPoolExecutor] = ThreadPoolExecutor(max_workers=threads, thread_name_prefix='prefetch')
+        self._schedule()
+
+    def take(self, assetname: str) -> PrefetchResult:
+        '''
+        Get the prefetched data for an asset as (memoryview, ext, mtime), waiting for it if still being read.
+        Returns None if the asset was not prefetched.
+        '''
+        index = self.positions.get(assetname, None)
+        if index is None or index < self.taken_index or not self.executor:
+            return None
+
+        # Anything hinted before this asset won't be needed
+        for skipped in self.order[self.taken_index:index]:
+            self._discard(skipped)
+        self.taken_index = index + 1
+
+        future = self.futures.pop(assetname, None)
+        result = future.result() if future else None
+        with self.lock:
+            self.buffered_bytes -= self.sizes.pop(assetname, 0)
+
+        self._schedule()
+        return result
+
+    def close(self):
+        '''Stop reading ahead and drop any unused data.'''
+        if not self.executor:
+            return
+
+        for assetname in list(self.futures):
+            self._discard(assetname)
+        self.executor.shutdown(wait=True)
+        self.executor = None
+
+    def _schedule(self):
+        while self.next_index < len(self.order):
+            with self.lock:
+                if self.reading >= self.max_reading or self.buffered_bytes >= self.max_bytes:
+                    break
+                self.reading += 1
+
+            assetname = self.order[self.next_index]
+            self.next_index += 1
+            self.futures[assetname] = self.executor.submit(self._read, assetname)  # type: ignore
+
+    def _read(self, assetname: str) -> PrefetchResult:
+        try:
+            path, ext = self.loader.find_raw_asset(assetname)
+            stat = os.stat(path)
+            size = stat.st_size
+            if size > self.max_bytes // 4:
+                return None
+
+            mem = load_file_into_memory(path)
+            with self.lock:
+                self.sizes[assetname] = size
+                self.buffered_bytes += size
+            return (mem, ext, stat.st_mtime_ns)
+        except Exception:  # pylint: disable=broad-except
+            return None  # leave the error to be reported when the asset is loaded normally
+        finally:
+            with self.lock:
+                self.reading -= 1
+
+    def _discard(self, assetname: str):
+        future = self.futures.pop(assetname, None)
+        if not future:
+            return
+
+        if future.cancel():
+            with self.lock:
+                self.reading -= 1
+        else:
+            # Release the data once read, without waiting for it here
+            future.add_done_callback(lambda future: self._release(assetname, future))
+
+    def _release(self, assetname: str, future: Future):
+        result = future.result()
+        if result:
+            result[0].release()
+
+        with self.lock:
+            self.buffered_bytes -= self.sizes.pop(assetname, 0)
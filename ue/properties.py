@@ -5,17 +5,19 @@ import sys
 import uuid
 import warnings
 from abc import ABC, abstractmethod
+from array import array
 from collections import defaultdict
+from collections.abc import Mapping, Sequence
 from numbers import Real
-from typing import Any, ByteString, Dict, List, Optional, Set, Tuple, Type, Union
+from typing import Any, ByteString, Dict, Iterator, List, Optional, Set, Tuple, Type, Union
 
 from utils.log import get_logger
 
-from .base import UEBase
+from .base import CompactFields, UEBase, compact_slots
 from .context import INCLUDE_METADATA
 from .coretypes import NameIndex, ObjectIndex
 from .number import make_binary_operator, make_binary_operators, make_operator
-from .stream import MemoryStream
+from .stream import MemoryStream, make_codec
 from .utils import clean_double, clean_float
 
 if INCLUDE_METADATA:
@@ -37,6 +39,13 @@ PropDict = Dict[str, Dict[int, UEBase]]
 
 NO_FALLBACK = object()
 
+PAIR_OF_UINT32 = make_codec('II')
+PAIR_OF_INT32 = make_codec('ii')
+GUID_WORDS_LE = make_codec('4I')
+GUID_WORDS_BE = struct.Struct('>4I')
+ENGINE_VERSION = make_codec('HHHI')
+FLOAT = make_codec('f')
+
 
 class PropertyTable(UEBase):
     string_format = '{count} entries'
@@ -97,8 +106,8 @@ class PropertyTable(UEBase):
         saved_offset = self.stream.offset
 
         # Check for a None name here - that's the terminator
-        name = NameIndex(self).deserialise()
-        if name.index == self.asset.none_index:
+        if self.stream.readUInt32() == self.asset.none_index:
+            self.stream.offset = saved_offset + 8
             return None
 
         # Reset back to the saved offset and read the whole property
@@ -145,7 +154,167 @@ class PropertyTable(UEBase):
                     p.pretty(value)
 
 
-class PropertyHeader(UEBase):
+# Bytes a property's value occupies beyond the size given in its header, as consumed by the decoders below
+VALUE_EXTRA_BYTES = {
+    'BoolProperty': 1,  # the value is stored after a zero size
+    'ByteProperty': 8,  # enum name
+    'StructProperty': 8,  # struct type name
+    'ArrayProperty': 8,  # element type name
+}
+
+PROPERTY_HEADER = make_codec('IIIIII')
+
+
+class LazyPropertyTable(PropertyTable):
+    '''
+    A PropertyTable that only decodes values when they are asked for.
+
+    Deserialising scans just the property headers, recording the offset of each value by name and index.
+    Values are decoded (and linked) individually on first access through `as_dict`, `get_property` or
+    `get_values`. Accessing `values` or iterating the table decodes everything, as with a normal table.
+
+    The export's serialised data is copied so it remains available after the asset's file is released.
+    Headers previously found for the same data (e.g. from the on-disk cache) can be given to skip the scan.
+    '''
+    string_format = '{count} entries (lazy)'
+
+    count: int
+    headers: Dict[str, Dict[int, int]]  # name -> index -> offset
+
+    def __init__(self, owner: UEBase, stream=None):
+        super().__init__(owner, stream)
+        self._decoded: Dict[int, Property] = dict()
+        self._all: Optional[List[Property]] = None
+
+    @property
+    def values(self) -> List['Property']:  # type: ignore  # (overrides a field)
+        if self._all is None:
+            offsets = sorted(offset for indexes in self.headers.values() for offset in indexes.values())
+            self._all = [self._decode(offset) for offset in offsets]
+        return self._all
+
+    def as_dict(self) -> 'LazyPropDict':  # type: ignore  # (a read-only Mapping with the same access semantics)
+        if self._as_dict is None:
+            self._as_dict = LazyPropDict(self)  # type: ignore
+        return self._as_dict  # type: ignore
+
+    def get_values(self, name: str) -> Dict[int, UEBase]:
+        '''Decode and return all values for the given property name, keyed by index.'''
+        indexes = self.headers.get(name, None)
+        result: Dict[int, UEBase] = defaultdict(lambda: None)
+        if indexes:
+            for index, offset in indexes.items():
+                result[index] = self._decode(offset).value
+        return result
+
+    def _deserialise(self, known_headers: Optional[Tuple[int, Dict[str, Dict[int, int]]]] = None):
+        # Take a private copy of this export's data so values can be decoded after the file is released
+        self.stream = MemoryStream(self.stream.readBytes(self.stream.end - self.stream.offset))
+        if known_headers:
+            count, headers = known_headers
+            self._newField('headers', headers)
+            self._newField('count', count)
+            return
+
+        stream = self.stream
+        asset = self.asset
+        none_index = asset.none_index
+        clean_names = asset.clean_property_names
+
+        headers: Dict[str, Dict[int, int]] = dict()
+        count = 0
+        while stream.offset < (stream.end - 8):
+            offset = stream.offset
+            if stream.readUInt32() == none_index:
+                break
+            stream.offset = offset
+
+            name_index, name_instance, type_index, _, size, index = stream.readStruct(PROPERTY_HEADER)
+            name = clean_names.get((name_index, name_instance), None)
+            if name is None:
+                name = str(asset.getName(name_index))
+                if name_instance:
+                    name = f'{name}_{name_instance - 1}'
+                name = clean_names[(name_index, name_instance)] = clean_property_name(name)
+            type_name = str(asset.getName(type_index))
+
+            headers.setdefault(name, dict())[index] = offset
+            count += 1
+            stream.offset += size + VALUE_EXTRA_BYTES.get(type_name, 0)
+
+        self._newField('headers', headers)
+        self._newField('count', count)
+
+    def _link(self):
+        '''Values are linked individually as they are decoded.'''
+
+    def _decode(self, offset: int) -> 'Property':
+        prop = self._decoded.get(offset, None)
+        if prop is None:
+            self.stream.offset = offset
+            prop = Property(self).deserialise()
+            prop.link()
+            self._decoded[offset] = prop
+        return prop
+
+    def __getitem__(self, index: int):
+        return self.values[index]
+
+    def __len__(self):
+        return self.count
+
+
+class LazyPropDict(Mapping):
+    '''
+    Read-only `name -> index -> value` view of a LazyPropertyTable, decoding each name on first access.
+    Like the dict produced by PropertyTable.as_dict, missing names and indexes give None rather than raising.
+    '''
+
+    def __init__(self, table: LazyPropertyTable):
+        self._table = table
+        self._cache: Dict[str, Dict[int, UEBase]] = dict()
+
+    def __getitem__(self, name: str) -> Dict[int, UEBase]:
+        result = self._cache.get(name, None)
+        if result is None:
+            result = self._table.get_values(name)
+            if name in self._table.headers:
+                self._cache[name] = result
+        return result
+
+    def __contains__(self, name) -> bool:
+        return name in self._table.headers
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._table.headers)
+
+    def __len__(self) -> int:
+        return len(self._table.headers)
+
+    def indexes(self, name: str) -> Tuple[int, ...]:
+        '''Return the indexes present for the given name, without decoding any values.'''
+        return tuple(self._table.headers.get(name, ()))
+
+
+UNRESOLVED = object()
+
+
+def clean_property_name(name: str) -> str:
+    '''Convert a raw property name into the form used as a key in property tables.'''
+    return sys.intern(name.strip().replace(' ', '_'))
+
+
+def _resolve_property_type(type_name: str) -> Optional[Type['UEBase']]:
+    try:
+        return getPropertyType(type_name)
+    except TypeError:
+        if type_name not in SKIPPABLE_STRUCTS:
+            warnings.warn(f'Skipping unknown property type {type_name}')
+        return None
+
+
+class PropertyHeader(CompactFields, UEBase):
+    __slots__ = compact_slots('name_id', 'type', 'size', 'index', 'name')
     display_fields = ['name', 'index']
 
     name: str
@@ -157,17 +326,23 @@ class PropertyHeader(UEBase):
     def _deserialise(self):
         self._newField('name_id', NameIndex(self))
         self._newField('type', NameIndex(self))
-        self._newField('size', self.stream.readUInt32())
-        self._newField('index', self.stream.readUInt32())
+        size, index = self.stream.readStruct(PAIR_OF_UINT32)
+        self._newField('size', size)
+        self._newField('index', index)
 
     def _link(self):
         super()._link()
-        clean_name = str(self.name_id).strip()
-        clean_name = clean_name.replace(' ', '_')
+        name_id = self.name_id
+        clean_names = self.asset.clean_property_names
+        key = (name_id.index, name_id.instance)
+        clean_name = clean_names.get(key, None)
+        if clean_name is None:
+            clean_name = clean_names[key] = clean_property_name(str(name_id))
         self._newField('name', clean_name)
 
 
-class Property(UEBase):
+class Property(CompactFields, UEBase):
+    __slots__ = compact_slots('header', 'value')
     string_format = '{header.name}[{header.index}] = {value}'
 
     header: PropertyHeader
@@ -176,12 +351,11 @@ class Property(UEBase):
     def _deserialise(self):
         self._newField('header', PropertyHeader(self))
         self.header.link()  # safe to link as all imports/exports are completed
-        propertyType = None
-        try:
-            propertyType = getPropertyType(self.header.type.value.value)
-        except TypeError:
-            if self.header.type.value.value not in SKIPPABLE_STRUCTS:
-                warnings.warn(f'Skipping unknown property type {self.header.type.value.value}')
+        property_types = self.asset.property_types
+        type_index = self.header.type.index
+        propertyType = property_types.get(type_index, UNRESOLVED)
+        if propertyType is UNRESOLVED:
+            propertyType = property_types[type_index] = _resolve_property_type(self.header.type.value.value)
 
         if propertyType:
             self._newField('value', propertyType(self), self.header.size)
@@ -211,6 +385,8 @@ class DummyAsset(UEBase):
         for k, v in kwargs.items():
             vars(self).setdefault(k, v)
         self.fake_names = dict()
+        self.clean_property_names = dict()
+        self.property_types = dict()
         self.index = 0
         self.none_index = 9999
         self.asset = self
@@ -235,7 +411,8 @@ class DummyAsset(UEBase):
         raise ValueError("Attempt to lookup a name in a dummy asset")
 
 
-class ValueProperty(UEBase, Real, ABC):
+class ValueProperty(CompactFields, UEBase, Real, ABC):
+    __slots__ = compact_slots()
     value: Real
 
     @abstractmethod
@@ -314,6 +491,7 @@ class ValueProperty(UEBase, Real, ABC):
 
 
 class FloatProperty(ValueProperty):
+    __slots__ = compact_slots('value', 'raw_data', 'rounded', 'rounded_value', 'textual')
     main_field = 'textual'
     display_fields = ['textual']
 
@@ -401,6 +579,7 @@ class FloatProperty(ValueProperty):
 
 
 class DoubleProperty(ValueProperty):
+    __slots__ = compact_slots('value', 'bytes', 'rounded', 'rounded_value', 'textual')
     main_field = 'textual'
     display_fields = ['textual']
 
@@ -435,6 +614,7 @@ class DoubleProperty(ValueProperty):
 
 
 class IntProperty(ValueProperty):
+    __slots__ = compact_slots('value')
     string_format = '(int) {value}'
     main_field = 'value'
 
@@ -462,6 +642,7 @@ class IntProperty(ValueProperty):
 
 
 class UInt32Property(IntProperty):
+    __slots__ = compact_slots()
     string_format = '(uint) {value}'
 
     def _deserialise(self, size=None):
@@ -469,6 +650,7 @@ class UInt32Property(IntProperty):
 
 
 class BoolProperty(ValueProperty):
+    __slots__ = compact_slots('value')
     main_field = 'value'
 
     value: bool  # type: ignore
@@ -495,6 +677,7 @@ class BoolProperty(ValueProperty):
 
 
 class ByteProperty(ValueProperty):  # With optional enum type
+    __slots__ = compact_slots('enum', 'value')
     enum: NameIndex
     value: Union[NameIndex, int]  # type: ignore  # (we *want* to override the base type)
 
@@ -674,6 +857,48 @@ class StringProperty(StringLikeProperty):
     __nonzero__ = __bool__
 
 
+class NamePool:
+    '''
+    Process-wide pool of name strings, shared between every loaded asset.
+
+    When metadata is disabled each asset's name table is filled from this pool, so a name such as "None" or
+    "StructProperty" is held once rather than once per cached asset. Pooled entries are owned by a private dummy
+    asset so they never keep a real asset alive. With metadata enabled each asset keeps its own names, as they
+    track their users.
+    '''
+
+    def __init__(self):
+        self._owner = DummyAsset(asset=None)
+        self._names: Dict[str, StringProperty] = dict()
+
+    def read(self, stream: MemoryStream) -> StringProperty:
+        '''Read a name from the stream, returning the pooled StringProperty for it.'''
+        size = stream.readInt32()
+        if size >= 0:
+            value = stream.readTerminatedString(size)
+        else:
+            value = stream.readTerminatedWideString(-size)
+
+        return self.get(value)
+
+    def get(self, value: str) -> StringProperty:
+        '''Get the pooled StringProperty for the given string, adding it if required.'''
+        name = self._names.get(value, None)
+        if name is None:
+            name = StringProperty.create(sys.intern(value), self._owner)
+            self._names[name.value] = name
+        return name
+
+    def clear(self):
+        self._names.clear()
+
+    def __len__(self):
+        return len(self._names)
+
+
+NAME_POOL = NamePool()
+
+
 class TextProperty(StringLikeProperty):
     main_field = 'source_string'
 
@@ -703,11 +928,11 @@ class Guid(UEBase):
     value: uuid.UUID
 
     def _deserialise(self, *args):
-        raw_bytes = self.stream.readBytes(16)
+        words = self.stream.readStruct(GUID_WORDS_LE)
         # Here we need to reverse the endian of each 4-byte word
         # to match C# UUID decoder. Python's bytes_le only corrects
         # some of the fields as the rest are single bytes.
-        value = uuid.UUID(bytes=struct.pack('>4I', *struct.unpack('<4I', raw_bytes)))
+        value = uuid.UUID(bytes=GUID_WORDS_BE.pack(*words))
         self._newField('value', value)
 
     def format_for_json(self):
@@ -914,9 +1139,8 @@ class StructProperty(UEBase):
         while True:
             # Peek the name and terminate on None
             saved_offset = self.stream.offset
-            type_or_name = NameIndex(self)
-            type_or_name.deserialise()
-            if type_or_name.index == self.asset.none_index:
+            if self.stream.readUInt32() == self.asset.none_index:
+                self.stream.offset = saved_offset + 8
                 return
             self.stream.offset = saved_offset
 
@@ -980,10 +1204,79 @@ class StructProperty(UEBase):
                     p.pretty(value)
 
 
+class PrimitiveArray(Sequence):
+    '''
+    The values of an ArrayProperty of fixed-size primitives, unpacked in one go into an `array.array`.
+
+    Indexing and iteration give the usual property objects (e.g. FloatProperty), created only when first accessed.
+    `raw` holds the plain values and JSON output is produced directly from them.
+    '''
+    __slots__ = ('owner', 'item_type', 'raw', '_elements')
+
+    def __init__(self, owner: UEBase, item_type: Type[ValueProperty], raw: array):
+        self.owner = owner
+        self.item_type = item_type
+        self.raw = raw
+        self._elements: Dict[int, ValueProperty] = dict()
+
+    def __len__(self):
+        return len(self.raw)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self.raw)))]
+
+        if index < 0:
+            index += len(self.raw)
+        if not 0 <= index < len(self.raw):
+            raise IndexError('array index out of range')
+
+        element = self._elements.get(index, None)
+        if element is None:
+            element = self._elements[index] = self._create_element(index)
+        return element
+
+    def _create_element(self, index: int) -> ValueProperty:
+        data = self.raw[index:index + 1]
+        if sys.byteorder != 'little':
+            data.byteswap()
+
+        element = self.item_type(self.owner, MemoryStream(data.tobytes()))
+        element.is_inside_array = True
+        element.deserialise(self.raw.itemsize)
+        element.link()
+        return element
+
+    def format_for_json(self):
+        convert = PRIMITIVE_ARRAY_OUTPUT.get(self.item_type, None)
+        if convert:
+            return [convert(value) for value in self.raw]
+        return self.raw.tolist()
+
+    def __str__(self):
+        return str(self.raw.tolist())
+
+
+# Element types that ArrayProperty unpacks in bulk, with their array.array typecodes
+PRIMITIVE_ARRAY_TYPECODES: Dict[Type[ValueProperty], str] = {
+    FloatProperty: 'f',
+    DoubleProperty: 'd',
+    IntProperty: 'i',
+    UInt32Property: 'I',
+    BoolProperty: 'B',
+}
+
+# Conversions matching the elements' own format_for_json
+PRIMITIVE_ARRAY_OUTPUT = {
+    FloatProperty: clean_float,
+    BoolProperty: bool,
+}
+
+
 class ArrayProperty(UEBase):
     field_type: NameIndex
     count: int
-    values: List[UEBase]
+    values: Union[List[UEBase], PrimitiveArray]
 
     def _deserialise(self, size, with_type: Type = None):  # type: ignore
         assert size >= 4, "Array size is required"
@@ -1010,6 +1303,16 @@ class ArrayProperty(UEBase):
             self._newField('value', f'<unsupported field type {self.field_type}>')
             return
 
+        typecode = PRIMITIVE_ARRAY_TYPECODES.get(propertyType, None)
+        if typecode and size - 4 == self.count * array(typecode).itemsize:
+            raw = self.stream.readPackedArray(typecode, self.count)
+            self._newField('values', PrimitiveArray(self, propertyType, raw))
+            return
+
+        if not INCLUDE_METADATA and issubclass(propertyType, FixedStruct) and size - 4 == self.count * propertyType.codec.size:
+            self._newField('values', self._read_fixed_structs(propertyType, size - 4))
+            return
+
         values: List[Union[UEBase, str]] = []
         self._newField('values', values)
 
@@ -1039,6 +1342,17 @@ class ArrayProperty(UEBase):
 
         self.stream.offset = saved_offset + size
 
+    def _read_fixed_structs(self, struct_type: Type['FixedStruct'], size: int) -> List[UEBase]:
+        '''Unpack a whole array of fixed-layout structs in one pass.'''
+        start = self.stream.offset
+        self.stream.offset += size
+        values = []
+        for raw in struct_type.codec.iter_unpack(self.stream.mem[start:start + size]):
+            value = struct_type.from_raw(self, raw)
+            value.is_inside_array = True
+            values.append(value)
+        return values
+
     def format_for_json(self):
         return self.values
 
@@ -1065,101 +1379,188 @@ class ArrayProperty(UEBase):
                     p.text(', ' + str(self.value))
 
 
-class Vector(UEBase):
-    x: FloatProperty
-    y: FloatProperty
-    z: FloatProperty
+class FixedStruct(UEBase):
+    '''
+    Base for struct types with a fixed binary layout, each read with a single precompiled unpack.
+
+    Subclasses declare their `layout` as pairs of field name and type (FloatProperty, BoolProperty or another
+    FixedStruct). The plain values are kept in `raw`, and the field objects are only created when first accessed.
+    JSON output is generated directly from the plain values. With metadata enabled all fields are read
+    individually from the stream instead, so the tree remains fully browsable.
+    '''
+    __slots__ = compact_slots('raw', 'field_values')
+
+    layout: Tuple[Tuple[str, Type[UEBase]], ...] = ()
+    codec: struct.Struct
+    _fields: Dict[str, Tuple[Type[UEBase], int, int]]  # name -> (type, start, end) within raw
+
+    raw: tuple
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+
+        fmt = ''
+        fields: Dict[str, Tuple[Type[UEBase], int, int]] = dict()
+        for name, field_type in cls.layout:
+            start = len(fmt)
+            if issubclass(field_type, FixedStruct):
+                fmt += field_type.codec.format[1:]
+            elif field_type is FloatProperty:
+                fmt += 'f'
+            elif field_type is BoolProperty:
+                fmt += 'B'
+            else:
+                raise TypeError(f'Unsupported field type {field_type.__name__} in {cls.__name__}')
+            fields[name] = (field_type, start, len(fmt))
+
+        cls.codec = make_codec(fmt)
+        cls._fields = fields
+
+    @classmethod
+    def from_raw(cls, owner: UEBase, raw: tuple) -> 'FixedStruct':
+        '''Create an already-decoded struct from plain values, e.g. when nested in another struct.'''
+        obj = cls(owner)
+        obj.raw = raw
+        obj.is_serialised = True
+        return obj
 
     def _deserialise(self, size=None):
-        self._newField('x', FloatProperty(self))
-        self._newField('y', FloatProperty(self))
-        self._newField('z', FloatProperty(self))
+        if not INCLUDE_METADATA:
+            self.raw = self.stream.readStruct(self.codec)
+            return
+
+        # Read each field from the stream so their offsets remain accurate for browsing
+        start = self.stream.offset
+        for name, field_type in self.layout:
+            self._newField(name, field_type(self))
+        self.raw = self.codec.unpack_from(self.stream.mem, start)
+
+    def _create_field(self, field_type: Type[UEBase], raw: tuple) -> UEBase:
+        if issubclass(field_type, FixedStruct):
+            return field_type.from_raw(self, raw)
+
+        if field_type is FloatProperty:
+            value = FloatProperty(self, MemoryStream(FLOAT.pack(raw[0])))
+        else:
+            value = BoolProperty(self, MemoryStream(bytes(raw)))
+        value.deserialise()
+        return value
+
+    def __getattr__(self, name: str):
+        field = self._fields.get(name, None)
+        if field is None:
+            raise AttributeError(f'No field named "{name}"')
+
+        # Return the field if it has already been created
+        value = self.field_values.get(name, None)
+        if value is not None:
+            return value
+
+        field_type, start, end = field
+        value = self._create_field(field_type, self.raw[start:end])
+        self._newField(name, value)
+        value.link()
+        return value
+
+    def as_tuple(self) -> tuple:
+        return tuple(getattr(self, name) for name, _ in self.layout)
 
     def format_for_json(self):
-        return {'x': self.x.format_for_json(), 'y': self.y.format_for_json(), 'z': self.z.format_for_json()}
+        return self.format_raw(self.raw)
 
+    @classmethod
+    def format_raw(cls, raw: tuple):
+        '''Produce JSON output for this struct type directly from its plain values.'''
+        output = dict()
+        for name, (field_type, start, end) in cls._fields.items():
+            if issubclass(field_type, FixedStruct):
+                output[name] = field_type.format_raw(raw[start:end])
+            elif field_type is FloatProperty:
+                output[name] = clean_float(raw[start])
+            else:
+                output[name] = bool(raw[start])
+        return output
+
+    def __str__(self):
+        fields_txt = ', '.join(str(value) for value in self.as_tuple())
+        return f'{self.__class__.__name__}({fields_txt})'
+
+
+class Vector(FixedStruct):
+    __slots__ = compact_slots()
+    layout = (('x', FloatProperty), ('y', FloatProperty), ('z', FloatProperty))
+
+    x: FloatProperty
+    y: FloatProperty
+    z: FloatProperty
+
+
+class Box(FixedStruct):
+    __slots__ = compact_slots()
+    layout = (('min', Vector), ('max', Vector), ('is_valid', BoolProperty))
 
-class Box(UEBase):
     min: Vector
     max: Vector
-    is_valid: bool
+    is_valid: BoolProperty
 
-    def _deserialise(self, size=None):
-        self._newField('min', Vector(self))
-        self._newField('max', Vector(self))
-        self._newField('is_valid', BoolProperty(self))
 
+class Vector2D(FixedStruct):
+    __slots__ = compact_slots()
+    layout = (('x', FloatProperty), ('y', FloatProperty))
 
-class Vector2D(UEBase):
     x: FloatProperty
     y: FloatProperty
 
-    def _deserialise(self, size=None):
-        self._newField('x', FloatProperty(self))
-        self._newField('y', FloatProperty(self))
 
+class Rotator(FixedStruct):
+    __slots__ = compact_slots()
+    layout = (('a', FloatProperty), ('b', FloatProperty), ('c', FloatProperty))
 
-class Rotator(UEBase):
     a: FloatProperty
     b: FloatProperty
     c: FloatProperty
 
-    def _deserialise(self, size=None):
-        self._newField('a', FloatProperty(self))
-        self._newField('b', FloatProperty(self))
-        self._newField('c', FloatProperty(self))
 
+class Quat(FixedStruct):
+    __slots__ = compact_slots()
+    layout = (('w', FloatProperty), ('x', FloatProperty), ('y', FloatProperty), ('z', FloatProperty))
 
-class Quat(UEBase):
     w: FloatProperty
     x: FloatProperty
     y: FloatProperty
     z: FloatProperty
 
-    def _deserialise(self, size=None):
-        self._newField('w', FloatProperty(self))
-        self._newField('x', FloatProperty(self))
-        self._newField('y', FloatProperty(self))
-        self._newField('z', FloatProperty(self))
 
+class Transform(FixedStruct):
+    __slots__ = compact_slots()
+    layout = (('rotation', Quat), ('translation', Vector), ('scale', Vector))
 
-class Transform(UEBase):
     rotation: Quat
     translation: Vector
     scale: Vector
 
-    def _deserialise(self, size=None):
-        self._newField('rotation', Quat(self))
-        self._newField('translation', Vector(self))
-        self._newField('scale', Vector(self))
-
 
-class Color(UEBase):
-    string_format = '#{rgba:08X}'
+class LinearColor(FixedStruct):
+    __slots__ = compact_slots()
+    layout = (('r', FloatProperty), ('g', FloatProperty), ('b', FloatProperty), ('a', FloatProperty))
 
-    rgba: int
-
-    def _deserialise(self, size=None):
-        self._newField('rgba', self.stream.readUInt32())
-
-
-class LinearColor(UEBase):
     r: FloatProperty
     g: FloatProperty
     b: FloatProperty
     a: FloatProperty
 
-    def _deserialise(self, size=None):
-        self._newField('r', FloatProperty(self))
-        self._newField('g', FloatProperty(self))
-        self._newField('b', FloatProperty(self))
-        self._newField('a', FloatProperty(self))
+    @classmethod
+    def format_raw(cls, raw: tuple):
+        return tuple(clean_float(value) for value in raw)
 
-    def as_tuple(self):
-        return tuple(v for v in self.field_values.values())
 
-    def format_for_json(self):
-        return self.as_tuple()
+class Color(UEBase):
+    string_format = '#{rgba:08X}'
+
+    rgba: int
+
+    def _deserialise(self, size=None):
+        self._newField('rgba', self.stream.readUInt32())
 
 
 class IntPoint(UEBase):
@@ -1167,8 +1568,9 @@ class IntPoint(UEBase):
     y: int
 
     def _deserialise(self, size=None):
-        self._newField('x', self.stream.readInt32())
-        self._newField('y', self.stream.readInt32())
+        x, y = self.stream.readStruct(PAIR_OF_INT32)
+        self._newField('x', x)
+        self._newField('y', y)
 
 
 class EngineVersion(UEBase):
@@ -1179,10 +1581,11 @@ class EngineVersion(UEBase):
     branch: str
 
     def _deserialise(self):
-        self._newField('major', self.stream.readUInt16())
-        self._newField('minor', self.stream.readUInt16())
-        self._newField('patch', self.stream.readUInt16())
-        self._newField('changelist', self.stream.readUInt32())
+        major, minor, patch, changelist = self.stream.readStruct(ENGINE_VERSION)
+        self._newField('major', major)
+        self._newField('minor', minor)
+        self._newField('patch', patch)
+        self._newField('changelist', changelist)
         self._newField('branch', StringProperty(self))
 
 
@@ -1226,6 +1629,12 @@ def getPropertyType(typeName: str, throw=True):
 __all_extras__ = (
     'getPropertyType',
     'PropertyTable',
+    'LazyPropertyTable',
+    'LazyPropDict',
+    'NamePool',
+    'NAME_POOL',
+    'PrimitiveArray',
+    'FixedStruct',
     'CustomVersion',
     'EngineVersion',
     'StringLikeProperty',
@@ -7,7 +7,8 @@ from utils.generics import get_generic_args
 from .base import UEBase
 from .hierarchy import find_parent_classes
 from .loader import AssetLoader
-from .properties import BoolProperty, ByteProperty, DummyAsset, FloatProperty, IntProperty, ObjectProperty, StringProperty
+from .properties import BoolProperty, ByteProperty, DummyAsset, \
+    FloatProperty, IntProperty, LazyPropDict, ObjectProperty, StringProperty
 
 __all__ = [
     'UEProxyStructure',
@@ -28,6 +29,7 @@ _UETYPE = '__uetype'
 _UEFIELDS = '__uefields'
 _UEOVERRIDDEN = '__ueoverridden'
 _UEOBJECT = '__ueobject'
+_UEDEFERRED = '__uedeferred'
 
 NO_FALLBACK = object()
 
@@ -97,6 +99,17 @@ class UEProxyStructure:
         # Initialise the empty set of overridden fields
         setattr(self, _UEOVERRIDDEN, set())
         setattr(self, _UEOBJECT, None)
+        setattr(self, _UEDEFERRED, dict())
+
+    def __getattr__(self, name: str):
+        '''Decode fields from lazy property tables only when they are first read.'''
+        if name.startswith('_'):
+            raise AttributeError(name)
+
+        if not self._resolve_deferred(name):
+            raise AttributeError(f"'{self.__class__.__name__}' proxy has no field '{name}'")
+
+        return vars(self)[name]
 
     def __getitem__(self, name):
         return getattr(self, name)
@@ -121,15 +134,36 @@ class UEProxyStructure:
 
     def update(self, values: Mapping[str, Mapping[int, UEBase]]):
         overrides = getattr(self, _UEOVERRIDDEN)
+        deferred = getattr(self, _UEDEFERRED)
         target_dict = vars(self)
-        for name, field_values in values.items():
+        is_lazy = isinstance(values, LazyPropDict)
+        for name in values:
+            # Fields not declared by the proxy are only decoded if they are actually read
+            if is_lazy and name not in target_dict:
+                deferred.setdefault(name, []).append(values)
+                overrides.update((name, i) for i in values.indexes(name))
+                continue
+
+            if name in deferred:
+                self._resolve_deferred(name)
             if name not in target_dict:
                 target_dict[name] = dict()
             target_field = target_dict[name]
-            for i, value in field_values.items():
+            for i, value in values[name].items():
                 target_field[i] = value
                 overrides.add((name, i))
 
+    def _resolve_deferred(self, name: str) -> bool:
+        sources = getattr(self, _UEDEFERRED).pop(name, None)
+        if sources is None:
+            return False
+
+        target_field = vars(self).setdefault(name, dict())
+        for source in sources:
+            target_field.update(source[name])
+
+        return True
+
     def set_source(self, source: Any):
         setattr(self, _UEOBJECT, source)
 
@@ -0,0 +1,170 @@
+'''
+Header-only "skeleton" parsing of assets.
+
+Reads just the package header, name table, import table and export table into flat Python tuples, without
+building any of the UEBase object tree or running the link phase. This is enough to resolve the class and
+super of each export, which is all hierarchy discovery needs.
+
+The resolution rules here mirror those of `UAsset`, `AssetLoader._load_asset` and `ue.hierarchy` so that
+discovery produces identical relations whichever parser is used.
+'''
+from typing import Iterator, List, Optional, Tuple
+
+from utils.log import get_logger
+
+from .consts import BLUEPRINT_GENERATED_CLASS_CLS
+from .stream import MemoryStream, make_codec
+
+__all__ = [
+    'AssetSkeleton',
+    'parse_skeleton',
+]
+
+logger = get_logger(__name__)
+
+HEADER_TOP = make_codec('IiiII')
+CUSTOM_VERSION = make_codec('16xI')
+CHUNK_PTRS = make_codec('6I')
+IMPORT_ROW = make_codec('IIIIiII')
+EXPORT_ROW = make_codec('iiiII48x')
+
+MAP_EXPORT_CLASSES = ('/Script/Engine.World', '/Script/Engine.LevelScriptActor')
+
+ImportRow = Tuple[str, str, int, str]  # (package, klass, namespace object index, name)
+ExportRow = Tuple[int, int, int, str]  # (klass object index, super object index, namespace object index, name)
+FileStamp = Tuple[int, int, bytes]  # (size, mtime, content hash) of the data a skeleton was parsed from
+
+
+class AssetSkeleton:
+    '''
+    The name, import and export tables of an asset, decoded into flat tuples.
+
+    Object indexes follow the UE convention: negative for imports, positive for exports and zero for none.
+    Export indexes passed to and returned from methods of this class are zero-based table positions.
+    '''
+    __slots__ = ('assetname', 'file_ext', 'names', 'imports', 'exports', 'default_export', 'default_class', 'source')
+
+    def __init__(self, assetname: str, file_ext: str, names: List[str], imports: List[ImportRow], exports: List[ExportRow]):
+        self.assetname = assetname
+        self.file_ext = file_ext
+        self.names = names
+        self.imports = imports
+        self.exports = exports
+        self.default_export: Optional[int] = None  # export index
+        self.default_class: Optional[int] = None  # object index, as the class may be imported
+        self.source: Optional[FileStamp] = None  # set by the loader, if known
+        self._find_defaults()
+
+    def get_object_name(self, index: int) -> Optional[str]:
+        '''Get the plain name of an import or export from its object index.'''
+        if index < 0:
+            return self.imports[-index - 1][3]
+        if index > 0:
+            return self.exports[index - 1][3]
+        return None
+
+    def get_object_fullname(self, index: int) -> Optional[str]:
+        '''Get the fullname of an import or export from its object index.'''
+        if index < 0:
+            return self.get_import_fullname(-index - 1)
+        if index > 0:
+            return self.get_export_fullname(index - 1)
+        return None
+
+    def get_import_fullname(self, import_index: int) -> str:
+        _, _, namespace, name = self.imports[import_index]
+        if namespace:
+            return f'{self.get_object_name(namespace)}.{name}'
+        return name
+
+    def get_export_fullname(self, export_index: int) -> str:
+        return f'{self.assetname}.{self.exports[export_index][3]}'
+
+    def get_parent_fullname(self, export_index: int) -> Optional[str]:
+        '''Get the fullname of the parent of an export, as `ue.hierarchy` does.'''
+        klass, super_, _, _ = self.exports[export_index]
+        src = klass
+        if self.get_object_fullname(klass) == BLUEPRINT_GENERATED_CLASS_CLS:
+            src = super_
+        return self.get_object_fullname(src)
+
+    def find_exports_to_store(self) -> Iterator[int]:
+        '''Iterate the exports that should be recorded in the hierarchy, as `ue.hierarchy` does.'''
+        # Classes imported from elsewhere are stored by their own asset, leaving the default export here
+        current_cls = self.default_export
+        if self.default_class is not None and self.default_class > 0:
+            current_cls = self.default_class - 1
+        if current_cls is not None:
+            yield current_cls
+
+        if self.file_ext == '.umap':
+            for index, (klass, _, _, _) in enumerate(self.exports):
+                if klass and self.get_object_fullname(klass) in MAP_EXPORT_CLASSES:
+                    yield index
+
+    def _find_defaults(self):
+        '''Select the default export and class, as `AssetLoader._load_asset` does.'''
+        top_exports = [index for index, row in enumerate(self.exports) if not row[2]]
+
+        # Look for a BP-style Default__<assetname> export
+        defaults = [index for index in top_exports if self.exports[index][3].startswith('Default__')]
+        if len(defaults) > 1:
+            logger.warning(f'Found more than one Default__ entry in {self.assetname}!')
+        if defaults:
+            self.default_export = defaults[0]
+            klass = self.exports[defaults[0]][0]
+            self.default_class = klass or None
+            return
+
+        # Fall back to an export named the same as the asset with no namespace
+        leafname = self.assetname.split('/')[-1].lower()
+        matches = [index for index in top_exports if self.exports[index][3].lower() == leafname]
+        if len(matches) > 1:
+            logger.warning(f'Found more than <assetname> export in {self.assetname}!')
+        elif matches:
+            self.default_export = matches[0]
+
+
+def parse_skeleton(mem: memoryview, assetname: str, file_ext: str) -> AssetSkeleton:
+    '''Parse the header, names, imports and exports of an asset held in memory.'''
+    stream = MemoryStream(mem)
+
+    # Header, only as far as the chunk pointers
+    stream.readStruct(HEADER_TOP)
+    for _ in range(stream.readUInt32()):
+        stream.readStruct(CUSTOM_VERSION)
+        _read_string(stream)
+    stream.readUInt32()  # header size
+    _read_string(stream)  # package group
+    stream.readUInt32()  # package flags
+    names_count, names_offset, exports_count, exports_offset, imports_count, imports_offset = stream.readStruct(CHUNK_PTRS)
+
+    stream.offset = names_offset
+    names = [_read_string(stream) for _ in range(names_count)]
+
+    def get_name(index: int, instance: int) -> str:
+        name = names[index & 0xFFFFF]
+        if instance:
+            return f'{name}_{instance - 1}'
+        return name
+
+    stream.offset = imports_offset
+    imports: List[ImportRow] = []
+    for _ in range(imports_count):
+        pkg, pkg_inst, klass, klass_inst, namespace, name, name_inst = stream.readStruct(IMPORT_ROW)
+        imports.append((get_name(pkg, pkg_inst), get_name(klass, klass_inst), namespace, get_name(name, name_inst)))
+
+    stream.offset = exports_offset
+    exports: List[ExportRow] = []
+    for _ in range(exports_count):
+        klass, super_, namespace, name, name_inst = stream.readStruct(EXPORT_ROW)
+        exports.append((klass, super_, namespace, get_name(name, name_inst)))
+
+    return AssetSkeleton(assetname, file_ext, names, imports, exports)
+
+
+def _read_string(stream: MemoryStream) -> str:
+    size = stream.readInt32()
+    if size >= 0:
+        return stream.readTerminatedString(size)
+    return stream.readTerminatedWideString(-size)
@@ -1,6 +1,34 @@
 import struct
-
-__all__ = ('MemoryStream', )
+import sys
+from array import array
+from functools import lru_cache
+from typing import Tuple
+
+__all__ = (
+    'MemoryStream',
+    'CODECS',
+    'make_codec',
+)
+
+# Precompiled little-endian codecs for each primitive type, avoiding format parsing on every read
+CODECS = {fmt: struct.Struct('<' + fmt) for fmt in 'bBhHiIqQfd'}
+
+INT8 = CODECS['b']
+UINT8 = CODECS['B']
+INT16 = CODECS['h']
+UINT16 = CODECS['H']
+INT32 = CODECS['i']
+UINT32 = CODECS['I']
+INT64 = CODECS['q']
+UINT64 = CODECS['Q']
+FLOAT = CODECS['f']
+DOUBLE = CODECS['d']
+
+
+@lru_cache(maxsize=512)
+def make_codec(fmt: str) -> struct.Struct:
+    '''Get a (cached) precompiled little-endian codec for the given struct format, for use with `readStruct`.'''
+    return struct.Struct('<' + fmt)
 
 
 class MemoryStream:
@@ -27,40 +55,73 @@ class MemoryStream:
         return self.size
 
     def readInt8(self) -> int:
-        return self._read('b')
+        return self._read(INT8)
 
     def readUInt8(self) -> int:
-        return self._read('B')
+        return self._read(UINT8)
 
     def readBool8(self) -> bool:
-        return bool(self._read('B'))
+        return bool(self._read(UINT8))
 
     def readBool32(self) -> bool:
-        return bool(self._read('I'))
+        return bool(self._read(UINT32))
 
     def readUInt16(self) -> int:
-        return self._read('H')
+        return self._read(UINT16)
 
     def readInt16(self) -> int:
-        return self._read('h')
+        return self._read(INT16)
 
     def readUInt32(self) -> int:
-        return self._read('I')
+        return self._read(UINT32)
 
     def readInt32(self) -> int:
-        return self._read('i')
+        return self._read(INT32)
 
     def readUInt64(self) -> int:
-        return self._read('Q')
+        return self._read(UINT64)
 
     def readInt64(self) -> int:
-        return self._read('q')
+        return self._read(INT64)
 
     def readFloat(self) -> float:
-        return self._read('f')
+        return self._read(FLOAT)
 
     def readDouble(self) -> float:
-        return self._read('d')
+        return self._read(DOUBLE)
+
+    def readInt32Array(self, count: int) -> Tuple[int, ...]:
+        return self._readArray('i', count)
+
+    def readUInt32Array(self, count: int) -> Tuple[int, ...]:
+        return self._readArray('I', count)
+
+    def readFloatArray(self, count: int) -> Tuple[float, ...]:
+        return self._readArray('f', count)
+
+    def readPackedArray(self, typecode: str, count: int) -> array:
+        '''Read `count` little-endian primitives into a compact `array.array` of the given typecode.'''
+        values = array(typecode)
+        end = self.offset + count * values.itemsize
+        if end > self.end:
+            raise EOFError("End of stream at offset " + str(self.offset))
+
+        values.frombytes(self.mem[self.offset:end])
+        if sys.byteorder != 'little':
+            values.byteswap()
+        self.offset = end
+        return values
+
+    def readStruct(self, codec: struct.Struct) -> tuple:
+        '''Read multiple fields at once using a precompiled codec (see `make_codec`).'''
+        offset = self.offset
+        end = offset + codec.size
+        if end > self.end:
+            raise EOFError("End of stream at offset " + str(offset))
+
+        values = codec.unpack_from(self.mem, offset)
+        self.offset = end
+        return values
 
     def readBytes(self, count: int) -> bytes:
         if self.offset + count > self.end:
@@ -79,16 +140,17 @@ class MemoryStream:
         value = bytes(raw_bytes[:-2]).decode('utf-16-le')
         return value
 
-    def _read(self, fmt, count: int = None):
-        size = struct.calcsize(fmt)
-        if self.offset + size > self.end:
-            raise EOFError("End of stream at offset " + str(self.offset))
+    def _read(self, codec: struct.Struct):
+        offset = self.offset
+        end = offset + codec.size
+        if end > self.end:
+            raise EOFError("End of stream at offset " + str(offset))
 
-        if count is None or count == 1:
-            value, = struct.unpack_from('<' + fmt, self.mem, self.offset)
-            self.offset += size
-            return value
+        value, = codec.unpack_from(self.mem, offset)
+        self.offset = end
+        return value
 
-        values = struct.unpack_from('<' + str(count) + fmt, self.mem, self.offset)
-        self.offset += size
-        return values
+    def _readArray(self, fmt: str, count: int) -> tuple:
+        if count <= 0:
+            return ()
+        return self.readStruct(make_codec(str(count) + fmt))
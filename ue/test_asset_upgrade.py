@@ -0,0 +1,103 @@
+from pathlib import Path
+
+import pytest
+
+from tests.common import MockModResolver
+from tests.synthetic_assets import SyntheticAsset
+
+from .asset import export_filter
+from .context import ue_parsing_context
+from .loader import AssetChanged, AssetLoader, AssetNotFound
+from .utils import sanitise_output
+
+ASSETNAME = '/Game/Test/Blueprint'
+
+
+@pytest.fixture(name='loader')
+def fixture_loader(tmp_path: Path) -> AssetLoader:
+    builder = SyntheticAsset(ASSETNAME)
+    cls = builder.add_blueprint_class('/Script/Engine.Actor')
+    builder.add_default_export(cls, [builder.int_prop('Health', 100), builder.float_prop('Speed', 2.5)])
+    builder.add_export('Component',
+                       klass=builder.import_class('/Script/Engine.SceneComponent'),
+                       props=builder.int_prop('Index', 3))
+    builder.write_to(tmp_path)
+
+    return AssetLoader(modresolver=MockModResolver(), assetpath=tmp_path)
+
+
+def _full_output(loader: AssetLoader):
+    asset = loader.load_asset(ASSETNAME, use_cache=False, cache_result=False)
+    return [sanitise_output(export.properties) for export in asset.exports]
+
+
+def test_upgrade_properties(loader: AssetLoader):
+    with ue_parsing_context(properties=False):
+        asset = loader.load_asset(ASSETNAME)
+    assert asset.is_linked and not asset.has_properties
+    default_export = asset.default_export
+
+    assert loader.load_asset(ASSETNAME) is asset
+    assert asset.has_properties
+    assert asset.default_export is default_export
+    assert [sanitise_output(export.properties) for export in asset.exports] == _full_output(loader)
+
+
+def test_upgrade_link(loader: AssetLoader):
+    with ue_parsing_context(link=False, properties=False):
+        asset = loader.load_asset(ASSETNAME)
+    assert not asset.is_linked
+
+    assert loader.load_asset(ASSETNAME) is asset
+    assert asset.is_linked and asset.has_properties
+    assert str(asset.default_export.name) == 'Default__Blueprint_C'
+    assert asset.default_export.properties.get_property('Health') == 100
+
+
+def test_upgrade_with_export_filter(loader: AssetLoader):
+    with ue_parsing_context(properties=False):
+        asset = loader.load_asset(ASSETNAME)
+
+    assert loader.load_asset_exports(ASSETNAME, export_filter(names=['Component'])) is asset
+    assert asset.deferred_export_count == 2
+    assert asset.default_export.properties.get_property('Speed') == 2.5
+
+
+def test_failed_upgrade_reparses(loader: AssetLoader, tmp_path: Path):
+    with ue_parsing_context(properties=False):
+        loader.load_asset(ASSETNAME)
+
+    (tmp_path / 'Content' / 'Test' / 'Blueprint.uasset').unlink()
+    with pytest.raises(AssetNotFound):
+        loader.load_asset(ASSETNAME)
+    assert loader.cache.get_count() == 0
+
+
+def test_changed_file_reparses(loader: AssetLoader, tmp_path: Path):
+    with ue_parsing_context(properties=False):
+        asset = loader.load_asset(ASSETNAME)
+
+    builder = SyntheticAsset(ASSETNAME)
+    cls = builder.add_blueprint_class('/Script/Engine.Actor')
+    builder.add_default_export(cls, [builder.int_prop('Health', 250)])
+    builder.write_to(tmp_path)
+
+    with pytest.raises(AssetChanged):
+        loader.upgrade_asset(asset)
+
+    upgraded = loader.load_asset(ASSETNAME)
+    assert upgraded is not asset
+    assert upgraded.default_export.properties.get_property('Health') == 250
+
+
+def test_file_found_once_per_read(loader: AssetLoader, monkeypatch):
+    found = []
+    find_raw_asset = loader.find_raw_asset
+    monkeypatch.setattr(loader, 'find_raw_asset', lambda name: found.append(name) or find_raw_asset(name))
+
+    with ue_parsing_context(properties=False):
+        asset = loader.load_asset(ASSETNAME)
+    assert found == [ASSETNAME]
+
+    assert loader.load_asset(ASSETNAME) is asset  # upgraded
+    assert found == [ASSETNAME, ASSETNAME]
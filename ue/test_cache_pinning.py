@@ -0,0 +1,77 @@
+from pathlib import Path
+
+import pytest
+
+import ue.hierarchy
+from tests.common import MockModResolver
+from tests.synthetic_assets import write_blueprint
+
+from .loader import AssetLoader, ContextAwareCacheWrapper, PinningCacheWrapper, UsageBasedCacheManager
+
+PARENT = '/Game/Test/Parent'
+PARENT_CLS = PARENT + '.Parent_C'
+CHILDREN = [f'/Game/Other/Child_{n}' for n in range(5)]
+
+
+@pytest.fixture(name='hierarchy')
+def fixture_hierarchy():
+    tree = ue.hierarchy.tree
+    tree.clear()
+    tree.add(ue.hierarchy.ROOT_NAME, '/Script/Engine.Actor')
+    tree.add('/Script/Engine.Actor', PARENT_CLS)
+    for assetname in CHILDREN:
+        tree.add(PARENT_CLS, assetname + '.' + assetname.split('/')[-1] + '_C')
+    yield tree
+    tree.clear()
+
+
+@pytest.fixture(name='loader')
+def fixture_loader(tmp_path: Path) -> AssetLoader:
+    write_blueprint(tmp_path, PARENT, '/Script/Engine.Actor', prop_count=2)
+    for assetname in CHILDREN:
+        write_blueprint(tmp_path, assetname, PARENT_CLS)
+
+    manager = UsageBasedCacheManager(max_count=3, keep_count=1)
+    return AssetLoader(modresolver=MockModResolver(),
+                       assetpath=tmp_path,
+                       cache_manager=ContextAwareCacheWrapper(PinningCacheWrapper(manager)))
+
+
+def test_find_common_ancestors(hierarchy):  # pylint: disable=unused-argument
+    counts = ue.hierarchy.count_sub_classes()
+    assert counts[PARENT_CLS] == 5
+    assert counts['/Script/Engine.Actor'] == 6
+    assert counts[ue.hierarchy.ROOT_NAME] == 7
+
+    assert ue.hierarchy.find_common_ancestor_assets(5) == {PARENT}
+    assert ue.hierarchy.find_common_ancestor_assets(6) == set()
+
+
+def test_pinned_assets_survive(loader: AssetLoader, hierarchy):  # pylint: disable=unused-argument
+    parent = loader.load_asset(PARENT)
+    loader.cache.set_pinned(ue.hierarchy.find_common_ancestor_assets(3))
+
+    # Purges of the wrapped manager
+    for assetname in CHILDREN:
+        loader.load_asset(assetname)
+    assert loader.load_asset(PARENT) is parent
+
+    # Mod wipes
+    loader.wipe_cache_with_prefix('/Game/')
+    assert loader.load_asset(PARENT) is parent
+    assert loader.cache.get_count() == 1
+
+    # Full wipes
+    loader.wipe_cache()
+    assert loader.load_asset(PARENT) is not parent
+
+
+def test_unpinning(loader: AssetLoader):
+    loader.cache.set_pinned([PARENT])
+    parent = loader.load_asset(PARENT)
+    loader.cache.set_pinned([])
+
+    assert loader.load_asset(PARENT) is parent
+    for assetname in CHILDREN:
+        loader.load_asset(assetname)
+    assert loader.load_asset(PARENT) is not parent
@@ -0,0 +1,98 @@
+import json
+import struct
+import subprocess
+import sys
+from pathlib import Path
+
+from tests.synthetic_assets import build_benchmark_asset, parse_asset_bytes
+
+from .properties import NamePool
+from .stream import MemoryStream
+from .utils import sanitise_output
+
+ROOT = Path(__file__).parent.parent
+
+# Metadata can only be disabled before the ue modules are imported, so this runs in a fresh interpreter
+COMPACT_SCRIPT = '''
+import json
+import ue.context
+ue.context.disable_metadata()
+from tests.synthetic_assets import build_benchmark_asset, parse_asset_bytes
+from ue.utils import sanitise_output
+
+asset = parse_asset_bytes(build_benchmark_asset(export_count=4, prop_count=10))
+props = asset.exports[0].properties
+print(json.dumps(dict(
+    has_dict=[hasattr(node, '__dict__') for node in (props.values[0], props.values[0].header, props.values[1].value,
+                                                      asset.exports[0].klass, asset.exports[0].name, asset.names)],
+    strings=[str(prop) for prop in props.values[:4]] + [str(asset.exports[0].klass)],
+    fields=sorted(props.values[1].value.field_values),
+    view_ok=(lambda node, fields: fields.get('missing') is None and 'missing' not in fields and len(fields) == len(list(fields))
+             and all(fields[name] is getattr(node, name) for name in fields))(props.values[1].value,
+                                                                             props.values[1].value.field_values),
+    output=[sanitise_output(export.properties) for export in asset.exports],
+)))
+'''
+
+
+def _run_compact():
+    result = subprocess.run([sys.executable, '-c', COMPACT_SCRIPT], cwd=ROOT, capture_output=True, check=True, text=True)
+    return json.loads(result.stdout)
+
+
+def test_compact_nodes_match_full_nodes():
+    compact = _run_compact()
+
+    asset = parse_asset_bytes(build_benchmark_asset(export_count=4, prop_count=10))
+    props = asset.exports[0].properties
+    strings = [str(prop) for prop in props.values[:4]] + [str(asset.exports[0].klass)]  # (arrays show object ids)
+    output = [sanitise_output(export.properties) for export in asset.exports]
+
+    assert not any(compact['has_dict'])
+    assert compact['strings'] == strings
+    assert compact['fields'] == sorted(props.values[1].value.field_values)
+    assert compact['view_ok']
+    assert compact['output'] == json.loads(json.dumps(output))
+
+
+NAME_POOL_SCRIPT = '''
+import json
+import ue.context
+ue.context.disable_metadata()
+from tests.synthetic_assets import build_benchmark_asset, parse_asset_bytes
+
+first = parse_asset_bytes(build_benchmark_asset(export_count=2, prop_count=5), '/Game/Test/First')
+second = parse_asset_bytes(build_benchmark_asset(export_count=3, prop_count=5), '/Game/Test/Second')
+shared = set(map(id, first.names.values)) & set(map(id, second.names.values))
+print(json.dumps(dict(
+    names=[str(name) for name in first.names.values],
+    shared=len(shared),
+    none_is_pooled=first.getName(first.none_index) is second.getName(second.none_index),
+    owner_is_asset=any(name.asset is first for name in first.names.values),
+)))
+'''
+
+
+def test_name_pool_shared_between_assets():
+    result = subprocess.run([sys.executable, '-c', NAME_POOL_SCRIPT], cwd=ROOT, capture_output=True, check=True, text=True)
+    pooled = json.loads(result.stdout)
+
+    asset = parse_asset_bytes(build_benchmark_asset(export_count=2, prop_count=5), '/Game/Test/First')
+    assert pooled['names'] == [str(name) for name in asset.names.values]
+    assert pooled['shared'] == len(asset.names.values)
+    assert pooled['none_is_pooled']
+    assert not pooled['owner_is_asset']
+
+
+def test_name_pool():
+    pool = NamePool()
+    stream = MemoryStream(struct.pack('<i6s', 6, b'Thing\0') + struct.pack('<i12s', -6, 'Thing\0'.encode('utf-16-le')))
+    first = pool.read(stream)
+    second = pool.read(stream)
+    assert first is second
+    assert first.value == 'Thing'
+    assert first is pool.get('Thing')
+    assert len(pool) == 1
+
+    pool.clear()
+    assert pool.get('Thing') is not first
@@ -0,0 +1,83 @@
+from pathlib import Path
+
+import pytest
+
+from tests.common import MockModResolver
+from tests.synthetic_assets import SyntheticAsset
+
+from .asset import UAsset, export_filter
+from .context import ue_parsing_context
+from .loader import AssetLoader
+from .utils import sanitise_output
+
+ASSETNAME = '/Game/Test/Level'
+
+
+@pytest.fixture(name='loader')
+def fixture_loader(tmp_path: Path) -> AssetLoader:
+    builder = SyntheticAsset(ASSETNAME, ext='.umap')
+    actor_cls = builder.import_class('/Script/Engine.Actor')
+    mesh_cls = builder.import_class('/Script/Engine.StaticMeshActor')
+    for n in range(3):
+        builder.add_export(f'Actor_{n}', klass=actor_cls, props=builder.int_prop('Value', n))
+        builder.add_export(f'Mesh_{n}', klass=mesh_cls, props=builder.float_prop('Scale', n * 0.5))
+    builder.write_to(tmp_path)
+
+    return AssetLoader(modresolver=MockModResolver(), assetpath=tmp_path)
+
+
+def _loaded_exports(asset: UAsset):
+    return [str(export.name) for export in asset.exports if 'properties' in export.field_values]
+
+
+def _full_output(loader: AssetLoader):
+    asset = loader.load_asset(ASSETNAME, use_cache=False, cache_result=False)
+    return [sanitise_output(export.properties) for export in asset.exports]
+
+
+def test_filter_by_name(loader: AssetLoader):
+    asset = loader.load_asset_exports(ASSETNAME, export_filter(names=['Actor_1', 'Mesh_2']))
+    assert _loaded_exports(asset) == ['Actor_1', 'Mesh_2']
+    assert asset.is_partially_loaded
+    assert asset.deferred_export_count == 4
+
+
+def test_filter_by_class_and_predicate(loader: AssetLoader):
+    flt = export_filter(classes=['/Script/Engine.Actor'], predicate=lambda export: str(export.name) == 'Mesh_0')
+    asset = loader.load_asset_exports(ASSETNAME, flt)
+    assert _loaded_exports(asset) == ['Actor_0', 'Mesh_0', 'Actor_1', 'Actor_2']
+
+
+def test_skipped_exports_load_on_demand(loader: AssetLoader):
+    asset = loader.load_asset_exports(ASSETNAME, export_filter(names=['Actor_0']))
+    mesh = asset.exports[3]
+    assert str(mesh.name) == 'Mesh_1'
+    assert mesh.properties.get_property('Scale') == 0.5
+    assert asset.deferred_export_count == 4
+
+    output = [sanitise_output(export.properties) for export in asset.exports]
+    assert not asset.is_partially_loaded
+    assert output == _full_output(loader)
+
+
+def test_cache_completes_partial_asset(loader: AssetLoader):
+    flt = export_filter(names=['Actor_0'])
+    asset = loader.load_asset_exports(ASSETNAME, flt)
+
+    # The same filter is already satisfied
+    assert loader.load_asset_exports(ASSETNAME, flt) is asset
+    assert asset.deferred_export_count == 5
+
+    # Without properties nothing more is needed
+    with ue_parsing_context(properties=False):
+        assert loader.load_asset(ASSETNAME) is asset
+    assert asset.deferred_export_count == 5
+
+    # A different filter deserialises just the newly accepted exports, in place
+    assert loader.load_asset_exports(ASSETNAME, export_filter(names=['Mesh_0'])) is asset
+    assert _loaded_exports(asset) == ['Actor_0', 'Mesh_0']
+
+    # A full load completes the asset rather than re-parsing it
+    assert loader.load_asset(ASSETNAME) is asset
+    assert not asset.is_partially_loaded
+    assert len(_loaded_exports(asset)) == 6
@@ -0,0 +1,64 @@
+from pathlib import Path
+
+import pytest
+
+from tests.common import MockModResolver
+from tests.synthetic_assets import SyntheticAsset
+
+from .context import ue_parsing_context
+from .gathering import find_default_for_class
+from .loader import AssetLoader, ExportNotFound
+
+ASSETNAME = '/Game/Test/Level'
+
+
+@pytest.fixture(name='loader')
+def fixture_loader(tmp_path: Path) -> AssetLoader:
+    builder = SyntheticAsset(ASSETNAME, ext='.umap')
+    actor = builder.import_class('/Script/Engine.Actor')
+    for n in range(100):
+        builder.add_export(f'Actor_{n}', klass=actor)
+    first = builder.add_blueprint_class('/Script/Engine.Actor', name='First_C')
+    second = builder.add_blueprint_class('/Script/Engine.Actor', name='Second_C')
+    builder.add_export('Default__First_C', klass=first, namespace=1)  # not top-level
+    builder.add_default_export(second)
+    builder.add_default_export(first)
+    builder.add_export('Actor_5', klass=actor)  # duplicate name
+    builder.write_to(tmp_path)
+
+    return AssetLoader(modresolver=MockModResolver(), assetpath=tmp_path)
+
+
+def test_find_export(loader: AssetLoader):
+    asset = loader.load_asset(ASSETNAME)
+    assert asset.find_export('Actor_5') is asset.exports[5]
+    assert asset.find_export('Missing') is None
+
+    assert loader.load_class(ASSETNAME + '.Actor_99') is asset.exports[99]
+    assert loader.load_class(ASSETNAME + '.Missing', fallback=None) is None
+    with pytest.raises(ExportNotFound):
+        loader.load_class(ASSETNAME + '.Missing')
+
+
+def test_class_defaults(loader: AssetLoader):
+    asset = loader.load_asset(ASSETNAME)
+    first, second = asset.find_export('First_C'), asset.find_export('Second_C')
+
+    # The first top-level Default__ export is the asset's default
+    assert asset.default_export is asset.exports[103] and asset.default_class is second
+
+    assert asset.find_class_default(first) is asset.exports[102]
+    assert asset.find_class_default(second) is asset.exports[103]
+    assert asset.find_class_default(asset.exports[0]) is None
+    assert find_default_for_class(ASSETNAME + '.First_C', loader) is asset.exports[102]
+
+
+def test_unlinked_assets_are_not_indexed(loader: AssetLoader):
+    with ue_parsing_context(link=False, properties=False):
+        asset = loader.load_asset(ASSETNAME)
+    asset.get_export_index()
+    assert asset._export_index is None  # pylint: disable=protected-access
+
+    loader.load_asset(ASSETNAME)
+    assert asset.is_linked and asset.find_export('Actor_5') is asset.exports[5]
+    assert asset._export_index is not None  # pylint: disable=protected-access
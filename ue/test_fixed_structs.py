@@ -0,0 +1,104 @@
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+from tests.synthetic_assets import SyntheticAsset, parse_asset_bytes
+
+from .properties import Box, FixedStruct, FloatProperty, LinearColor, Quat, Rotator, Vector
+from .utils import sanitise_output
+
+ROOT = Path(__file__).parent.parent
+
+# Metadata can only be disabled before the ue modules are imported, so this runs in a fresh interpreter
+COMPACT_SCRIPT = '''
+import json
+import ue.context
+ue.context.disable_metadata()
+from ue.test_fixed_structs import build_struct_asset
+from tests.synthetic_assets import parse_asset_bytes
+from ue.utils import sanitise_output
+
+props = parse_asset_bytes(build_struct_asset(), '/Game/Test/Structs').exports[0].properties
+print(json.dumps(dict(
+    output=sanitise_output(props),
+    strings=[str(prop.value.values[0]) for prop in props.values[:5]],
+    point=props.get_property('Points').values[1].y.value,
+)))
+'''
+
+
+def build_struct_asset() -> bytes:
+    builder = SyntheticAsset('/Game/Test/Structs')
+    props = [
+        builder.struct_prop('Location', 'Vector', 'fff', (1, 2, 3.5)),
+        builder.struct_prop('Rotation', 'Rotator', 'fff', (0, 90, -45)),
+        builder.struct_prop('Orientation', 'Quat', 'ffff', (1, 0, 0, 0.5)),
+        builder.struct_prop('Colour', 'LinearColor', 'ffff', (0.1, 0.2, 0.3, 1)),
+        builder.struct_prop('Bounds', 'Box', '6fB', (-1, -2, -3, 4, 5, 6, 1)),
+        builder.array_prop('Points', 'Vector', 'fff', [(1, 2, 3), (4, 5, 6)]),
+    ]
+    builder.add_export('Structs', klass=builder.import_class('/Script/Engine.Actor'), props=b''.join(props))
+    return builder.build()
+
+
+@pytest.fixture(name='props', scope='module')
+def fixture_props():
+    asset = parse_asset_bytes(build_struct_asset(), '/Game/Test/Structs')
+    return asset.exports[0].properties
+
+
+def _struct(props, name):
+    return props.get_property(name).values[0]
+
+
+def test_struct_types(props):
+    assert isinstance(_struct(props, 'Location'), Vector)
+    assert isinstance(_struct(props, 'Rotation'), Rotator)
+    assert isinstance(_struct(props, 'Orientation'), Quat)
+    assert isinstance(_struct(props, 'Colour'), LinearColor)
+    assert isinstance(_struct(props, 'Bounds'), Box)
+
+
+def test_field_access(props):
+    location = _struct(props, 'Location')
+    assert isinstance(location.x, FloatProperty)
+    assert location.x is location.x
+    assert (location.x, location.y, location.z) == (1, 2, 3.5)
+    assert location.as_tuple() == (location.x, location.y, location.z)
+    assert location.z.raw_data == bytes.fromhex('00006040')
+    assert str(location) == 'Vector(1.0, 2.0, 3.5)'
+
+    bounds = _struct(props, 'Bounds')
+    assert isinstance(bounds.min, Vector)
+    assert bounds.max.z == 6
+    assert bounds.is_valid
+
+    with pytest.raises(AttributeError):
+        location.w  # pylint: disable=pointless-statement
+
+
+def test_json_output(props):
+    assert sanitise_output(_struct(props, 'Location')) == dict(x=1, y=2, z=3.5)
+    assert sanitise_output(_struct(props, 'Rotation')) == dict(a=0, b=90, c=-45)
+    assert sanitise_output(_struct(props, 'Orientation')) == dict(w=1, x=0, y=0, z=0.5)
+    assert sanitise_output(_struct(props, 'Colour')) == [0.1, 0.2, 0.3, 1]
+    assert sanitise_output(_struct(props, 'Bounds')) == dict(min=dict(x=-1, y=-2, z=-3), max=dict(x=4, y=5, z=6), is_valid=True)
+
+
+def test_array_of_structs(props):
+    points = props.get_property('Points').values
+    assert all(isinstance(point, FixedStruct) and point.is_inside_array for point in points)
+    assert sanitise_output(points) == [dict(x=1, y=2, z=3), dict(x=4, y=5, z=6)]
+    assert points[1].y == 5
+
+
+def test_compact_structs_match_full_structs(props):
+    result = subprocess.run([sys.executable, '-c', COMPACT_SCRIPT], cwd=ROOT, capture_output=True, check=True, text=True)
+    compact = json.loads(result.stdout)
+
+    assert compact['output'] == json.loads(json.dumps(sanitise_output(props)))
+    assert compact['strings'] == [str(prop.value.values[0]) for prop in props.values[:5]]
+    assert compact['point'] == 5
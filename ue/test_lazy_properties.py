@@ -0,0 +1,108 @@
+import pytest
+
+from tests.synthetic_assets import SyntheticAsset, parse_asset_bytes
+
+from .context import ue_parsing_context
+from .properties import LazyPropDict, LazyPropertyTable, PropertyTable
+from .proxy import UEProxyStructure, uefloats, ueints
+from .utils import sanitise_output
+
+ASSETNAME = '/Game/Test/LazyProps'
+
+
+class LazyTestProxy(UEProxyStructure, uetype='/Game/Test/LazyProps.LazyProps_C'):
+    Health = ueints(10)
+    Speed = uefloats(1.0)
+
+
+@pytest.fixture(name='data', scope='module')
+def fixture_data() -> bytes:
+    builder = SyntheticAsset(ASSETNAME)
+    cls = builder.add_blueprint_class('/Script/Engine.Actor')
+    builder.add_default_export(cls, [
+        builder.int_prop('Health', 100),
+        builder.bool_prop('bFlag', True),
+        builder.struct_prop('Location', 'Vector', 'fff', (1, 2, 3)),
+        builder.array_prop('Floats', 'FloatProperty', 'f', range(4)),
+        builder.str_prop('Label', 'hello'),
+        builder.name_prop('Kind', 'Thing'),
+        builder.float_prop('Speed', 2.5, index=0),
+        builder.float_prop('Speed', 3.5, index=2),
+        builder.int_prop('Extra', 7),
+    ])
+    return builder.build()
+
+
+def _load(data: bytes, lazy: bool) -> PropertyTable:
+    with ue_parsing_context(lazy_properties=lazy):
+        asset = parse_asset_bytes(data, ASSETNAME)
+    return asset.exports[1].properties  # Default__LazyProps_C
+
+
+def _plain(props) -> dict:
+    return {name: sanitise_output(dict(props[name])) for name in props}
+
+
+def test_lazy_table_type(data: bytes):
+    assert type(_load(data, False)) is PropertyTable  # pylint: disable=unidiomatic-typecheck
+    assert isinstance(_load(data, True), LazyPropertyTable)
+
+
+def test_lazy_matches_eager(data: bytes):
+    eager = _load(data, False)
+    lazy = _load(data, True)
+
+    assert isinstance(lazy.as_dict(), LazyPropDict)
+    assert list(lazy.as_dict()) == list(eager.as_dict())
+    assert _plain(lazy.as_dict()) == _plain(eager.as_dict())
+    assert len(lazy) == len(eager) == 9
+    assert [str(prop.header.name) for prop in lazy.values] == [str(prop.header.name) for prop in eager.values]
+    assert sanitise_output(lazy[6].value) == sanitise_output(eager[6].value)
+
+
+def test_lazy_decodes_on_demand(data: bytes):
+    lazy = _load(data, True)
+    assert not lazy._decoded  # pylint: disable=protected-access
+
+    assert lazy.get_property('Speed', 2) == 3.5
+    assert lazy.get_property('Speed', 1, fallback=None) is None
+    assert len(lazy._decoded) == 2  # pylint: disable=protected-access
+
+    props = lazy.as_dict()
+    assert 'Label' in props
+    assert props['Missing'][0] is None
+    assert props.indexes('Speed') == (0, 2)
+    assert len(lazy._decoded) == 2  # pylint: disable=protected-access
+
+    with pytest.raises(KeyError):
+        lazy.get_property('Missing')
+
+
+def test_proxy_defers_undeclared(data: bytes):
+    lazy = _load(data, True)
+    proxy = LazyTestProxy()
+    proxy.update(lazy.as_dict())
+
+    # Declared fields are decoded, others wait until they are read
+    assert proxy.Health[0] == 100
+    assert proxy.Speed[0] == 2.5 and proxy.Speed[2] == 3.5
+    decoded = len(lazy._decoded)  # pylint: disable=protected-access
+    assert decoded == 3
+
+    assert proxy.has_override('Extra')
+    assert not proxy.has_override('Extra', 1)
+    assert proxy.Extra[0] == 7
+    assert 'Label' in proxy
+    assert len(lazy._decoded) == decoded + 2  # pylint: disable=protected-access
+
+    with pytest.raises(AttributeError):
+        proxy.DoesNotExist  # pylint: disable=pointless-statement
+
+
+def test_proxy_deferred_ordering(data: bytes):
+    lazy = _load(data, True)
+    proxy = LazyTestProxy()
+    proxy.update(lazy.as_dict())
+    proxy.update({'Extra': {0: 'override', 1: 'new'}})
+
+    assert proxy.Extra == {0: 'override', 1: 'new'}
@@ -1,10 +1,14 @@
+import gc
+import mmap
 import os.path
+import weakref
 
 from pytest import fixture  # type: ignore
 
 from tests.common import MockModResolver
+from tests.synthetic_assets import SyntheticAsset
 
-from .loader import AssetLoader
+from .loader import AssetLoader, map_file_into_memory
 
 
 @fixture
@@ -51,3 +55,45 @@ def test_convert_asset_name_to_path(loader):
     assert convert('Game/One/Two') == f'{base}{s}Content{s}One{s}Two.uasset'
     assert convert('Game/One/Two/') == f'{base}{s}Content{s}One{s}Two.uasset'
     assert convert('/Game/One/Two/') == f'{base}{s}Content{s}One{s}Two.uasset'
+
+
+def test_map_file_into_memory(tmp_path):
+    filename = tmp_path / 'data.bin'
+    filename.write_bytes(bytes(range(256)))
+
+    mem = map_file_into_memory(filename)
+    assert mem.readonly
+    assert len(mem) == 256
+    assert bytes(mem[16:20]) == bytes((16, 17, 18, 19))
+
+    mapping = weakref.ref(mem.obj)
+    mem.release()
+    gc.collect()
+    assert mapping() is None, "releasing the view should free the mapping"
+
+
+def test_map_empty_file(tmp_path):
+    filename = tmp_path / 'empty.bin'
+    filename.write_bytes(b'')
+    mem = map_file_into_memory(filename)
+    assert len(mem) == 0
+    mem.release()
+
+
+def test_load_asset_with_mmap(tmp_path):
+    builder = SyntheticAsset('/Game/Test/Mapped')
+    cls = builder.add_blueprint_class('/Game/Test/Parent.Parent_C')
+    builder.add_default_export(cls, [builder.int_prop('Health', 100), builder.str_prop('Title', 'Mapped')])
+    builder.write_to(tmp_path)
+
+    loader = AssetLoader(modresolver=MockModResolver(), assetpath=tmp_path, use_mmap=True)
+    mem, ext = loader.load_raw_asset('/Game/Test/Mapped')
+    assert ext == '.uasset'
+    assert isinstance(mem.obj, mmap.mmap)
+    mem.release()
+
+    asset = loader['/Game/Test/Mapped']
+    assert asset.default_export
+    props = asset.default_export.properties
+    assert props.get_property('Health').value == 100
+    assert str(props.get_property('Title')) == 'Mapped'
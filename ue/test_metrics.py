@@ -0,0 +1,65 @@
+import json
+from pathlib import Path
+
+from tests.common import MockModResolver
+from tests.synthetic_assets import write_blueprint
+
+from .context import ue_parsing_context
+from .loader import AssetLoader, ContextAwareCacheWrapper, PinningCacheWrapper, UsageBasedCacheManager
+from .metrics import LoaderMetrics, combine_snapshots
+
+BLUEPRINTS = [f'/Game/Test/BP_{n}' for n in range(4)]
+
+
+def test_top_entries():
+    metrics = LoaderMetrics(top_count=2)
+    metrics.record_load('/Game/A', 100, 0.5, 0.25)
+    metrics.record_load('/Game/B', 300, 0.125, 0.0)
+    metrics.record_load('/Game/C', 200, 1.0, 0.0)
+
+    snapshot = metrics.snapshot()
+    assert snapshot['counters'] == dict(loads=3)
+    assert snapshot['bytes_read'] == 600
+    assert [entry['asset'] for entry in snapshot['slowest']] == ['/Game/C', '/Game/A']
+    assert [entry['asset'] for entry in snapshot['largest']] == ['/Game/B', '/Game/C']
+    json.dumps(snapshot)
+
+
+def test_reset_and_combine():
+    metrics = LoaderMetrics()
+    metrics.record_load('/Game/A', 100, 0.5, 0.25)
+    metrics.evicted('purge', 3)
+    first = metrics.snapshot(reset=True)
+    assert metrics.snapshot()['counters'] == dict()
+
+    metrics.record_load('/Game/B', 50, 0.25, 0.0)
+    metrics.evicted('purge')
+    combined = combine_snapshots([first, metrics.snapshot()])
+    assert combined['counters'] == dict(loads=2)
+    assert combined['evictions'] == dict(purge=4)
+    assert combined['bytes_read'] == 150
+    assert combined['parse_time'] == 0.75
+    assert [entry['asset'] for entry in combined['largest']] == ['/Game/A', '/Game/B']
+
+
+def test_loader_metrics(tmp_path: Path):
+    files = [write_blueprint(tmp_path, assetname, '/Script/Engine.Actor', prop_count=5) for assetname in BLUEPRINTS]
+    manager = UsageBasedCacheManager(max_count=3, keep_count=2)
+    loader = AssetLoader(modresolver=MockModResolver(),
+                         assetpath=tmp_path,
+                         cache_manager=ContextAwareCacheWrapper(PinningCacheWrapper(manager)))
+
+    with ue_parsing_context(properties=False):
+        for assetname in BLUEPRINTS[:2]:
+            loader.load_asset(assetname)
+    loader.load_asset(BLUEPRINTS[0])  # upgraded in place
+    loader.load_asset(BLUEPRINTS[0])  # plain hit
+    for assetname in BLUEPRINTS[2:]:
+        loader.load_asset(assetname)  # each triggers a purge
+    del loader[BLUEPRINTS[3]]
+
+    snapshot = loader.metrics.snapshot()
+    assert snapshot['counters'] == dict(lookups=6, hits=2, misses=4, loads=4, upgrades=1)
+    assert snapshot['evictions'] == dict(purge=2, remove=1)
+    assert snapshot['bytes_read'] == sum(path.stat().st_size for path in files) + files[0].stat().st_size
+    assert len(snapshot['slowest']) == 4
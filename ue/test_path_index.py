@@ -0,0 +1,68 @@
+import pickle
+from pathlib import Path
+
+import pytest
+
+from tests.common import MockModResolver
+from tests.synthetic_assets import write_blueprint
+
+from .loader import AssetLoader, AssetNotFound
+from .pathindex import PathIndex
+
+
+@pytest.fixture(name='assetpath')
+def fixture_assetpath(tmp_path: Path) -> Path:
+    write_blueprint(tmp_path, '/Game/Test/Dinos/BP_Dino', '/Script/Engine.Actor')
+    (tmp_path / 'Content' / 'Test' / 'Maps').mkdir()
+    (tmp_path / 'Content' / 'Test' / 'Maps' / 'Island.umap').write_bytes(b'')
+    return tmp_path
+
+
+def _pickle_round_trip(index: PathIndex) -> PathIndex:
+    return pickle.loads(pickle.dumps(index))
+
+
+def test_build(assetpath: Path):
+    index = _pickle_round_trip(PathIndex.build(assetpath))
+    assert len(index) == 2
+    assert index.find(['content', 'TEST', 'dinos', 'bp_dino.UASSET']) == 'Content/Test/Dinos/BP_Dino.uasset'
+    assert index.find(['Content', 'Test', 'Dinos', 'BP_Dino']) is None
+    assert index.find(['content', 'test', 'dinos'], partial=True) == 'Content/Test/Dinos'
+    assert index.find(['Content', 'Test', 'Dinos', 'BP_Dino.uasset'], partial=True) is None
+    assert index.covers(['CONTENT', 'Test']) and not index.covers(['Engine', 'Test']) and not index.covers([])
+
+
+def test_loader_resolves_without_filesystem(assetpath: Path, monkeypatch):
+    loader = AssetLoader(modresolver=MockModResolver(), assetpath=assetpath, path_index=PathIndex.build(assetpath))
+
+    def fail(*args, **kwargs):
+        raise AssertionError('Filesystem was checked')
+
+    monkeypatch.setattr(Path, 'is_file', fail)
+    monkeypatch.setattr(Path, 'is_dir', fail)
+    monkeypatch.setattr(Path, 'exists', fail)
+
+    assert loader.convert_asset_name_to_path('/game/test/dinos/bp_dino') == assetpath / 'Content/Test/Dinos/BP_Dino.uasset'
+    assert loader.convert_asset_name_to_path('/Game/Test/Dinos', partial=True) == assetpath / 'Content/Test/Dinos'
+    assert loader.convert_asset_name_to_path('/Game/Test/Missing') is None
+    assert loader.load_raw_asset('/Game/Test/Maps/Island')[1] == '.umap'
+    assert loader.load_asset('/Game/Test/Dinos/BP_Dino').default_export is not None
+
+    with pytest.raises(AssetNotFound):
+        loader.load_raw_asset('/Game/Test/Missing')
+
+
+def test_unindexed_paths_are_checked(assetpath: Path):
+    loader = AssetLoader(modresolver=MockModResolver(), assetpath=assetpath, path_index=PathIndex.build(assetpath))
+    (assetpath / 'Engine' / 'Thing.uasset').mkdir(parents=True)
+
+    with pytest.raises(AssetNotFound):
+        loader.load_raw_asset('/Engine/Thing')
+
+
+def test_stale_index(assetpath: Path):
+    loader = AssetLoader(modresolver=MockModResolver(), assetpath=assetpath, path_index=PathIndex.build(assetpath))
+    (assetpath / 'Content' / 'Test' / 'Maps' / 'Island.umap').unlink()
+
+    with pytest.raises(AssetNotFound):
+        loader.load_raw_asset('/Game/Test/Maps/Island')
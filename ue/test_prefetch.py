@@ -0,0 +1,75 @@
+from pathlib import Path
+
+import pytest
+
+from tests.common import MockModResolver
+from tests.synthetic_assets import write_blueprint
+
+from .loader import AssetLoader, AssetNotFound
+from .prefetch import AssetPrefetcher
+from .utils import sanitise_output
+
+BLUEPRINTS = [f'/Game/Test/BP_{n}' for n in range(6)]
+
+
+@pytest.fixture(name='assetpath')
+def fixture_assetpath(tmp_path: Path) -> Path:
+    for assetname in BLUEPRINTS:
+        write_blueprint(tmp_path, assetname, '/Script/Engine.Actor', prop_count=5)
+    return tmp_path
+
+
+def _loader(assetpath: Path, **kwargs) -> AssetLoader:
+    return AssetLoader(modresolver=MockModResolver(), assetpath=assetpath, **kwargs)
+
+
+def _output(loader: AssetLoader, assetname: str):
+    asset = loader.load_asset(assetname, use_cache=False, cache_result=False)
+    return [sanitise_output(export.properties) for export in asset.exports]
+
+
+def test_prefetched_assets_load(assetpath: Path):
+    plain = _loader(assetpath)
+    loader = _loader(assetpath, prefetch_threads=2)
+
+    with loader.prefetching(BLUEPRINTS):
+        assert isinstance(loader.prefetcher, AssetPrefetcher)
+        for assetname in BLUEPRINTS:
+            assert _output(loader, assetname) == _output(plain, assetname)
+
+    assert loader.prefetcher is None
+    assert loader.metrics.snapshot()['counters']['prefetched'] == len(BLUEPRINTS)
+
+
+def test_skipped_assets_are_dropped(assetpath: Path):
+    loader = _loader(assetpath, prefetch_threads=2)
+
+    with loader.prefetching(BLUEPRINTS):
+        prefetcher = loader.prefetcher
+        loader.load_asset(BLUEPRINTS[3])
+        loader.load_asset(BLUEPRINTS[0])  # already passed, so read as normal
+        loader.load_asset(BLUEPRINTS[4])
+
+    assert loader.metrics.snapshot()['counters']['prefetched'] == 2
+    assert prefetcher.buffered_bytes == 0 and not prefetcher.futures  # type: ignore
+
+
+def test_budget_and_errors(assetpath: Path):
+    names = ['/Game/Test/Missing', *BLUEPRINTS]
+
+    # Files that would take up too much of the budget are left alone
+    loader = _loader(assetpath, prefetch_threads=1, prefetch_bytes=100)
+    with loader.prefetching(names):
+        with pytest.raises(AssetNotFound):
+            loader.load_asset(names[0])
+        for assetname in BLUEPRINTS:
+            loader.load_asset(assetname)
+
+    assert 'prefetched' not in loader.metrics.snapshot()['counters']
+
+
+def test_disabled(assetpath: Path):
+    loader = _loader(assetpath)
+    with loader.prefetching(BLUEPRINTS):
+        assert loader.prefetcher is None
+        loader.load_asset(BLUEPRINTS[0])
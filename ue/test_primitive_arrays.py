@@ -0,0 +1,61 @@
+import pytest
+
+from tests.synthetic_assets import SyntheticAsset, parse_asset_bytes
+
+from .properties import BoolProperty, FloatProperty, IntProperty, PrimitiveArray, UInt32Property
+from .utils import sanitise_output
+
+FLOATS = [0.1, -2.5, 1e10, 3.0]
+
+
+@pytest.fixture(name='props', scope='module')
+def fixture_props():
+    builder = SyntheticAsset('/Game/Test/Arrays')
+    props = [
+        builder.array_prop('Floats', 'FloatProperty', 'f', FLOATS),
+        builder.array_prop('Ints', 'IntProperty', 'i', [1, -2, 3]),
+        builder.array_prop('UInts', 'UInt32Property', 'I', [0xFFFFFFFF]),
+        builder.array_prop('Bools', 'BoolProperty', 'B', [1, 0, 1]),
+        builder.array_prop('Empty', 'FloatProperty', 'f', []),
+    ]
+    builder.add_export('Arrays', klass=builder.import_class('/Script/Engine.Actor'), props=b''.join(props))
+    asset = parse_asset_bytes(builder.build(), '/Game/Test/Arrays')
+    return asset.exports[0].properties
+
+
+def test_bulk_decoded(props):
+    values = props.get_property('Floats').values
+    assert isinstance(values, PrimitiveArray)
+    assert values.raw.typecode == 'f'
+    assert len(values) == len(FLOATS)
+    assert props.get_property('Empty').values == []
+
+
+def test_output_without_elements(props):
+    array = props.get_property('Floats')
+    assert sanitise_output(array) == [0.1, -2.5, 1e10, 3.0]
+    assert sanitise_output(props.get_property('Ints')) == [1, -2, 3]
+    assert sanitise_output(props.get_property('UInts')) == [0xFFFFFFFF]
+    assert sanitise_output(props.get_property('Bools')) == [True, False, True]
+    assert not array.values._elements  # pylint: disable=protected-access
+
+
+def test_elements_created_on_demand(props):
+    values = props.get_property('Ints').values
+    first = values[0]
+    assert isinstance(first, IntProperty)
+    assert first.value == 1 and first.is_inside_array
+    assert values[0] is first
+    assert values[-1].value == 3
+    assert [int(value) for value in values] == [1, -2, 3]
+    assert [value.value for value in values[1:]] == [-2, 3]
+    with pytest.raises(IndexError):
+        values[3]  # pylint: disable=pointless-statement
+
+    floats = props.get_property('Floats').values
+    assert isinstance(floats[0], FloatProperty)
+    assert floats[0].textual == '0.1 (inexact)'
+    assert floats[0].raw_data == bytes.fromhex('cdcccc3d')
+    assert isinstance(props.get_property('UInts').values[0], UInt32Property)
+    assert isinstance(props.get_property('Bools').values[1], BoolProperty)
+    assert not props.get_property('Bools').values[1]
@@ -0,0 +1,24 @@
+from tests.synthetic_assets import SyntheticAsset, parse_asset_bytes
+
+from .properties import FloatProperty, IntProperty
+
+
+def test_header_decode_caches():
+    builder = SyntheticAsset('/Game/Test/Headers')
+    cls = builder.import_class('/Script/Engine.Actor')
+    for n in range(3):
+        props = [
+            builder.int_prop('My Value', n),
+            builder.float_prop(' Padded ', n * 0.5),
+            builder.int_prop('My Value', n, index=1),
+        ]
+        builder.add_export(f'Actor_{n}', klass=cls, props=b''.join(props))
+    asset = parse_asset_bytes(builder.build(), '/Game/Test/Headers')
+
+    props = [export.properties for export in asset.exports]
+    assert [list(table.as_dict()) for table in props] == [['My_Value', 'Padded']] * 3
+    assert all(table.values[0].header.name is props[0].values[0].header.name for table in props)
+
+    # One entry per distinct name and type, however many properties use them
+    assert sorted(asset.clean_property_names.values()) == ['My_Value', 'Padded']
+    assert sorted(asset.property_types.values(), key=lambda cls: cls.__name__) == [FloatProperty, IntProperty]
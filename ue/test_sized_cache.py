@@ -0,0 +1,95 @@
+from pathlib import Path
+
+import pytest
+
+from tests.common import MockModResolver
+from tests.synthetic_assets import SyntheticAsset, write_blueprint
+
+from .context import ue_parsing_context
+from .loader import AssetLoader, ContextAwareCacheWrapper, SizedCacheManager, estimate_asset_size
+
+BLUEPRINTS = [f'/Game/Test/BP_{n}' for n in range(4)]
+LEVEL = '/Game/Test/Level'
+
+
+@pytest.fixture(name='assetpath')
+def fixture_assetpath(tmp_path: Path) -> Path:
+    for assetname in BLUEPRINTS:
+        write_blueprint(tmp_path, assetname, '/Script/Engine.Actor', prop_count=10)
+
+    builder = SyntheticAsset(LEVEL, ext='.umap')
+    cls = builder.import_class('/Script/Engine.Actor')
+    for n in range(50):
+        builder.add_export(f'Actor_{n}', klass=cls, props=b''.join(builder.int_prop(f'Value{i}', i) for i in range(10)))
+    builder.write_to(tmp_path)
+
+    return tmp_path
+
+
+def _loader(assetpath: Path, max_bytes: int) -> AssetLoader:
+    manager = SizedCacheManager(max_bytes=max_bytes)
+    return AssetLoader(modresolver=MockModResolver(), assetpath=assetpath, cache_manager=ContextAwareCacheWrapper(manager))
+
+
+def _blueprint_size(assetpath: Path) -> int:
+    loader = _loader(assetpath, 0)
+    return estimate_asset_size(loader.load_asset(BLUEPRINTS[0], use_cache=False, cache_result=False))
+
+
+def test_estimates(assetpath: Path):
+    loader = _loader(assetpath, 0)
+    with ue_parsing_context(properties=False):
+        bare = estimate_asset_size(loader.load_asset(BLUEPRINTS[0], use_cache=False, cache_result=False))
+    full = estimate_asset_size(loader.load_asset(BLUEPRINTS[0], use_cache=False, cache_result=False))
+    level = estimate_asset_size(loader.load_asset(LEVEL, use_cache=False, cache_result=False))
+
+    assert 0 < bare < full < level
+    assert level > full * 10
+
+
+def test_evicts_least_recently_used(assetpath: Path):
+    size = _blueprint_size(assetpath)
+    loader = _loader(assetpath, size * 3)
+    manager = loader.cache.manager  # type: ignore
+
+    for assetname in BLUEPRINTS[:3]:
+        loader.load_asset(assetname)
+    assert manager.total_bytes == size * 3
+
+    loader.load_asset(BLUEPRINTS[0])  # mark as recently used
+    loader.load_asset(BLUEPRINTS[3])
+    assert list(manager.cache) == [BLUEPRINTS[2], BLUEPRINTS[0], BLUEPRINTS[3]]
+    assert manager.total_bytes == size * 3
+
+    # A single large asset pushes everything else out, but is kept itself
+    loader.load_asset(LEVEL)
+    assert list(manager.cache) == [LEVEL]
+    assert manager.total_bytes == manager.sizes[LEVEL] > manager.max_bytes
+
+
+def test_remove_and_wipe(assetpath: Path):
+    size = _blueprint_size(assetpath)
+    loader = _loader(assetpath, size * 10)
+    manager = loader.cache.manager  # type: ignore
+    for assetname in BLUEPRINTS:
+        loader.load_asset(assetname)
+
+    del loader[BLUEPRINTS[0]]
+    assert manager.total_bytes == size * 3
+
+    loader.wipe_cache_with_prefix('/Game/Test/BP_1')
+    assert manager.get_count() == 2 and manager.total_bytes == size * 2
+
+    loader.wipe_cache()
+    assert manager.get_count() == 0 and manager.total_bytes == 0
+
+
+def test_upgrade_is_accounted(assetpath: Path):
+    loader = _loader(assetpath, 1024 * 1024 * 1024)
+    manager = loader.cache.manager  # type: ignore
+    with ue_parsing_context(properties=False):
+        loader.load_asset(BLUEPRINTS[0])
+    bare = manager.total_bytes
+
+    loader.load_asset(BLUEPRINTS[0])
+    assert manager.total_bytes == manager.sizes[BLUEPRINTS[0]] > bare
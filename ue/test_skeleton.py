@@ -0,0 +1,92 @@
+from pathlib import Path
+
+import pytest
+
+import ue.hierarchy
+from tests.common import MockModResolver
+from tests.synthetic_assets import SyntheticAsset
+
+from .context import ue_parsing_context
+from .loader import AssetLoader, AssetParseError
+
+PARENT_CLS = '/Game/Test/Parent.Parent_C'
+
+
+@pytest.fixture(name='loader')
+def fixture_loader(tmp_path: Path) -> AssetLoader:
+    # A blueprint with a Default__ export
+    builder = SyntheticAsset('/Game/Test/Blueprint')
+    cls = builder.add_blueprint_class(PARENT_CLS)
+    builder.add_default_export(cls, [builder.int_prop('Health', 100)])
+    builder.write_to(tmp_path)
+
+    # A native-style asset whose main export is named after the asset
+    builder = SyntheticAsset('/Game/Test/Native')
+    builder.add_export('Native', klass=builder.import_class('/Script/ShooterGame.PrimalItem'))
+    builder.write_to(tmp_path)
+
+    # A map with a world and level script actor amongst other exports
+    builder = SyntheticAsset('/Game/Test/Level', ext='.umap')
+    builder.add_export('Level', klass=builder.import_class('/Script/Engine.World'))
+    builder.add_export('Level_C', klass=builder.import_class('/Script/Engine.LevelScriptActor'))
+    for n in range(3):
+        builder.add_export(f'Actor_{n}', klass=builder.import_class('/Script/Engine.Actor'))
+    builder.write_to(tmp_path)
+
+    # A Default__ export whose class is imported from another asset
+    builder = SyntheticAsset('/Game/Test/Imported')
+    builder.add_export('Default__Imported_C', klass=builder.import_class(PARENT_CLS), props=builder.int_prop('Health', 1))
+    builder.write_to(tmp_path)
+
+    # Not an asset at all
+    broken = tmp_path / 'Content' / 'Test' / 'Broken.uasset'
+    broken.write_bytes(b'\x00' * 10)
+
+    return AssetLoader(modresolver=MockModResolver(), assetpath=tmp_path)
+
+
+def _relations_from_full_parse(loader: AssetLoader, assetname: str):
+    with ue_parsing_context(properties=False):
+        asset = loader.load_asset(assetname, use_cache=False, cache_result=False)
+    assert asset.file_ext
+    exports = ue.hierarchy._find_exports_to_store(asset, asset.file_ext)  # pylint: disable=protected-access
+    return [(export.fullname, ue.hierarchy._get_parent_cls(export)) for export in exports]  # pylint: disable=protected-access
+
+
+def _relations_from_skeleton(loader: AssetLoader, assetname: str):
+    skeleton = loader.load_skeleton(assetname)
+    return [(skeleton.get_export_fullname(index), skeleton.get_parent_fullname(index))
+            for index in skeleton.find_exports_to_store()]
+
+
+@pytest.mark.parametrize('assetname', ['/Game/Test/Blueprint', '/Game/Test/Native', '/Game/Test/Level'])
+def test_skeleton_matches_full_parse(loader: AssetLoader, assetname: str):
+    expected = _relations_from_full_parse(loader, assetname)
+    assert expected
+    assert _relations_from_skeleton(loader, assetname) == expected
+
+
+def test_skeleton_blueprint(loader: AssetLoader):
+    skeleton = loader.load_skeleton('/Game/Test/Blueprint')
+    assert skeleton.file_ext == '.uasset'
+    assert skeleton.default_export is not None
+    assert skeleton.default_class is not None
+    assert skeleton.get_export_fullname(skeleton.default_export) == '/Game/Test/Blueprint.Default__Blueprint_C'
+    assert skeleton.get_object_fullname(skeleton.default_class) == '/Game/Test/Blueprint.Blueprint_C'
+    assert skeleton.get_parent_fullname(skeleton.default_class - 1) == PARENT_CLS
+
+
+def test_skeleton_imported_default_class(loader: AssetLoader):
+    with ue_parsing_context(properties=False):
+        asset = loader.load_asset('/Game/Test/Imported')
+    skeleton = loader.load_skeleton('/Game/Test/Imported')
+
+    assert skeleton.default_class is not None and skeleton.default_class < 0
+    assert skeleton.get_object_fullname(skeleton.default_class) == asset.default_class.fullname == PARENT_CLS
+    assert skeleton.get_export_fullname(skeleton.default_export) == asset.default_export.fullname
+    assert list(skeleton.find_exports_to_store()) == [skeleton.default_export]
+
+
+def test_skeleton_parse_error(loader: AssetLoader):
+    with pytest.raises(AssetParseError):
+        loader.load_skeleton('/Game/Test/Broken')
@@ -0,0 +1,157 @@
+import os
+from pathlib import Path
+
+import pytest
+
+from tests.common import MockModResolver
+from tests.synthetic_assets import SyntheticAsset
+
+from .context import ue_parsing_context
+from .diskcache import SkeletonDiskCache, decode_property_index, decode_skeleton, encode_property_index, encode_skeleton
+from .loader import AssetLoader
+
+ASSETS = ['/Game/Test/BP_A', '/Game/Test/BP_B', '/Game/Test/Level']
+
+
+def _skeleton_state(skeleton):
+    return (skeleton.assetname, skeleton.file_ext, skeleton.names, skeleton.imports, skeleton.exports, skeleton.default_export,
+            skeleton.default_class)
+
+
+@pytest.fixture(name='assetpath')
+def fixture_assetpath(tmp_path: Path) -> Path:
+    for assetname in ASSETS[:2]:
+        builder = SyntheticAsset(assetname)
+        cls = builder.add_blueprint_class('/Game/Test/Parent.Parent_C')
+        builder.add_default_export(cls, [builder.int_prop('Health', 100)])
+        builder.write_to(tmp_path)
+
+    builder = SyntheticAsset(ASSETS[2], ext='.umap')
+    builder.add_export('Level', klass=builder.import_class('/Script/Engine.World'))
+    builder.add_export('Level_C', klass=builder.import_class('/Script/Engine.LevelScriptActor'))
+    builder.write_to(tmp_path)
+
+    return tmp_path
+
+
+def _loader(assetpath: Path, cache: SkeletonDiskCache) -> AssetLoader:
+    return AssetLoader(modresolver=MockModResolver(), assetpath=assetpath, skeleton_cache=cache)
+
+
+def test_encoding(assetpath: Path):
+    loader = AssetLoader(modresolver=MockModResolver(), assetpath=assetpath)
+    for assetname in ASSETS:
+        skeleton = loader.load_skeleton(assetname)
+        data = encode_skeleton(skeleton)
+        assert data is not None
+        assert _skeleton_state(decode_skeleton(data, assetname)) == _skeleton_state(skeleton)
+
+
+def test_persisted_between_runs(assetpath: Path, tmp_path: Path):
+    expected = {name: _skeleton_state(_loader(assetpath, None).load_skeleton(name)) for name in ASSETS}
+    cachefile = tmp_path / 'cache' / 'skeletons.sqlite'
+
+    loader = _loader(assetpath, SkeletonDiskCache(cachefile))
+    for assetname in ASSETS:
+        loader.load_skeleton(assetname)
+    loader.skeleton_cache.close()  # type: ignore
+    assert loader.metrics.snapshot()['counters'] == dict(skeleton_misses=3)
+
+    # Unchanged, touched with identical content, and changed
+    bp_a = assetpath / 'Content' / 'Test' / 'BP_A.uasset'
+    bp_b = assetpath / 'Content' / 'Test' / 'BP_B.uasset'
+    os.utime(bp_a, ns=(1, 1))
+    bp_b.write_bytes(bp_b.read_bytes() + b'\0')
+
+    loader = _loader(assetpath, SkeletonDiskCache(cachefile))
+    skeletons = {name: loader.load_skeleton(name) for name in ASSETS}
+    assert loader.metrics.snapshot()['counters'] == dict(skeleton_hits=2, skeleton_misses=1)
+    assert {name: _skeleton_state(skeleton) for name, skeleton in skeletons.items()} == expected
+
+
+def test_size_limit(assetpath: Path, tmp_path: Path):
+    cachefile = tmp_path / 'skeletons.sqlite'
+    cache = SkeletonDiskCache(cachefile)
+    loader = _loader(assetpath, cache)
+    for assetname in ASSETS:
+        loader.load_skeleton(assetname)
+    cache.close()
+
+    # Only the most recently used entry fits after a new run
+    cache = SkeletonDiskCache(cachefile, max_bytes=1)
+    loader = _loader(assetpath, cache)
+    loader.load_skeleton(ASSETS[1])
+    cache.max_bytes = len(cache.db.execute('SELECT data FROM skeletons WHERE name = ?', (ASSETS[1], )).fetchone()[0])
+    cache.flush()
+    assert cache.db.execute('SELECT name FROM skeletons').fetchall() == [(ASSETS[1], )]
+    cache.close()
+
+
+def test_created_on_first_store(assetpath: Path, tmp_path: Path):
+    cachefile = tmp_path / 'cache' / 'skeletons.sqlite'
+    cache = SkeletonDiskCache(cachefile)
+    assert cache.lookup(ASSETS[0], assetpath / 'Content' / 'Test' / 'BP_A.uasset') is None
+    assert cache.get_count() == 0
+    cache.flush()
+    assert not cachefile.exists()
+
+    _loader(assetpath, cache).load_skeleton(ASSETS[0])
+    cache.close()
+    assert cachefile.is_file()
+
+
+def _load_lazily(assetpath: Path, cache: SkeletonDiskCache):
+    loader = _loader(assetpath, cache)
+    with ue_parsing_context(lazy_properties=True):
+        assets = {name: loader.load_asset(name) for name in ASSETS}
+    cache.close()
+    counters = loader.metrics.snapshot()['counters']
+    return assets, {key: value for key, value in counters.items() if key.startswith('property_index')}
+
+
+def test_property_index_persisted_between_runs(assetpath: Path, tmp_path: Path):
+    cachefile = tmp_path / 'cache' / 'skeletons.sqlite'
+    assets, counters = _load_lazily(assetpath, SkeletonDiskCache(cachefile))
+    assert counters == dict(property_index_misses=3)
+    expected = {name: asset.get_property_index() for name, asset in assets.items()}
+    for index in expected.values():
+        assert decode_property_index(encode_property_index(index)) == index  # type: ignore
+
+    # Unchanged, touched with identical content, and changed
+    bp_a = assetpath / 'Content' / 'Test' / 'BP_A.uasset'
+    bp_b = assetpath / 'Content' / 'Test' / 'BP_B.uasset'
+    os.utime(bp_a, ns=(1, 1))
+    bp_b.write_bytes(bp_b.read_bytes() + b'\0')
+
+    assets, counters = _load_lazily(assetpath, SkeletonDiskCache(cachefile))
+    assert counters == dict(property_index_hits=2, property_index_misses=1)
+    assert {name: asset.get_property_index() for name, asset in assets.items()} == expected
+    for assetname in ASSETS[:2]:
+        assert assets[assetname].default_export.properties.get_property('Health') == 100  # type: ignore
+
+
+def test_property_index_needs_lazy_properties(assetpath: Path, tmp_path: Path):
+    cachefile = tmp_path / 'skeletons.sqlite'
+    cache = SkeletonDiskCache(cachefile)
+    loader = _loader(assetpath, cache)
+    loader.load_asset(ASSETS[0])
+    cache.close()
+    assert 'property_index_misses' not in loader.metrics.snapshot()['counters']
+    assert not cachefile.exists()
+
+
+def test_readonly_ignores_database_created_later(assetpath: Path, tmp_path: Path):
+    cachefile = tmp_path / 'skeletons.sqlite'
+    bp_a = assetpath / 'Content' / 'Test' / 'BP_A.uasset'
+    worker = SkeletonDiskCache(cachefile, readonly=True)
+
+    # Created by another process while in use, even when its tables are not there yet
+    cachefile.write_bytes(b'')
+    assert worker.lookup(ASSETS[0], bp_a) is None
+    assert SkeletonDiskCache(cachefile, readonly=True).lookup(ASSETS[0], bp_a) is None
+
+    cache = SkeletonDiskCache(cachefile)
+    _loader(assetpath, cache).load_skeleton(ASSETS[0])
+    cache.close()
+    assert worker.lookup(ASSETS[0], bp_a) is None
+    assert SkeletonDiskCache(cachefile, readonly=True).lookup(ASSETS[0], bp_a) is not None
@@ -0,0 +1,64 @@
+import struct
+
+import pytest
+
+from .stream import MemoryStream, make_codec
+
+
+def test_primitive_reads():
+    data = struct.pack('<bBhHiIqQfd', -1, 2, -3, 4, -5, 6, -7, 8, 1.5, 2.25)
+    stream = MemoryStream(data)
+    assert stream.readInt8() == -1
+    assert stream.readUInt8() == 2
+    assert stream.readInt16() == -3
+    assert stream.readUInt16() == 4
+    assert stream.readInt32() == -5
+    assert stream.readUInt32() == 6
+    assert stream.readInt64() == -7
+    assert stream.readUInt64() == 8
+    assert stream.readFloat() == 1.5
+    assert stream.readDouble() == 2.25
+    assert stream.offset == len(data)
+
+
+def test_bulk_reads():
+    data = struct.pack('<3i2I4f', -1, 0, 1, 7, 8, 0.5, 1.5, 2.5, 3.5)
+    stream = MemoryStream(data)
+    assert stream.readInt32Array(3) == (-1, 0, 1)
+    assert stream.readUInt32Array(2) == (7, 8)
+    assert stream.readFloatArray(4) == (0.5, 1.5, 2.5, 3.5)
+    assert stream.readInt32Array(0) == ()
+    assert stream.offset == len(data)
+
+
+def test_read_packed_array():
+    stream = MemoryStream(struct.pack('<3fB', 0.5, -1.0, 2.25, 7))
+    values = stream.readPackedArray('f', 3)
+    assert values.typecode == 'f'
+    assert values.tolist() == [0.5, -1.0, 2.25]
+    assert stream.offset == 12
+    with pytest.raises(EOFError):
+        stream.readPackedArray('B', 2)
+    assert stream.readPackedArray('B', 1).tolist() == [7]
+
+
+def test_read_struct():
+    codec = make_codec('IiH')
+    assert make_codec('IiH') is codec
+    stream = MemoryStream(struct.pack('<IiH', 1, -2, 3) + b'\xff')
+    assert stream.readStruct(codec) == (1, -2, 3)
+    assert stream.offset == codec.size
+
+
+def test_reads_respect_stream_end():
+    data = struct.pack('<4I', 1, 2, 3, 4)
+    stream = MemoryStream(data, 4, 8)
+    assert stream.readUInt32() == 2
+    with pytest.raises(EOFError):
+        stream.readUInt32Array(2)
+    assert stream.offset == 8, "failed reads must not move the stream"
+    with pytest.raises(EOFError):
+        stream.readStruct(make_codec('Q4x'))
+    assert stream.readUInt32() == 3
+    with pytest.raises(EOFError):
+        stream.readUInt32()
@@ -90,8 +90,9 @@ def sanitise_output(node):
             return sanitise_output(sub_node)
 
     if isinstance(node, UEBase):
-        fields = getattr(node, 'field_order', None) or node.field_values.keys()
-        return {name: sanitise_output(node.field_values[name]) for name in fields}
+        values = node.field_values
+        fields = getattr(node, 'field_order', None) or values.keys()
+        return {name: sanitise_output(values[name]) for name in fields}
 
     if isinstance(node, (list, tuple)):
         return [sanitise_output(value) for value in node]
@@ -85,6 +85,11 @@ def cache_data(key: TKey,
     return data
 
 
+def hash_key(key: object) -> str:
+    '''Get the hash of a JSON-serialisable key, as `cache_data` uses to identify versions of cached data.'''
+    return _hash_from_object(key)
+
+
 def _hash_from_object(key: object) -> str:
     json_string = json.dumps(key, indent=None, separators=(',', ':'))
     as_bytes = json_string.encode('utf8')
@@ -151,3 +151,35 @@ def test_insert_segment():
     # Ensure parent chain extends into segment completely
     assert t['naa'].parent is t['na']
     assert t['segment'].parent is t['b']
+
+
+def test_frozen_index():
+    t = IndexedTree[MyDataType](MyDataType('root'), attrgetter('name'))
+    t.add('root', MyDataType('a'))
+    t.add('a', MyDataType('a1'))
+    t.add('a1', MyDataType('a1x'))
+    t.add('root', MyDataType('b'))
+    t.add('b', MyDataType('b1'))
+    t.add('b', MyDataType('b2'))
+
+    index = t.freeze()
+    assert index.keys == ['root', 'a', 'a1', 'a1x', 'b', 'b1', 'b2']
+    assert index.get_descendants('a') == ['a1', 'a1x']
+    assert index.get_descendants('b2') == []
+    assert index.get_descendants('root') == index.keys[1:]
+    assert index.get_ancestors('a1x') == ('a1', 'a', 'root')
+    assert index.get_ancestors('root') == ()
+    assert index.count_descendants('root') == 6 and index.count_descendants('b') == 2
+
+    assert index.is_descendant('a1x', 'a')
+    assert not index.is_descendant('a', 'a1x')
+    assert not index.is_descendant('b1', 'a')
+    assert not index.is_descendant('b1', 'b1')
+    assert index.is_descendant('b1', 'b1', include_self=True)
+    assert not index.is_descendant('b1', 'missing')
+
+    # Any change to the tree leaves the index stale
+    assert index.is_current()
+    t.add('b1', MyDataType('b1x'))
+    assert not index.is_current()
+    assert t.freeze().get_descendants('b') == ['b1', 'b1x', 'b2']
@@ -0,0 +1,77 @@
+from pathlib import Path
+
+import pytest
+
+from .tree import IndexedTree
+from .treefile import load_tree_columns, save_tree_columns
+
+
+@pytest.fixture(name='tree')
+def fixture_tree() -> IndexedTree[str]:
+    t = IndexedTree[str]('root')
+    t.add('root', 'a')
+    t.add('a', 'a1')
+    t.add('a1', 'a1x')
+    t.add('root', 'b')
+    t.add('b', 'b1')
+    t.add('b', 'b2')
+    t.add('root', 'ü')
+    return t
+
+
+def _shape(tree: IndexedTree[str]):
+    return [(node.data, node.parent_data) for node in tree.root.walk_iterator(skip_self=False)]
+
+
+def test_round_trip(tree: IndexedTree[str], tmp_path: Path):
+    original = tree.freeze()
+    save_tree_columns(original, tmp_path / 'tree.bin', 'v1')
+
+    columns = load_tree_columns(tmp_path / 'tree.bin', 'v1')
+    assert columns
+    loaded = IndexedTree[str]('root')
+    index = loaded.load_columns(columns)
+
+    assert list(index.keys) == list(original.keys)
+    for key in original.keys:
+        assert index.get_descendants(key) == original.get_descendants(key)
+        assert index.get_ancestors(key) == original.get_ancestors(key)
+    assert index.count_all_descendants() == original.count_all_descendants()
+    assert index.is_descendant('a1x', 'a') and not index.is_descendant('b1', 'a')
+    assert 'missing' not in index and not index.is_descendant('a', 'missing')
+
+    assert _shape(loaded) == _shape(tree)
+    assert sorted(loaded.keys()) == sorted(tree.keys())
+
+
+def test_nodes_are_loaded_lazily(tree: IndexedTree[str], tmp_path: Path):
+    save_tree_columns(tree.freeze(), tmp_path / 'tree.bin')
+    loaded = IndexedTree[str]('root')
+    index = loaded.load_columns(load_tree_columns(tmp_path / 'tree.bin'))  # type: ignore
+
+    assert list(loaded._lookup) == ['root']  # pylint: disable=protected-access
+    node = loaded['a1']
+    assert node.parent is loaded['a'] and node.parent.parent is loaded.root
+    assert [n.data for n in node.nodes] == ['a1x']
+    assert 'b1' in loaded and 'missing' not in loaded
+    with pytest.raises(KeyError):
+        loaded['missing']  # pylint: disable=pointless-statement
+
+    # Loaded nodes can still be added to, which leaves the index stale
+    loaded.add('b1', 'b1x')
+    assert [n.data for n in loaded['b1'].nodes] == ['b1x']
+    assert loaded['b1x'].parent is loaded['b1']
+    assert 'b1x' in loaded.keys()
+    assert not index.is_current()
+    assert loaded.freeze().get_descendants('b') == ['b1', 'b1x', 'b2']
+
+
+def test_mismatched_or_bad_file(tree: IndexedTree[str], tmp_path: Path):
+    filename = tmp_path / 'tree.bin'
+    assert load_tree_columns(filename) is None
+
+    save_tree_columns(tree.freeze(), filename, 'v1')
+    assert load_tree_columns(filename, 'v2') is None
+
+    filename.write_bytes(b'junk')
+    assert load_tree_columns(filename, 'v1') is None
@@ -4,7 +4,7 @@ Reusable tree structure, including a variant with a fast indexed lookup.
 from __future__ import annotations
 
 from collections import deque
-from typing import Callable, Deque, Dict, Generic, Iterable, List, Optional, TypeVar, Union
+from typing import Callable, Deque, Dict, Generic, Iterable, List, Mapping, NamedTuple, Optional, Sequence, Tuple, TypeVar, Union
 
 try:
     from IPython.lib.pretty import PrettyPrinter  # type: ignore
@@ -15,6 +15,8 @@ except ImportError:
 __all__ = [
     'Node',
     'IndexedTree',
+    'TreeIndex',
+    'TreeColumns',
 ]
 
 T = TypeVar('T')
@@ -104,25 +106,50 @@ class Node(Generic[T]):
 
 
 class IndexedTree(Generic[T]):
+    '''
+    A tree with every node indexed by key.
+
+    The tree's contents can also come from `TreeColumns` (see `load_columns`), in which case nodes are only created as
+    they are used.
+    '''
     _key_fn: Optional[Callable[[T], str]]
     _lookup: Dict[str, Node[T]]
+    _columns: Optional[TreeColumns]
     root: Node[T]
 
     def __init__(self, root: T, key_fn: Optional[Callable[[T], str]] = None):
         self._key_fn = key_fn
         self._root_data = root
+        self.version = 0  # changes whenever nodes are added or removed
         self.clear()
 
     def clear(self):
+        self.version += 1
         self._lookup = dict()
+        self._columns = None
         self.root = Node[T](self._root_data)
         self._register(self.root)
 
+    def load_columns(self, columns: TreeColumns) -> TreeIndex[T]:
+        '''
+        Replace the contents of the tree with the given columns, which must start with this tree's root.
+        Only supported for trees whose data is their key.
+        Returns an index of the loaded tree.
+        '''
+        assert self._key_fn is None, "Only trees keyed by their data can be loaded from columns"
+        assert columns.keys[0] == self._root_data, "Columns do not share the tree's root"
+
+        self.clear()
+        self._lookup.clear()
+        self._columns = columns
+        self.root = self._materialise(0)
+        return TreeIndex[T](self, columns)
+
     def add(self, parent: Union[str, Node[T]], data: Union[T, Node[T]]) -> Node[T]:
         parent_node = self._handle_parent_arg(parent)
 
         if not isinstance(data, Node):
-            data = Node[T](data)
+            data = Node(data)  # not Node[T](), which is much slower to construct
 
         self._register(data)
         parent_node.add(data)
@@ -135,19 +162,43 @@ class IndexedTree(Generic[T]):
         parent_node.add(partial_tree)
 
     def keys(self) -> Iterable[str]:
-        yield from self._lookup.keys()
+        if not self._columns:
+            yield from self._lookup.keys()
+            return
+
+        # Nodes from the columns, followed by any added since
+        yield from self._columns.keys
+        positions = self._columns.positions
+        yield from (key for key in self._lookup.keys() if key not in positions)
+
+    def key_of(self, data: T) -> str:
+        return self._key_fn(data) if self._key_fn else data  # type: ignore
+
+    def freeze(self) -> TreeIndex[T]:
+        '''Create an index of the tree as it is now. See `TreeIndex`.'''
+        return TreeIndex[T](self)
 
     def __getitem__(self, key: str) -> Node[T]:
-        return self._lookup[key]
+        node = self._lookup.get(key, None)
+        if node is None and self._columns:
+            node = self._materialise(self._columns.positions[key])
+        if node is None:
+            raise KeyError(key)
+        return node
 
     def __contains__(self, key: str) -> bool:
-        return key in self._lookup
+        return key in self._lookup or (self._columns is not None and key in self._columns.positions)
 
     def get(self, key: str, fallback=MISSING) -> Node[T]:
         if fallback is MISSING:
-            return self._lookup[key]
+            return self[key]
 
-        return self._lookup.get(key, fallback)
+        node = self._lookup.get(key, None)
+        if node is None and self._columns:
+            position = self._columns.positions.get(key, None)
+            if position is not None:
+                node = self._materialise(position)
+        return node if node is not None else fallback
 
     def ingest_list(self, src: List[T], parent_fn: Callable[[T], Optional[T]]):
         '''
@@ -186,9 +237,51 @@ class IndexedTree(Generic[T]):
 
     def _register(self, node: Node[T]):
         key: str = self._key_fn(node.data) if self._key_fn else node.data  # type: ignore
-        if key in self._lookup:
+        if key in self:
             raise KeyError(f'Key already present: {key}')
         self._lookup[key] = node
+        self.version += 1
+
+    def _materialise(self, position: int) -> Node[T]:
+        '''Get the node for a position in the columns, creating it and any missing ancestors.'''
+        columns = self._columns
+        assert columns
+
+        # Climb until reaching a node that already exists
+        chain: List[int] = []
+        node: Optional[Node[T]] = None
+        while position >= 0:
+            node = self._lookup.get(columns.keys[position], None)
+            if node is not None:
+                break
+            chain.append(position)
+            position = columns.parents[position]
+
+        # Create the missing nodes on the way back down
+        # Their parents have not listed their children yet, so will pick them up when they do
+        for position in reversed(chain):
+            node = _ColumnNode(columns.keys[position], node, self, position)  # type: ignore
+            self._lookup[node.data] = node  # type: ignore
+
+        assert node
+        return node
+
+    def _get_column_children(self, parent: Node[T], position: int) -> List[Node[T]]:
+        columns = self._columns
+        assert columns
+
+        children: List[Node[T]] = []
+        child = position + 1
+        while child <= columns.ends[position]:
+            key = columns.keys[child]
+            node = self._lookup.get(key, None)
+            if node is None:
+                node = _ColumnNode(key, parent, self, child)  # type: ignore
+                self._lookup[key] = node
+            children.append(node)
+            child = columns.ends[child] + 1
+
+        return children
 
     def _handle_parent_arg(self, parent: Union[str, Node[T]]) -> Node[T]:
         parent_node: Node[T]
@@ -210,3 +303,124 @@ class IndexedTree(Generic[T]):
 
             p.text('Tree ')
             p.pretty(self.root)
+
+
+class _ColumnNode(Node[T]):
+    '''A node of a tree loaded from columns, which lists its children from the columns when first asked.'''
+
+    def __init__(self, data: T, parent: Optional[Node[T]], tree: IndexedTree[T], position: int):
+        super().__init__(data, parent)
+        self._tree: Optional[IndexedTree[T]] = tree
+        self._position = position
+
+    @property
+    def nodes(self) -> List[Node[T]]:
+        if self._tree:
+            tree = self._tree
+            self._tree = None
+            self._nodes = tree._get_column_children(self, self._position) + self._nodes  # pylint: disable=protected-access
+        return self._nodes
+
+    def add(self, data: Union[T, Node[T]]) -> Node[T]:
+        _ = self.nodes  # list the existing children first
+        return super().add(data)
+
+    def __contains__(self, data: Union[T, Node[T]]):
+        _ = self.nodes
+        return super().__contains__(data)
+
+
+class TreeColumns(NamedTuple):
+    '''The shape of a tree as flat columns, with nodes in depth-first pre-order.'''
+    keys: Sequence[str]
+    positions: Mapping[str, int]  # key -> position
+    parents: Sequence[int]  # position of each node's parent, or -1 for the root
+    ends: Sequence[int]  # position of the last descendant of each node
+
+
+class TreeIndex(Generic[T]):
+    '''
+    A frozen snapshot of the shape of an `IndexedTree`, answering ancestry questions without walking nodes.
+
+    Nodes are numbered in depth-first pre-order, so the descendants of each node are the contiguous run of
+    positions that follows it, up to its `end`. Checking ancestry is then a comparison of two positions, and
+    ancestors are found by following each node's parent position.
+
+    The index does not follow later changes to the tree - check `is_current` before relying on it.
+    '''
+
+    def __init__(self, tree: IndexedTree[T], columns: Optional[TreeColumns] = None):
+        self.tree = tree
+        self.version = tree.version
+
+        if columns:
+            self.keys, self.positions, self.parents, self.ends = columns
+            return
+
+        self.keys = keys = []
+        self.positions = positions = dict()
+        self.parents = parents = []
+        self.ends = ends = []
+        for node in tree.root.walk_iterator(skip_self=False):
+            key = tree.key_of(node.data)
+            position = len(keys)
+            positions[key] = position
+            keys.append(key)
+            ends.append(position)
+
+            parents.append(positions[tree.key_of(node.parent.data)] if node.parent else -1)
+
+        # Children come after their parents, so working backwards completes every range before it is used
+        for position in range(len(keys) - 1, 0, -1):
+            parent = parents[position]
+            if ends[position] > ends[parent]:
+                ends[parent] = ends[position]
+
+    def get_columns(self) -> TreeColumns:
+        return TreeColumns(self.keys, self.positions, self.parents, self.ends)
+
+    def is_current(self) -> bool:
+        '''Check the tree has not changed since the index was made.'''
+        return self.version == self.tree.version
+
+    def is_descendant(self, key: str, ancestor: str, include_self=False) -> bool:
+        '''
+        Check if `key` is below `ancestor` in the tree.
+        Raises KeyError if `key` is not indexed, but returns False for unknown ancestors.
+        '''
+        position = self.positions[key]
+        ancestor_position = self.positions.get(ancestor, None)
+        if ancestor_position is None:
+            return False
+        if position == ancestor_position:
+            return include_self
+        return ancestor_position < position <= self.ends[ancestor_position]
+
+    def get_descendants(self, key: str) -> Sequence[str]:
+        '''All descendants of a node, in depth-first order.'''
+        position = self.positions[key]
+        return self.keys[position + 1:self.ends[position] + 1]
+
+    def count_descendants(self, key: str) -> int:
+        position = self.positions[key]
+        return self.ends[position] - position
+
+    def count_all_descendants(self) -> Dict[str, int]:
+        ends = self.ends
+        return {key: ends[position] - position for position, key in enumerate(self.keys)}
+
+    def get_ancestors(self, key: str) -> Tuple[str, ...]:
+        '''All ancestors of a node, nearest first.'''
+        keys, parents = self.keys, self.parents
+        ancestors = []
+        position = parents[self.positions[key]]
+        while position >= 0:
+            ancestors.append(keys[position])
+            position = parents[position]
+        return tuple(ancestors)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self.positions
+
+    def __len__(self) -> int:
+        return len(self.keys)
@@ -0,0 +1,170 @@
+'''
+A compact columnar file format for trees keyed by strings, which loads in a few milliseconds however large the tree.
+
+The file holds the columns of a `TreeIndex` (parent and subtree end positions, in depth-first pre-order), the node names
+as a single string table, and the positions sorted by name so names can be found by binary search. It is read through
+a memory map, so only the parts that are used are ever read from disk.
+'''
+
+import mmap
+import os
+import struct
+import sys
+from array import array
+from bisect import bisect_left
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Sequence, Union, overload
+
+from .tree import TreeColumns, TreeIndex
+
+__all__ = [
+    'save_tree_columns',
+    'load_tree_columns',
+]
+
+MAGIC = b'PTRE'
+FORMAT_VERSION = 1
+HEADER = struct.Struct('<4sIII')  # magic, version, node count, tag size
+
+MISSING = object()
+
+
+def save_tree_columns(index: TreeIndex, filename: Union[str, Path], tag: str = ''):
+    '''
+    Save the shape of an indexed tree.
+    `tag` is stored alongside, e.g. to identify the versions of the data the tree was built from.
+    '''
+    keys = list(index.keys)
+    encoded = [key.encode('utf-8', 'surrogatepass') for key in keys]
+    tag_bytes = tag.encode('utf-8')
+
+    offsets = array('i', [0])
+    for name in encoded:
+        offsets.append(offsets[-1] + len(name))
+    order = array('i', sorted(range(len(keys)), key=encoded.__getitem__))
+
+    columns = [array('i', index.parents), array('i', index.ends), order, offsets]
+    if sys.byteorder != 'little':
+        for column in columns:
+            column.byteswap()
+
+    # Replace any previous file in one go, so readers never see a partial file
+    filename = Path(filename)
+    temp_filename = filename.with_suffix(filename.suffix + '.tmp')
+    with open(temp_filename, 'wb') as f:
+        f.write(HEADER.pack(MAGIC, FORMAT_VERSION, len(keys), len(tag_bytes)))
+        f.write(tag_bytes)
+        for column in columns:
+            f.write(column.tobytes())
+        for name in encoded:
+            f.write(name)
+    os.replace(temp_filename, filename)
+
+
+def load_tree_columns(filename: Union[str, Path], tag: str = '') -> Optional[TreeColumns]:
+    '''
+    Load the columns of a tree saved by `save_tree_columns`.
+    Returns None if the file is missing, unreadable or was saved with a different `tag`.
+    '''
+    try:
+        with open(filename, 'rb') as f:
+            data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    except (OSError, ValueError):
+        return None
+
+    if len(data) < HEADER.size or sys.byteorder != 'little':
+        return None
+    magic, version, count, tag_size = HEADER.unpack_from(data)
+    if magic != MAGIC or version != FORMAT_VERSION or data[HEADER.size:HEADER.size + tag_size] != tag.encode('utf-8'):
+        return None
+
+    view = memoryview(data)
+    offset = HEADER.size + tag_size
+    columns: List[memoryview] = []
+    for size in (count, count, count, count + 1):
+        columns.append(view[offset:offset + size*4].cast('i'))
+        offset += size * 4
+    parents, ends, order, offsets = columns
+
+    keys = _StringTable(data, offset, offsets)
+    return TreeColumns(keys, _Positions(keys, order), parents, ends)
+
+
+class _StringTable(Sequence[str]):
+    '''Node names, decoded as they are read.'''
+
+    def __init__(self, data: mmap.mmap, start: int, offsets: memoryview):
+        self.data = data
+        self.start = start
+        self.offsets = offsets
+
+    def get_bytes(self, index: int) -> bytes:
+        return self.data[self.start + self.offsets[index]:self.start + self.offsets[index + 1]]
+
+    @overload
+    def __getitem__(self, index: int) -> str:
+        ...
+
+    @overload
+    def __getitem__(self, index: slice) -> List[str]:
+        ...
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError(index)
+        return self.get_bytes(index).decode('utf-8', 'surrogatepass')
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    def __iter__(self) -> Iterator[str]:
+        return (self[i] for i in range(len(self)))
+
+
+class _Positions:
+    '''Finds the position of a name, by binary search of the positions sorted by name.'''
+
+    def __init__(self, keys: _StringTable, order: memoryview):
+        self.keys = keys
+        self.order = order
+        self.sorted_names = _SortedNames(keys, order)
+        self.found: Dict[str, Optional[int]] = dict()  # names already searched for
+
+    def get(self, key: str, default: Optional[int] = None) -> Optional[int]:
+        position = self.found.get(key, MISSING)
+        if position is MISSING:
+            name = key.encode('utf-8', 'surrogatepass')
+            i = bisect_left(self.sorted_names, name)
+            position = self.order[i] if i < len(self.order) and self.sorted_names[i] == name else None
+            self.found[key] = position
+        return default if position is None else position  # type: ignore
+
+    def __getitem__(self, key: str) -> int:
+        position = self.get(key)
+        if position is None:
+            raise KeyError(key)
+        return position
+
+    def __contains__(self, key: object) -> bool:
+        return isinstance(key, str) and self.get(key) is not None
+
+    def __len__(self) -> int:
+        return len(self.order)
+
+
+class _SortedNames(Sequence[bytes]):
+    '''Encoded names in sorted order, for `bisect`.'''
+
+    def __init__(self, keys: _StringTable, order: memoryview):
+        self.keys = keys
+        self.order = order
+
+    def __getitem__(self, index):  # type: ignore
+        return self.keys.get_bytes(self.order[index])
+
+    def __len__(self) -> int:
+        return len(self.order)